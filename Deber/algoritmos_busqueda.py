@@ -1,109 +1,397 @@
-import networkx as nx
 import numpy as np
 import heapq
-from geopy.distance import geodesic
+from grafo_compacto import GrafoCompacto
+from contraccion import JerarquiaContraccion
+from estadisticas_busqueda import EstadisticasBusqueda
+
+
+def _reconstruir_camino(padres, origen, destino):
+    """Reconstruir el camino de origen a destino siguiendo los punteros a padres"""
+    camino = [destino]
+    while camino[-1] != origen:
+        camino.append(padres[camino[-1]])
+    camino.reverse()
+    return camino
+
+
+def _dijkstra_csr(grafo, origen, destino, estadisticas=None):
+    """
+    Dijkstra sobre los arreglos CSR del grafo compacto.
+    Devuelve (camino, distancia, nodos_expandidos); camino es None si no hay ruta.
+    Si se pasa estadisticas (EstadisticasBusqueda), se registran los contadores.
+    """
+    offsets, vecinos, pesos = grafo.offsets, grafo.vecinos, grafo.pesos
+    infinito = float('inf')
+    distancias = [infinito] * grafo.numero_nodos
+    padres = [-1] * grafo.numero_nodos
+    distancias[origen] = 0.0
+    expandidos = 0
+    
+    frontera = [(0.0, origen)]
+    
+    try:
+        while frontera:
+            dist_actual, actual = heapq.heappop(frontera)
+            if estadisticas is not None:
+                estadisticas.extracciones += 1
+            
+            # Entrada obsoleta: ya se encontró un camino mejor a este nodo
+            if dist_actual > distancias[actual]:
+                continue
+            
+            if actual == destino:
+                return _reconstruir_camino(padres, origen, destino), dist_actual, expandidos
+            
+            expandidos += 1
+            
+            inicio, fin = offsets[actual], offsets[actual + 1]
+            for vecino, peso in zip(vecinos[inicio:fin].tolist(), pesos[inicio:fin].tolist()):
+                nueva_dist = dist_actual + peso
+                if nueva_dist < distancias[vecino]:
+                    distancias[vecino] = nueva_dist
+                    padres[vecino] = actual
+                    heapq.heappush(frontera, (nueva_dist, vecino))
+            
+            if estadisticas is not None:
+                estadisticas.expansion(len(frontera))
+        
+        return None, None, expandidos
+    finally:
+        if estadisticas is not None:
+            estadisticas.cerrar_frontera(len(frontera))
+
+
+def _voraz_csr(grafo, origen, destino, heuristicas, estadisticas=None):
+    """
+    Búsqueda voraz sobre los arreglos CSR del grafo compacto.
+    Devuelve (camino, distancia, nodos_expandidos); camino es None si no hay ruta.
+    Si se pasa estadisticas (EstadisticasBusqueda), se registran los contadores.
+    """
+    offsets, vecinos, pesos = grafo.offsets, grafo.vecinos, grafo.pesos
+    padres = [-1] * grafo.numero_nodos
+    visitados = [False] * grafo.numero_nodos
+    expandidos = 0
+    
+    # (prioridad, nodo, padre, distancia_acumulada): el camino se guarda con punteros
+    frontera = [(0.0, origen, -1, 0.0)]
+    
+    try:
+        while frontera:
+            _, actual, padre, dist_acumulada = heapq.heappop(frontera)
+            if estadisticas is not None:
+                estadisticas.extracciones += 1
+            
+            # Omitir entradas de nodos ya visitados
+            if visitados[actual]:
+                continue
+            
+            # El primer camino con el que se extrae un nodo es el que queda fijado
+            visitados[actual] = True
+            padres[actual] = padre
+            
+            if actual == destino:
+                return _reconstruir_camino(padres, origen, destino), dist_acumulada, expandidos
+            
+            expandidos += 1
+            inicio, fin = offsets[actual], offsets[actual + 1]
+            vecinos_actual = vecinos[inicio:fin]
+            for vecino, peso, heuristica in zip(vecinos_actual.tolist(), pesos[inicio:fin].tolist(),
+                                                heuristicas[vecinos_actual].tolist()):
+                if not visitados[vecino]:
+                    # En búsqueda voraz la prioridad es solo la heurística
+                    heapq.heappush(frontera, (heuristica, vecino, actual, dist_acumulada + peso))
+            
+            if estadisticas is not None:
+                estadisticas.expansion(len(frontera), fin - inicio)
+        
+        return None, None, expandidos
+    finally:
+        if estadisticas is not None:
+            estadisticas.cerrar_frontera(len(frontera))
+
+
+def _a_estrella_csr(grafo, origen, destino, heuristicas, estadisticas=None):
+    """
+    A* sobre los arreglos CSR del grafo compacto.
+    Devuelve (camino, distancia, nodos_expandidos); camino es None si no hay ruta.
+    Si se pasa estadisticas (EstadisticasBusqueda), se registran los contadores.
+    """
+    offsets, vecinos, pesos = grafo.offsets, grafo.vecinos, grafo.pesos
+    infinito = float('inf')
+    g_scores = [infinito] * grafo.numero_nodos
+    padres = [-1] * grafo.numero_nodos
+    visitados = [False] * grafo.numero_nodos
+    g_scores[origen] = 0.0
+    expandidos = 0
+    
+    frontera = [(0.0, 0.0, origen)]  # (f_score, g_score, nodo)
+    
+    try:
+        while frontera:
+            _, g_score, actual = heapq.heappop(frontera)
+            if estadisticas is not None:
+                estadisticas.extracciones += 1
+            
+            # Descartar entradas obsoletas (ya existe un camino mejor) o nodos ya expandidos
+            if visitados[actual] or g_score > g_scores[actual]:
+                continue
+            
+            if actual == destino:
+                return _reconstruir_camino(padres, origen, destino), g_score, expandidos
+            
+            visitados[actual] = True
+            expandidos += 1
+            
+            inicio, fin = offsets[actual], offsets[actual + 1]
+            vecinos_actual = vecinos[inicio:fin]
+            for vecino, peso, h_score in zip(vecinos_actual.tolist(), pesos[inicio:fin].tolist(),
+                                             heuristicas[vecinos_actual].tolist()):
+                tentative_g_score = g_score + peso
+                
+                # Si ya conocemos un camino mejor a este vecino, ignoramos este
+                if tentative_g_score >= g_scores[vecino]:
+                    continue
+                
+                g_scores[vecino] = tentative_g_score
+                padres[vecino] = actual
+                heapq.heappush(frontera, (tentative_g_score + h_score, tentative_g_score, vecino))
+            
+            if estadisticas is not None:
+                estadisticas.expansion(len(frontera), fin - inicio)
+        
+        return None, None, expandidos
+    finally:
+        if estadisticas is not None:
+            estadisticas.cerrar_frontera(len(frontera))
+
+
+def _bidireccional_csr(grafo, origen, destino, potencial=None, estadisticas=None):
+    """
+    Búsqueda bidireccional sobre los arreglos CSR del grafo compacto.
+    
+    Sin potencial es Dijkstra bidireccional. Con potencial p, la búsqueda hacia
+    adelante ordena por d(v) + p(v) y la búsqueda hacia atrás por d(v) - p(v)
+    (A* bidireccional con potenciales promediados). Con ambas claves la búsqueda
+    termina cuando la suma de los mínimos de las dos fronteras alcanza la mejor
+    distancia encontrada.
+    Devuelve (camino, distancia, nodos_expandidos); camino es None si no hay ruta.
+    Si se pasa estadisticas (EstadisticasBusqueda), se registran los contadores.
+    """
+    if origen == destino:
+        return [origen], 0.0, 0
+    
+    offsets, vecinos, pesos = grafo.offsets, grafo.vecinos, grafo.pesos
+    infinito = float('inf')
+    n = grafo.numero_nodos
+    
+    # Índice 0: búsqueda desde el origen; índice 1: búsqueda desde el destino.
+    # El grafo es no dirigido, así que la búsqueda inversa usa los mismos arreglos.
+    distancias = ([infinito] * n, [infinito] * n)
+    padres = ([-1] * n, [-1] * n)
+    cerrados = ([False] * n, [False] * n)
+    signos = (1.0, -1.0)
+    distancias[0][origen] = 0.0
+    distancias[1][destino] = 0.0
+    
+    p_origen = float(potencial[origen]) if potencial is not None else 0.0
+    p_destino = float(potencial[destino]) if potencial is not None else 0.0
+    fronteras = ([(p_origen, 0.0, origen)], [(-p_destino, 0.0, destino)])
+    
+    mejor = infinito
+    encuentro = -1
+    expandidos = 0
+    
+    while fronteras[0] and fronteras[1]:
+        # Criterio de parada: ninguna ruta pendiente puede mejorar la encontrada
+        if fronteras[0][0][0] + fronteras[1][0][0] >= mejor:
+            break
+        
+        # Expandir el lado con la frontera más pequeña
+        lado = 0 if len(fronteras[0]) <= len(fronteras[1]) else 1
+        frontera = fronteras[lado]
+        propias = distancias[lado]
+        opuestas = distancias[1 - lado]
+        signo = signos[lado]
+        
+        _, dist_actual, actual = heapq.heappop(frontera)
+        if estadisticas is not None:
+            estadisticas.extracciones += 1
+        
+        # Descartar entradas obsoletas o nodos ya expandidos en este sentido
+        if cerrados[lado][actual] or dist_actual > propias[actual]:
+            continue
+        
+        cerrados[lado][actual] = True
+        expandidos += 1
+        
+        inicio, fin = offsets[actual], offsets[actual + 1]
+        vecinos_actual = vecinos[inicio:fin]
+        if potencial is not None:
+            potenciales = potencial[vecinos_actual].tolist()
+        else:
+            potenciales = [0.0] * (fin - inicio)
+        
+        for vecino, peso, p_vecino in zip(vecinos_actual.tolist(), pesos[inicio:fin].tolist(), potenciales):
+            nueva_dist = dist_actual + peso
+            if nueva_dist < propias[vecino]:
+                propias[vecino] = nueva_dist
+                padres[lado][vecino] = actual
+                heapq.heappush(frontera, (nueva_dist + signo * p_vecino, nueva_dist, vecino))
+                
+                # Actualizar la mejor ruta si el vecino ya fue alcanzado desde el otro lado
+                if nueva_dist + opuestas[vecino] < mejor:
+                    mejor = nueva_dist + opuestas[vecino]
+                    encuentro = vecino
+        
+        if estadisticas is not None:
+            estadisticas.expansion(len(fronteras[0]) + len(fronteras[1]),
+                                   fin - inicio if potencial is not None else 0)
+    
+    if estadisticas is not None:
+        estadisticas.cerrar_frontera(len(fronteras[0]) + len(fronteras[1]))
+    
+    if encuentro < 0:
+        return None, None, expandidos
+    
+    # Unir el camino origen → encuentro con el camino encuentro → destino
+    camino = _reconstruir_camino(padres[0], origen, encuentro)
+    actual = encuentro
+    while actual != destino:
+        actual = padres[1][actual]
+        camino.append(actual)
+    
+    return camino, mejor, expandidos
+
 
 class AlgoritmosBusqueda:
     """Clase para implementar diferentes algoritmos de búsqueda de rutas"""
     
     @staticmethod
-    def dijkstra(G, origen, destino):
+    def obtener_compacto(G, coords=None):
+        """
+        Obtener la representación compacta (CSR) del grafo.
+        GeneradorGrafo.crear_grafo la guarda en G.graph['compacto']; si no existe (o se
+        construyó sin coordenadas y ahora se proporcionan) se construye aquí y se guarda
+        para las siguientes consultas.
+        """
+        compacto = G.graph.get('compacto')
+        if compacto is None or (coords and not compacto.tiene_coordenadas):
+            compacto = GrafoCompacto.desde_networkx(G, coords)
+            G.graph['compacto'] = compacto
+        return compacto
+    
+    @staticmethod
+    def obtener_heuristica(G, grafo):
+        """
+        Heurística por defecto: la ALT si se precalcularon landmarks para el grafo,
+        o la distancia en línea recta del grafo compacto en caso contrario.
+        """
+        heuristica = G.graph.get('landmarks')
+        if heuristica is None or len(heuristica.nombres) != grafo.numero_nodos:
+            heuristica = grafo.heuristica
+        return heuristica
+    
+    @staticmethod
+    def _construir_resultado(grafo, camino, distancia_total, algoritmo, expandidos, estadisticas=None):
+        """
+        Convertir un camino de ids enteros al diccionario de resultado.
+        Si la búsqueda se instrumentó, los contadores se agregan en 'estadisticas'.
+        """
+        ruta = [grafo.nombres[i] for i in camino]
+        
+        # Calcular tramos
+        tramos = []
+        for i in range(len(camino)-1):
+            distancia_tramo = grafo.peso(camino[i], camino[i+1])
+            tramos.append((ruta[i], ruta[i+1], distancia_tramo))
+        
+        resultado = {
+            'ruta': ruta,
+            'distancia_total': distancia_total,
+            'tramos': tramos,
+            'algoritmo': algoritmo,
+            'nodos_expandidos': expandidos
+        }
+        
+        if estadisticas is not None:
+            estadisticas.expandidos = expandidos
+            estadisticas.detener()
+            resultado['estadisticas'] = estadisticas.como_diccionario()
+        
+        return resultado
+    
+    @staticmethod
+    def dijkstra(G, origen, destino, instrumentar=False):
         """
         Búsqueda de costo uniforme (Dijkstra) para encontrar la ruta de menor distancia.
-        Ya implementado en NetworkX.
+        Se ejecuta sobre los arreglos CSR del grafo compacto; si el grafo tiene una
+        tabla de rutas precalculada, la respuesta se obtiene directamente de ella.
+        Con instrumentar=True el resultado incluye los contadores de la búsqueda
+        ('estadisticas'); lo mismo aplica a los demás algoritmos.
         """
-        try:
-            # Calcular la ruta más corta usando Dijkstra
-            ruta = nx.dijkstra_path(G, origen, destino, weight='weight')
-            distancia_total = nx.dijkstra_path_length(G, origen, destino, weight='weight')
-            
-            # Calcular tramos
-            tramos = []
-            for i in range(len(ruta)-1):
-                origen_tramo = ruta[i]
-                destino_tramo = ruta[i+1]
-                distancia_tramo = G[origen_tramo][destino_tramo]['weight']
-                tramos.append((origen_tramo, destino_tramo, distancia_tramo))
-            
-            return {
-                'ruta': ruta,
-                'distancia_total': distancia_total,
-                'tramos': tramos,
-                'algoritmo': 'Dijkstra'
-            }
-        except nx.NetworkXNoPath:
+        estadisticas = EstadisticasBusqueda() if instrumentar else None
+        grafo = AlgoritmosBusqueda.obtener_compacto(G)
+        
+        # Verificar que el origen y destino existen
+        if origen not in grafo.indice or destino not in grafo.indice:
+            return f"El origen o destino no existen en el grafo"
+        
+        # La tabla solo se usa si se calculó para este mismo grafo (misma huella)
+        tabla = G.graph.get('tabla_rutas')
+        if tabla is not None and tabla.firma == grafo.firma:
+            # Consulta en la tabla: se desenrolla la ruta con los siguientes saltos
+            camino = tabla.ruta(grafo.indice[origen], grafo.indice[destino])
+            distancia_total = None if camino is None else tabla.distancia(camino[0], camino[-1])
+            expandidos = 0
+        else:
+            camino, distancia_total, expandidos = _dijkstra_csr(grafo, grafo.indice[origen], grafo.indice[destino],
+                                                                estadisticas)
+        
+        if camino is None:
             return f"No existe una ruta entre {origen} y {destino}"
+        
+        return AlgoritmosBusqueda._construir_resultado(grafo, camino, distancia_total, 'Dijkstra', expandidos,
+                                                       estadisticas)
     
     @staticmethod
-    def busqueda_voraz(G, origen, destino, coords):
+    def busqueda_voraz(G, origen, destino, coords, heuristica=None, instrumentar=False):
         """
         Implementación de búsqueda voraz (Greedy Best-First Search).
-        Utiliza la distancia geodésica directa al destino como heurística.
+        Utiliza la distancia en línea recta al destino (precalculada) como heurística.
         
         Args:
             G: Grafo NetworkX
             origen: Nodo de origen
             destino: Nodo de destino
             coords: Diccionario con coordenadas de los nodos {nodo: (lat, lon)}
+            heuristica: Proveedor de heurísticas opcional (por defecto, ALT o línea recta)
+            instrumentar: Si es True, el resultado incluye los contadores de la búsqueda
         """
+        estadisticas = EstadisticasBusqueda() if instrumentar else None
+        grafo = AlgoritmosBusqueda.obtener_compacto(G, coords)
+        
         # Verificar que el origen y destino existen
-        if origen not in G or destino not in G:
+        if origen not in grafo.indice or destino not in grafo.indice:
             return f"El origen o destino no existen en el grafo"
         
-        # Coordenadas del destino
-        dest_coords = coords[destino]
+        # Distancias en línea recta de todos los nodos al destino (calculadas una vez)
+        if heuristica is None:
+            heuristica = AlgoritmosBusqueda.obtener_heuristica(G, grafo)
+        heuristicas = heuristica.arreglo(destino)
         
-        # Cola de prioridad para nodos por explorar
-        frontera = [(0, origen, [origen], 0)]  # (prioridad, nodo, camino, distancia_acumulada)
-        visitados = set()
+        camino, distancia_total, expandidos = _voraz_csr(grafo, grafo.indice[origen], grafo.indice[destino], heuristicas,
+                                                         estadisticas)
+        if camino is None:
+            return f"No existe una ruta entre {origen} y {destino}"
         
-        while frontera:
-            # Obtener el nodo con menor valor heurístico (más cercano al destino)
-            _, actual, camino, dist_acumulada = heapq.heappop(frontera)
-            
-            # Si llegamos al destino, hemos encontrado la ruta
-            if actual == destino:
-                # Calcular tramos
-                tramos = []
-                for i in range(len(camino)-1):
-                    origen_tramo = camino[i]
-                    destino_tramo = camino[i+1]
-                    distancia_tramo = G[origen_tramo][destino_tramo]['weight']
-                    tramos.append((origen_tramo, destino_tramo, distancia_tramo))
-                
-                return {
-                    'ruta': camino,
-                    'distancia_total': dist_acumulada,
-                    'tramos': tramos,
-                    'algoritmo': 'Búsqueda Voraz'
-                }
-            
-            # Omitir nodos ya visitados
-            if actual in visitados:
-                continue
-            
-            visitados.add(actual)
-            
-            # Explorar vecinos
-            for vecino in G[actual]:
-                if vecino not in visitados:
-                    # Distancia acumulada hasta este vecino
-                    nueva_dist = dist_acumulada + G[actual][vecino]['weight']
-                    
-                    # Distancia geodésica directa al destino (heurística)
-                    heuristica = geodesic(coords[vecino], dest_coords).kilometers
-                    
-                    # En búsqueda voraz solo usamos la heurística como criterio de decisión
-                    # (no consideramos la distancia acumulada para la prioridad)
-                    heapq.heappush(frontera, (heuristica, vecino, camino + [vecino], nueva_dist))
-        
-        return f"No existe una ruta entre {origen} y {destino}"
+        return AlgoritmosBusqueda._construir_resultado(grafo, camino, distancia_total, 'Búsqueda Voraz', expandidos,
+                                                       estadisticas)
     
     @staticmethod
-    def a_estrella(G, origen, destino, coords):
+    def a_estrella(G, origen, destino, coords, heuristica=None, instrumentar=False):
         """
         Implementación del algoritmo A* (A estrella).
-        Combina el costo del camino recorrido y una heurística para estimar 
+        Combina el costo del camino recorrido y una heurística para estimar
         la distancia restante hasta el destino.
         
         Args:
@@ -111,98 +399,142 @@ class AlgoritmosBusqueda:
             origen: Nodo de origen
             destino: Nodo de destino
             coords: Diccionario con coordenadas de los nodos {nodo: (lat, lon)}
+            heuristica: Proveedor de heurísticas opcional (por defecto, ALT o línea recta)
+            instrumentar: Si es True, el resultado incluye los contadores de la búsqueda
         """
+        estadisticas = EstadisticasBusqueda() if instrumentar else None
+        grafo = AlgoritmosBusqueda.obtener_compacto(G, coords)
+        
         # Verificar que el origen y destino existen
-        if origen not in G or destino not in G:
+        if origen not in grafo.indice or destino not in grafo.indice:
             return f"El origen o destino no existen en el grafo"
         
-        # Coordenadas del destino
-        dest_coords = coords[destino]
+        # Distancias en línea recta de todos los nodos al destino (calculadas una vez)
+        if heuristica is None:
+            heuristica = AlgoritmosBusqueda.obtener_heuristica(G, grafo)
+        heuristicas = heuristica.arreglo(destino)
         
-        # Cola de prioridad para nodos por explorar
-        # (f_score, nodo, camino, g_score)
-        # f_score = g_score + h_score (costo total estimado)
-        # g_score = costo real acumulado hasta el nodo
-        # h_score = heurística (estimación del costo restante)
-        frontera = [(0, origen, [origen], 0)]
-        visitados = set()
+        camino, distancia_total, expandidos = _a_estrella_csr(grafo, grafo.indice[origen], grafo.indice[destino], heuristicas,
+                                                              estadisticas)
+        if camino is None:
+            return f"No existe una ruta entre {origen} y {destino}"
         
-        # Diccionario para guardar el mejor g_score conocido para cada nodo
-        g_scores = {origen: 0}
+        return AlgoritmosBusqueda._construir_resultado(grafo, camino, distancia_total, 'A* (A estrella)', expandidos,
+                                                       estadisticas)
+    
+    @staticmethod
+    def dijkstra_bidireccional(G, origen, destino, instrumentar=False):
+        """
+        Dijkstra bidireccional: avanza a la vez desde el origen y desde el destino
+        y se detiene cuando las dos búsquedas ya no pueden mejorar la ruta encontrada.
+        """
+        estadisticas = EstadisticasBusqueda() if instrumentar else None
+        grafo = AlgoritmosBusqueda.obtener_compacto(G)
         
-        while frontera:
-            # Obtener el nodo con menor f_score (más prometedor)
-            _, actual, camino, g_score = heapq.heappop(frontera)
-            
-            # Si llegamos al destino, hemos encontrado la ruta
-            if actual == destino:
-                # Calcular tramos
-                tramos = []
-                for i in range(len(camino)-1):
-                    origen_tramo = camino[i]
-                    destino_tramo = camino[i+1]
-                    distancia_tramo = G[origen_tramo][destino_tramo]['weight']
-                    tramos.append((origen_tramo, destino_tramo, distancia_tramo))
-                
-                return {
-                    'ruta': camino,
-                    'distancia_total': g_score,
-                    'tramos': tramos,
-                    'algoritmo': 'A* (A estrella)'
-                }
-            
-            # No volver a expandir nodos ya visitados
-            if actual in visitados:
-                continue
-            
-            visitados.add(actual)
-            
-            # Explorar vecinos
-            for vecino in G.neighbors(actual):
-                # Costo para llegar al vecino
-                tentative_g_score = g_score + G[actual][vecino]['weight']
-                
-                # Si ya conocemos un camino mejor a este vecino, ignoramos este
-                if vecino in g_scores and tentative_g_score >= g_scores[vecino]:
-                    continue
-                
-                # Este camino es mejor, lo guardamos
-                g_scores[vecino] = tentative_g_score
-                
-                # Calcular la heurística (distancia geodésica directa al destino)
-                h_score = geodesic(coords[vecino], dest_coords).kilometers
-                
-                # f_score es la suma del costo actual y la heurística
-                f_score = tentative_g_score + h_score
-                
-                # Añadir a la frontera
-                heapq.heappush(frontera, (f_score, vecino, camino + [vecino], tentative_g_score))
+        # Verificar que el origen y destino existen
+        if origen not in grafo.indice or destino not in grafo.indice:
+            return f"El origen o destino no existen en el grafo"
+        
+        camino, distancia_total, expandidos = _bidireccional_csr(grafo, grafo.indice[origen], grafo.indice[destino],
+                                                                 estadisticas=estadisticas)
+        if camino is None:
+            return f"No existe una ruta entre {origen} y {destino}"
         
-        return f"No existe una ruta entre {origen} y {destino}"
+        return AlgoritmosBusqueda._construir_resultado(grafo, camino, distancia_total, 'Dijkstra Bidireccional', expandidos,
+                                                       estadisticas)
     
     @staticmethod
-    def comparar_algoritmos(G, origen, destino, coords):
+    def a_estrella_bidireccional(G, origen, destino, coords, heuristica=None, instrumentar=False):
         """
-        Compara los resultados de los tres algoritmos de búsqueda.
+        A* bidireccional con potenciales promediados: p(v) = (h_destino(v) - h_origen(v)) / 2.
+        Ambas búsquedas usan el mismo potencial (con signo opuesto), lo que mantiene
+        la parada simple y garantiza la ruta óptima con una heurística consistente.
         
         Args:
             G: Grafo NetworkX
             origen: Nodo de origen
             destino: Nodo de destino
             coords: Diccionario con coordenadas de los nodos {nodo: (lat, lon)}
+            heuristica: Proveedor de heurísticas opcional (por defecto, ALT o línea recta)
+            instrumentar: Si es True, el resultado incluye los contadores de la búsqueda
+        """
+        estadisticas = EstadisticasBusqueda() if instrumentar else None
+        grafo = AlgoritmosBusqueda.obtener_compacto(G, coords)
         
-        Returns:
-            Diccionario con los resultados de los tres algoritmos
+        # Verificar que el origen y destino existen
+        if origen not in grafo.indice or destino not in grafo.indice:
+            return f"El origen o destino no existen en el grafo"
+        
+        if heuristica is None:
+            heuristica = AlgoritmosBusqueda.obtener_heuristica(G, grafo)
+        potencial = (heuristica.arreglo(destino) - heuristica.arreglo(origen)) / 2
+        
+        camino, distancia_total, expandidos = _bidireccional_csr(grafo, grafo.indice[origen], grafo.indice[destino], potencial,
+                                                                 estadisticas)
+        if camino is None:
+            return f"No existe una ruta entre {origen} y {destino}"
+        
+        return AlgoritmosBusqueda._construir_resultado(grafo, camino, distancia_total, 'A* Bidireccional', expandidos,
+                                                       estadisticas)
+
+    @staticmethod
+    def contraccion_jerarquica(G, origen, destino, instrumentar=False):
         """
-        print(f"Comparando algoritmos para la ruta {origen} → {destino}...")
+        Consulta sobre la jerarquía de contracción (Contraction Hierarchies).
+        Usa la jerarquía preprocesada en G.graph['contraccion']; si no existe (o no
+        corresponde al grafo compacto) se construye y se guarda en el grafo.
+        Los atajos se desempaquetan, por lo que 'ruta' y 'tramos' contienen las
+        ciudades y aristas originales.
+        """
+        estadisticas = EstadisticasBusqueda() if instrumentar else None
+        grafo = AlgoritmosBusqueda.obtener_compacto(G)
+
+        # Verificar que el origen y destino existen
+        if origen not in grafo.indice or destino not in grafo.indice:
+            return f"El origen o destino no existen en el grafo"
+
+        # La jerarquía se reconstruye si no corresponde a este mismo grafo (misma huella:
+        # un cambio de pesos o aristas con los mismos nodos también la invalida)
+        jerarquia = G.graph.get('contraccion')
+        if jerarquia is None or jerarquia.firma != grafo.firma:
+            jerarquia = JerarquiaContraccion.construir(grafo)
+            G.graph['contraccion'] = jerarquia
+
+        camino, distancia_total, expandidos = jerarquia.consultar(grafo.indice[origen], grafo.indice[destino],
+                                                                  estadisticas)
+        if camino is None:
+            return f"No existe una ruta entre {origen} y {destino}"
+
+        return AlgoritmosBusqueda._construir_resultado(grafo, camino, distancia_total, 'Contraction Hierarchies', expandidos,
+                                                       estadisticas)
+
+    @staticmethod
+    def comparar_algoritmos(G, origen, destino, coords, instrumentar=False):
+        """
+        Compara los resultados de los algoritmos de búsqueda.
         
+        Args:
+            G: Grafo NetworkX
+            origen: Nodo de origen
+            destino: Nodo de destino
+            coords: Diccionario con coordenadas de los nodos {nodo: (lat, lon)}
+            instrumentar: Si es True, cada resultado incluye los contadores de la búsqueda
+        
+        Returns:
+            Diccionario con los resultados de cada algoritmo
+        """
         # Ejecutar cada algoritmo
-        resultado_dijkstra = AlgoritmosBusqueda.dijkstra(G, origen, destino)
-        resultado_voraz = AlgoritmosBusqueda.busqueda_voraz(G, origen, destino, coords)
-        resultado_a_estrella = AlgoritmosBusqueda.a_estrella(G, origen, destino, coords)
+        resultado_dijkstra = AlgoritmosBusqueda.dijkstra(G, origen, destino, instrumentar=instrumentar)
+        resultado_voraz = AlgoritmosBusqueda.busqueda_voraz(G, origen, destino, coords, instrumentar=instrumentar)
+        resultado_a_estrella = AlgoritmosBusqueda.a_estrella(G, origen, destino, coords, instrumentar=instrumentar)
+        resultado_dijkstra_bid = AlgoritmosBusqueda.dijkstra_bidireccional(G, origen, destino, instrumentar=instrumentar)
+        resultado_a_estrella_bid = AlgoritmosBusqueda.a_estrella_bidireccional(G, origen, destino, coords,
+                                                                               instrumentar=instrumentar)
         
         return {
             'Dijkstra': resultado_dijkstra,
             'Voraz': resultado_voraz,
-            'A_estrella': resultado_a_estrella
-        }
\ No newline at end of file
+            'A_estrella': resultado_a_estrella,
+            'Dijkstra_bidireccional': resultado_dijkstra_bid,
+            'A_estrella_bidireccional': resultado_a_estrella_bid
+        }
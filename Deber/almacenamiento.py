@@ -0,0 +1,587 @@
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+
+from conexion_bd import obtener_cliente
+
+# Backend por defecto: 'supabase' o 'sqlite' (variable de entorno ALMACENAMIENTO)
+BACKEND_POR_DEFECTO = os.getenv("ALMACENAMIENTO", "supabase")
+
+# Archivo de la base de datos local cuando se usa el backend SQLite
+RUTA_SQLITE = os.getenv("SQLITE_RUTA", "rutas_ecuador.db")
+
+# Filas por petición en las escrituras masivas
+TAMANO_LOTE = 500
+
+# Función que debe existir en Supabase para el intercambio atómico de distancias.
+# La tabla distancias_nueva tiene las mismas columnas que distancias. Todo el cuerpo
+# de la función corre en una transacción, así que los lectores nunca ven la tabla vacía.
+SQL_INTERCAMBIO_DISTANCIAS = """
+CREATE TABLE IF NOT EXISTS distancias_nueva (LIKE distancias INCLUDING DEFAULTS);
+
+CREATE OR REPLACE FUNCTION intercambiar_distancias() RETURNS integer
+LANGUAGE plpgsql AS $$
+DECLARE
+    filas integer;
+BEGIN
+    LOCK TABLE distancias IN EXCLUSIVE MODE;
+    DELETE FROM distancias;
+    INSERT INTO distancias (origen_id, destino_id, distancia)
+        SELECT origen_id, destino_id, distancia FROM distancias_nueva;
+    GET DIAGNOSTICS filas = ROW_COUNT;
+    DELETE FROM distancias_nueva;
+    RETURN filas;
+END;
+$$;
+"""
+
+
+class Almacenamiento(ABC):
+    """
+    Interfaz de acceso a las tablas ciudades, distancias, rutas_calculadas y tramos_ruta.
+
+    Cada backend debe implementar todas las operaciones abstractas; si falta alguna,
+    el error aparece al crear el backend y no a mitad de una operación.
+    Las filas se devuelven como diccionarios con los mismos nombres de columna en
+    todos los backends. Los errores de la base de datos se propagan como excepciones;
+    CiudadesCRUD los convierte en {"error": ...}.
+    """
+
+    nombre = None
+
+    @abstractmethod
+    def listar_ciudades(self):
+        """Todas las ciudades (todas las columnas) ordenadas por nombre"""
+
+    @abstractmethod
+    def obtener_ciudad(self, ciudad_id):
+        """La ciudad con el id dado, o None si no existe"""
+
+    @abstractmethod
+    def obtener_ciudades(self, ids):
+        """Las ciudades cuyos ids están en la lista (una sola consulta)"""
+
+    @abstractmethod
+    def buscar_ciudades(self, nombre):
+        """Ciudades cuyo nombre contiene el texto dado (sin distinguir mayúsculas)"""
+
+    @abstractmethod
+    def existe_ciudad(self, nombre):
+        """True si ya hay una ciudad con ese nombre exacto"""
+
+    @abstractmethod
+    def maximo_indice_original(self):
+        """Mayor indice_original registrado, o None si no hay ninguno"""
+
+    @abstractmethod
+    def insertar_ciudad(self, datos):
+        """Insertar una ciudad y devolver la fila creada (con su id), o None si falló"""
+
+    @abstractmethod
+    def actualizar_ciudad(self, ciudad_id, datos):
+        """Actualizar las columnas dadas y devolver la fila actualizada, o None si no existe"""
+
+    @abstractmethod
+    def eliminar_ciudades(self, ids):
+        """
+        Eliminar varias ciudades junto con todo lo que depende de ellas.
+
+        Se eliminan con operaciones de conjunto (no una consulta por fila): las
+        distancias en ambas direcciones, las rutas calculadas que empiezan, terminan
+        o pasan por alguna de las ciudades, los tramos de esas rutas y las ciudades.
+        Devuelve la lista de ids de las ciudades eliminadas.
+        """
+
+    def eliminar_ciudad(self, ciudad_id):
+        """Eliminar la ciudad; devuelve True si se eliminó alguna fila"""
+        return bool(self.eliminar_ciudades([ciudad_id]))
+
+    @abstractmethod
+    def actualizar_coordenadas(self, cambios, tamano_lote=TAMANO_LOTE):
+        """
+        Actualizar por lotes las coordenadas de varias ciudades.
+
+        Args:
+            cambios: Lista de {'id', 'nombre', 'latitud', 'longitud'} de ciudades existentes
+            tamano_lote: Número máximo de filas por petición
+        """
+
+    @abstractmethod
+    def insertar_distancias(self, registros):
+        """
+        Insertar registros {'origen_id', 'destino_id', 'distancia'} en una sola
+        operación: se insertan todos o ninguno.
+        """
+
+    @abstractmethod
+    def existe_distancia(self, origen_id, destino_id):
+        """True si hay un registro de distancia de origen_id a destino_id"""
+
+    @abstractmethod
+    def listar_distancias(self):
+        """Todos los registros de distancias con id, origen_id, destino_id y distancia"""
+
+    @abstractmethod
+    def reemplazar_distancias(self, registros, tamano_lote=TAMANO_LOTE):
+        """
+        Reemplazar toda la tabla distancias por los registros dados.
+        Los registros se escriben por lotes en una tabla de preparación que luego
+        sustituye a la tabla real de forma atómica: los lectores ven la tabla
+        anterior completa o la nueva completa, nunca una tabla vacía.
+        """
+
+    @abstractmethod
+    def aplicar_cambios_distancias(self, insertar, actualizar, eliminar, tamano_lote=TAMANO_LOTE):
+        """
+        Escribir solo las diferencias en la tabla distancias. No tiene por qué ser
+        atómico: en Supabase cada lote es una petición separada.
+
+        Args:
+            insertar: Registros nuevos {'origen_id', 'destino_id', 'distancia'}
+            actualizar: Registros existentes {'id', 'origen_id', 'destino_id', 'distancia'} con la nueva distancia
+            eliminar: Ids de los registros que sobran
+            tamano_lote: Número máximo de filas por petición
+        """
+
+    @abstractmethod
+    def datos_grafo(self):
+        """
+        Devolver (ciudades, distancias) para construir el grafo: ciudades con
+        id, nombre, latitud y longitud; distancias con origen_id, destino_id y distancia.
+        """
+
+    @abstractmethod
+    def listar_conexiones(self):
+        """
+        Todas las conexiones no dirigidas en una sola consulta, como
+        [{'ciudad1': nombre, 'ciudad2': nombre, 'distancia': km}, ...]
+        """
+
+    @staticmethod
+    def _conexiones_unicas(registros):
+        """
+        Reducir registros (origen_id, origen, destino_id, destino, distancia) a una
+        conexión por par de ciudades, sin importar en qué dirección esté guardada.
+        """
+        conexiones = {}
+        for origen_id, origen, destino_id, destino, distancia in registros:
+            if origen_id == destino_id:
+                continue
+            clave = (min(origen_id, destino_id), max(origen_id, destino_id))
+            if clave not in conexiones:
+                ciudad1, ciudad2 = (origen, destino) if origen_id < destino_id else (destino, origen)
+                conexiones[clave] = {'ciudad1': ciudad1, 'ciudad2': ciudad2, 'distancia': distancia}
+        return sorted(conexiones.values(), key=lambda c: (c['ciudad1'], c['ciudad2']))
+
+
+class AlmacenamientoSupabase(Almacenamiento):
+    """Backend sobre la API REST de Supabase (cliente compartido de conexion_bd)"""
+
+    nombre = "supabase"
+
+    @staticmethod
+    def _tabla(nombre):
+        return obtener_cliente().table(nombre)
+
+    def listar_ciudades(self):
+        return self._tabla('ciudades').select('*').order('nombre').execute().data
+
+    def obtener_ciudad(self, ciudad_id):
+        response = self._tabla('ciudades').select('*').eq('id', ciudad_id).execute()
+        return response.data[0] if response.data else None
+
+    def obtener_ciudades(self, ids):
+        if not ids:
+            return []
+        return self._tabla('ciudades').select('*').in_('id', list(ids)).execute().data
+
+    def buscar_ciudades(self, nombre):
+        # ILIKE: búsqueda parcial e insensible a mayúsculas/minúsculas
+        return self._tabla('ciudades').select('*').ilike('nombre', f'%{nombre}%').execute().data
+
+    def existe_ciudad(self, nombre):
+        return bool(self._tabla('ciudades').select('id').eq('nombre', nombre).execute().data)
+
+    def maximo_indice_original(self):
+        # El servidor ordena y devuelve una sola fila en lugar de toda la columna
+        response = self._tabla('ciudades').select('indice_original').not_.is_('indice_original', 'null') \
+            .order('indice_original', desc=True).limit(1).execute()
+        return response.data[0]['indice_original'] if response.data else None
+
+    def insertar_ciudad(self, datos):
+        response = self._tabla('ciudades').insert(datos).execute()
+        return response.data[0] if response.data else None
+
+    def actualizar_ciudad(self, ciudad_id, datos):
+        response = self._tabla('ciudades').update(datos).eq('id', ciudad_id).execute()
+        return response.data[0] if response.data else None
+
+    def eliminar_ciudades(self, ids):
+        ids = sorted(set(ids))
+        if not ids:
+            return []
+        lista = ','.join(str(i) for i in ids)
+        filtro = f"origen_id.in.({lista}),destino_id.in.({lista})"
+
+        # Rutas que tocan alguna de las ciudades: como extremo o en alguno de sus tramos
+        rutas_ids = {r['id'] for r in self._tabla('rutas_calculadas').select('id').or_(filtro).execute().data}
+        rutas_ids.update(t['ruta_id'] for t in self._tabla('tramos_ruta').select('ruta_id').or_(filtro).execute().data)
+
+        # Una sola petición por tabla
+        if rutas_ids:
+            rutas_ids = sorted(rutas_ids)
+            self._tabla('tramos_ruta').delete().in_('ruta_id', rutas_ids).execute()
+            self._tabla('rutas_calculadas').delete().in_('id', rutas_ids).execute()
+        self._tabla('distancias').delete().or_(filtro).execute()
+        return [c['id'] for c in self._tabla('ciudades').delete().in_('id', ids).execute().data]
+
+    def actualizar_coordenadas(self, cambios, tamano_lote=TAMANO_LOTE):
+        # Upsert por id: se incluye el nombre porque PostgreSQL valida las columnas
+        # obligatorias antes de resolver el conflicto
+        filas = [{'id': c['id'], 'nombre': c['nombre'], 'latitud': c['latitud'], 'longitud': c['longitud']}
+                 for c in cambios]
+        for inicio in range(0, len(filas), tamano_lote):
+            self._tabla('ciudades').upsert(filas[inicio:inicio + tamano_lote]).execute()
+
+    def insertar_distancias(self, registros):
+        # Un solo INSERT con todas las filas: PostgreSQL lo ejecuta como una sentencia atómica
+        if registros:
+            self._tabla('distancias').insert(list(registros)).execute()
+
+    def existe_distancia(self, origen_id, destino_id):
+        response = self._tabla('distancias').select('origen_id').eq('origen_id', origen_id).eq('destino_id', destino_id).execute()
+        return bool(response.data)
+
+    def listar_distancias(self):
+        return self._tabla('distancias').select('id, origen_id, destino_id, distancia').execute().data
+
+    def reemplazar_distancias(self, registros, tamano_lote=TAMANO_LOTE):
+        # Preparar la tabla de preparación (la tabla real no se toca hasta el intercambio)
+        self._tabla('distancias_nueva').delete().neq('id', 0).execute()
+        registros = list(registros)
+        for inicio in range(0, len(registros), tamano_lote):
+            self._tabla('distancias_nueva').insert(registros[inicio:inicio + tamano_lote]).execute()
+
+        # Intercambio atómico en el servidor (ver SQL_INTERCAMBIO_DISTANCIAS)
+        obtener_cliente().rpc('intercambiar_distancias', {}).execute()
+
+    def aplicar_cambios_distancias(self, insertar, actualizar, eliminar, tamano_lote=TAMANO_LOTE):
+        insertar, actualizar, eliminar = list(insertar), list(actualizar), list(eliminar)
+        for inicio in range(0, len(insertar), tamano_lote):
+            self._tabla('distancias').insert(insertar[inicio:inicio + tamano_lote]).execute()
+        for inicio in range(0, len(actualizar), tamano_lote):
+            self._tabla('distancias').upsert(actualizar[inicio:inicio + tamano_lote]).execute()
+        for inicio in range(0, len(eliminar), tamano_lote):
+            self._tabla('distancias').delete().in_('id', eliminar[inicio:inicio + tamano_lote]).execute()
+
+    def datos_grafo(self):
+        ciudades = self._tabla('ciudades').select('id, nombre, latitud, longitud').execute().data
+        distancias = self._tabla('distancias').select('origen_id, destino_id, distancia').execute().data
+        return ciudades, distancias
+
+    def listar_conexiones(self):
+        try:
+            # Recursos embebidos de PostgREST: los nombres llegan en la misma respuesta
+            filas = self._tabla('distancias').select(
+                'origen_id, destino_id, distancia, origen:ciudades!origen_id(nombre), destino:ciudades!destino_id(nombre)'
+            ).execute().data
+            registros = [(f['origen_id'], f['origen']['nombre'], f['destino_id'], f['destino']['nombre'], f['distancia'])
+                         for f in filas if f['origen'] and f['destino']]
+        except Exception as e:
+            # Sin llaves foráneas declaradas no se puede embeber: dos consultas en total
+            print(f"No se pudieron embeber los nombres de las ciudades ({e}); se usan dos consultas")
+            ciudades, distancias = self.datos_grafo()
+            id_a_nombre = {c['id']: c['nombre'] for c in ciudades}
+            registros = [(d['origen_id'], id_a_nombre[d['origen_id']], d['destino_id'], id_a_nombre[d['destino_id']],
+                          d['distancia'])
+                         for d in distancias if d['origen_id'] in id_a_nombre and d['destino_id'] in id_a_nombre]
+        return self._conexiones_unicas(registros)
+
+
+class AlmacenamientoSQLite(Almacenamiento):
+    """
+    Backend local sobre SQLite con el mismo esquema que Supabase.
+
+    Permite usar la aplicación y hacer pruebas de carga sin conexión. Se usa una
+    sola conexión protegida por un bloqueo, ya que la interfaz consulta desde
+    varios hilos.
+    """
+
+    nombre = "sqlite"
+
+    ESQUEMA = """
+        CREATE TABLE IF NOT EXISTS ciudades (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            latitud REAL,
+            longitud REAL,
+            indice_original INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS idx_ciudades_nombre ON ciudades (nombre);
+
+        CREATE TABLE IF NOT EXISTS distancias (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            origen_id INTEGER NOT NULL REFERENCES ciudades (id),
+            destino_id INTEGER NOT NULL REFERENCES ciudades (id),
+            distancia REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_distancias_origen ON distancias (origen_id, destino_id);
+        CREATE INDEX IF NOT EXISTS idx_distancias_destino ON distancias (destino_id);
+
+        CREATE TABLE IF NOT EXISTS rutas_calculadas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            origen_id INTEGER NOT NULL REFERENCES ciudades (id),
+            destino_id INTEGER NOT NULL REFERENCES ciudades (id),
+            distancia_total REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_rutas_origen ON rutas_calculadas (origen_id, destino_id);
+        CREATE INDEX IF NOT EXISTS idx_rutas_destino ON rutas_calculadas (destino_id);
+
+        CREATE TABLE IF NOT EXISTS tramos_ruta (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ruta_id INTEGER NOT NULL REFERENCES rutas_calculadas (id),
+            origen_id INTEGER NOT NULL REFERENCES ciudades (id),
+            destino_id INTEGER NOT NULL REFERENCES ciudades (id),
+            distancia REAL,
+            orden INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS idx_tramos_ruta ON tramos_ruta (ruta_id);
+    """
+
+    def __init__(self, ruta=RUTA_SQLITE):
+        """
+        Args:
+            ruta: Archivo de la base de datos (':memory:' para una base temporal)
+        """
+        self.ruta = ruta
+        self._bloqueo = threading.Lock()
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._conexion.row_factory = sqlite3.Row
+        # LIKE de SQLite solo ignora mayúsculas en ASCII; se compara en minúsculas Unicode
+        self._conexion.create_function("minusculas", 1, lambda texto: texto.lower() if texto else texto,
+                                       deterministic=True)
+        if ruta != ':memory:':
+            self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.executescript(self.ESQUEMA)
+
+    def _consultar(self, sql, parametros=()):
+        """Ejecutar una consulta y devolver las filas como diccionarios"""
+        with self._bloqueo:
+            return [dict(fila) for fila in self._conexion.execute(sql, parametros).fetchall()]
+
+    def _ejecutar(self, sql, parametros=()):
+        """Ejecutar una sentencia en su propia transacción y devolver el cursor"""
+        with self._bloqueo, self._conexion:
+            return self._conexion.execute(sql, parametros)
+
+    def listar_ciudades(self):
+        return self._consultar("SELECT * FROM ciudades ORDER BY nombre")
+
+    def obtener_ciudad(self, ciudad_id):
+        filas = self._consultar("SELECT * FROM ciudades WHERE id = ?", (ciudad_id,))
+        return filas[0] if filas else None
+
+    def obtener_ciudades(self, ids):
+        ids = list(ids)
+        if not ids:
+            return []
+        return self._consultar(f"SELECT * FROM ciudades WHERE id IN ({', '.join('?' for _ in ids)})", ids)
+
+    def buscar_ciudades(self, nombre):
+        return self._consultar("SELECT * FROM ciudades WHERE minusculas(nombre) LIKE minusculas(?)",
+                               (f'%{nombre}%',))
+
+    def existe_ciudad(self, nombre):
+        return bool(self._consultar("SELECT id FROM ciudades WHERE nombre = ? LIMIT 1", (nombre,)))
+
+    def maximo_indice_original(self):
+        return self._consultar("SELECT MAX(indice_original) AS maximo FROM ciudades")[0]['maximo']
+
+    def insertar_ciudad(self, datos):
+        columnas = list(datos)
+        cursor = self._ejecutar(
+            f"INSERT INTO ciudades ({', '.join(columnas)}) VALUES ({', '.join('?' for _ in columnas)})",
+            [datos[c] for c in columnas]
+        )
+        return self.obtener_ciudad(cursor.lastrowid)
+
+    def actualizar_ciudad(self, ciudad_id, datos):
+        if datos:
+            self._ejecutar(f"UPDATE ciudades SET {', '.join(f'{c} = ?' for c in datos)} WHERE id = ?",
+                           [*datos.values(), ciudad_id])
+        return self.obtener_ciudad(ciudad_id)
+
+    def eliminar_ciudades(self, ids):
+        ids = sorted(set(ids))
+        if not ids:
+            return []
+        marcas = ', '.join('?' * len(ids))
+        toca = f"origen_id IN ({marcas}) OR destino_id IN ({marcas})"
+        with self._bloqueo, self._conexion:
+            existentes = [fila['id'] for fila in self._conexion.execute(
+                f"SELECT id FROM ciudades WHERE id IN ({marcas})", ids)]
+            rutas = (f"SELECT id FROM rutas_calculadas WHERE {toca} "
+                     f"UNION SELECT ruta_id FROM tramos_ruta WHERE {toca}")
+            self._conexion.execute(f"CREATE TEMP TABLE rutas_eliminar AS {rutas}", ids * 4)
+            try:
+                self._conexion.execute("DELETE FROM tramos_ruta WHERE ruta_id IN (SELECT id FROM rutas_eliminar)")
+                self._conexion.execute("DELETE FROM rutas_calculadas WHERE id IN (SELECT id FROM rutas_eliminar)")
+            finally:
+                self._conexion.execute("DROP TABLE temp.rutas_eliminar")
+            self._conexion.execute(f"DELETE FROM distancias WHERE {toca}", ids * 2)
+            self._conexion.execute(f"DELETE FROM ciudades WHERE id IN ({marcas})", ids)
+        return existentes
+
+    def actualizar_coordenadas(self, cambios, tamano_lote=TAMANO_LOTE):
+        with self._bloqueo, self._conexion:
+            self._conexion.executemany(
+                "UPDATE ciudades SET latitud = ?, longitud = ? WHERE id = ?",
+                [(c['latitud'], c['longitud'], c['id']) for c in cambios]
+            )
+
+    def insertar_distancias(self, registros):
+        with self._bloqueo, self._conexion:
+            self._conexion.executemany(
+                "INSERT INTO distancias (origen_id, destino_id, distancia) VALUES (?, ?, ?)",
+                [(r['origen_id'], r['destino_id'], r['distancia']) for r in registros]
+            )
+
+    def existe_distancia(self, origen_id, destino_id):
+        return bool(self._consultar("SELECT 1 FROM distancias WHERE origen_id = ? AND destino_id = ? LIMIT 1",
+                                    (origen_id, destino_id)))
+
+    def listar_distancias(self):
+        return self._consultar("SELECT id, origen_id, destino_id, distancia FROM distancias")
+
+    def reemplazar_distancias(self, registros, tamano_lote=TAMANO_LOTE):
+        filas = [(r['origen_id'], r['destino_id'], r['distancia']) for r in registros]
+        with self._bloqueo:
+            # DDL y datos en una sola transacción explícita: el cambio de tabla es atómico
+            cursor = self._conexion.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                cursor.execute("DROP TABLE IF EXISTS distancias_nueva")
+                cursor.execute(
+                    "CREATE TABLE distancias_nueva ("
+                    "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                    "origen_id INTEGER NOT NULL REFERENCES ciudades (id), "
+                    "destino_id INTEGER NOT NULL REFERENCES ciudades (id), "
+                    "distancia REAL NOT NULL)"
+                )
+                for inicio in range(0, len(filas), tamano_lote):
+                    cursor.executemany(
+                        "INSERT INTO distancias_nueva (origen_id, destino_id, distancia) VALUES (?, ?, ?)",
+                        filas[inicio:inicio + tamano_lote]
+                    )
+                cursor.execute("DROP TABLE distancias")
+                cursor.execute("ALTER TABLE distancias_nueva RENAME TO distancias")
+                cursor.execute("CREATE INDEX idx_distancias_origen ON distancias (origen_id, destino_id)")
+                cursor.execute("CREATE INDEX idx_distancias_destino ON distancias (destino_id)")
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+
+    def aplicar_cambios_distancias(self, insertar, actualizar, eliminar, tamano_lote=TAMANO_LOTE):
+        with self._bloqueo, self._conexion:
+            self._conexion.executemany(
+                "INSERT INTO distancias (origen_id, destino_id, distancia) VALUES (?, ?, ?)",
+                [(r['origen_id'], r['destino_id'], r['distancia']) for r in insertar]
+            )
+            self._conexion.executemany(
+                "UPDATE distancias SET distancia = ? WHERE id = ?",
+                [(r['distancia'], r['id']) for r in actualizar]
+            )
+            self._conexion.executemany("DELETE FROM distancias WHERE id = ?", [(i,) for i in eliminar])
+
+    def datos_grafo(self):
+        ciudades = self._consultar("SELECT id, nombre, latitud, longitud FROM ciudades")
+        distancias = self._consultar("SELECT origen_id, destino_id, distancia FROM distancias")
+        return ciudades, distancias
+
+    def listar_conexiones(self):
+        filas = self._consultar("""
+            SELECT d.origen_id, o.nombre AS origen, d.destino_id, t.nombre AS destino, d.distancia
+            FROM distancias d
+            JOIN ciudades o ON o.id = d.origen_id
+            JOIN ciudades t ON t.id = d.destino_id
+        """)
+        return self._conexiones_unicas(
+            (f['origen_id'], f['origen'], f['destino_id'], f['destino'], f['distancia']) for f in filas
+        )
+
+    def importar(self, ciudades, distancias):
+        """
+        Reemplazar el contenido de ciudades y distancias en una sola transacción,
+        conservando los ids (por ejemplo, para copiar los datos de Supabase).
+        """
+        with self._bloqueo, self._conexion:
+            self._conexion.execute("DELETE FROM tramos_ruta")
+            self._conexion.execute("DELETE FROM rutas_calculadas")
+            self._conexion.execute("DELETE FROM distancias")
+            self._conexion.execute("DELETE FROM ciudades")
+            self._conexion.executemany(
+                "INSERT INTO ciudades (id, nombre, latitud, longitud, indice_original) VALUES (?, ?, ?, ?, ?)",
+                [(c['id'], c['nombre'], c.get('latitud'), c.get('longitud'), c.get('indice_original'))
+                 for c in ciudades]
+            )
+            self._conexion.executemany(
+                "INSERT INTO distancias (origen_id, destino_id, distancia) VALUES (?, ?, ?)",
+                [(d['origen_id'], d['destino_id'], d['distancia']) for d in distancias]
+            )
+
+    def copiar_desde(self, origen):
+        """Copiar ciudades y distancias desde otro backend"""
+        _, distancias = origen.datos_grafo()
+        self.importar(origen.listar_ciudades(), distancias)
+
+    def cerrar(self):
+        """Cerrar la conexión a la base de datos"""
+        with self._bloqueo:
+            self._conexion.close()
+
+
+_almacenamiento = None
+_bloqueo = threading.Lock()
+
+
+def crear_almacenamiento(backend=None, ruta_sqlite=RUTA_SQLITE):
+    """
+    Crear un backend de almacenamiento.
+
+    Args:
+        backend: 'supabase' o 'sqlite' (por defecto, la variable de entorno ALMACENAMIENTO)
+        ruta_sqlite: Archivo de la base de datos para el backend SQLite
+    """
+    backend = (backend or BACKEND_POR_DEFECTO).lower()
+    if backend == "sqlite":
+        return AlmacenamientoSQLite(ruta_sqlite)
+    if backend == "supabase":
+        return AlmacenamientoSupabase()
+    raise ValueError(f"Backend de almacenamiento desconocido: {backend}")
+
+
+def obtener_almacenamiento():
+    """Devolver el backend compartido (se crea en la primera llamada)"""
+    global _almacenamiento
+    if _almacenamiento is None:
+        with _bloqueo:
+            if _almacenamiento is None:
+                _almacenamiento = crear_almacenamiento()
+    return _almacenamiento
+
+
+def configurar_almacenamiento(almacenamiento):
+    """Reemplazar el backend compartido (por ejemplo, por uno SQLite en pruebas de carga)"""
+    global _almacenamiento
+    with _bloqueo:
+        _almacenamiento = almacenamiento
+
+
+if __name__ == "__main__":
+    # Copiar los datos de Supabase a la base local para trabajar sin conexión
+    local = AlmacenamientoSQLite(RUTA_SQLITE)
+    local.copiar_desde(AlmacenamientoSupabase())
+    ciudades, distancias = local.datos_grafo()
+    print(f"Copiadas {len(ciudades)} ciudades y {len(distancias)} distancias a {RUTA_SQLITE}")
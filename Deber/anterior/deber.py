@@ -2,9 +2,15 @@ import pandas as pd
 import numpy as np
 import networkx as nx
 import matplotlib.pyplot as plt
+import os
+import sys
 import warnings
 warnings.filterwarnings('ignore')
 
+# El importador de la matriz de distancias está en el directorio padre
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from matriz_distancias import MatrizDistancias
+
 def cargar_datos_excel(archivo_excel):
     """Carga datos del archivo Excel de distancias"""
     try:
@@ -30,39 +36,16 @@ def crear_matriz_distancias(df):
     """
     Crea una matriz de distancias correcta a partir del DataFrame
     """
-    # Los nombres de las ciudades están en la columna 'CIUDAD'
-    ciudades = []
-    indices_ciudades = {}
-    
-    for i, row in df.iterrows():
-        # Saltamos la fila de encabezados (i==0)
-        if i > 0 and pd.notna(row['No.']) and pd.notna(row['CIUDAD']):
-            ciudad = row['CIUDAD']
-            indice = int(row['No.'])
-            ciudades.append(ciudad)
-            indices_ciudades[indice] = ciudad
+    matriz = MatrizDistancias.desde_dataframe(df)
+    ciudades = matriz.nombres
     
     print(f"Ciudades encontradas: {len(ciudades)}")
     print(f"Primeras 5 ciudades: {ciudades[:5]}")
     
-    # Crear matriz de adyacencia con nombres de ciudades
-    matriz_distancias = {}
-    for i, ciudad_origen in enumerate(ciudades):
-        matriz_distancias[ciudad_origen] = {}
-        
-        # Fila correspondiente a esta ciudad
-        fila = df.iloc[i+1]  # +1 para saltar encabezados
-        
-        # Para cada destino, tomamos el valor de la columna correspondiente
-        for j, ciudad_destino in enumerate(ciudades):
-            # Índice numérico del destino (columnas 2 en adelante son distancias)
-            indice_destino = j + 3  # +3 porque empezamos desde la columna 3 (índice 2)
-            
-            if indice_destino < len(fila):
-                distancia = fila.iloc[indice_destino - 1]  # -1 para ajustar al índice correcto
-                
-                if pd.notna(distancia) and distancia > 0:
-                    matriz_distancias[ciudad_origen][ciudad_destino] = float(distancia)
+    # Crear matriz de adyacencia con nombres de ciudades a partir de las celdas válidas
+    matriz_distancias = {ciudad: {} for ciudad in ciudades}
+    for i, j, distancia in zip(*(arreglo.tolist() for arreglo in matriz.aristas())):
+        matriz_distancias[ciudades[i]][ciudades[j]] = distancia
     
     return matriz_distancias, ciudades
 
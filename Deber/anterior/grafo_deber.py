@@ -2,28 +2,24 @@ import pandas as pd
 import numpy as np
 import networkx as nx
 import matplotlib.pyplot as plt
-from supabase import create_client
 import os
-from dotenv import load_dotenv
+import sys
 import warnings
 warnings.filterwarnings('ignore')
 
-# Cargar variables de entorno
-load_dotenv()
+# El cliente compartido de Supabase está en el directorio padre
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from conexion_bd import obtener_cliente
 
-# Configurar conexión a Supabase
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 
 def cargar_datos_bd():
     """Cargar los datos de ciudades y distancias desde la base de datos"""
     # Obtener ciudades
-    ciudades_response = supabase.table('ciudades').select('id, nombre').execute()
+    ciudades_response = obtener_cliente().table('ciudades').select('id, nombre').execute()
     ciudades = ciudades_response.data
     
     # Obtener distancias
-    distancias_response = supabase.table('distancias').select('origen_id, destino_id, distancia').execute()
+    distancias_response = obtener_cliente().table('distancias').select('origen_id, destino_id, distancia').execute()
     distancias = distancias_response.data
     
     print(f"Datos cargados: {len(ciudades)} ciudades y {len(distancias)} distancias")
@@ -228,7 +224,7 @@ def guardar_ruta_bd(origen, destino, distancia_total, tramos, nombre_a_id):
         }
         
         # Verificar si la ruta ya existe
-        existe = supabase.table('rutas_calculadas')\
+        existe = obtener_cliente().table('rutas_calculadas')\
             .select('id')\
             .eq('origen_id', nombre_a_id[origen])\
             .eq('destino_id', nombre_a_id[destino])\
@@ -237,19 +233,19 @@ def guardar_ruta_bd(origen, destino, distancia_total, tramos, nombre_a_id):
         if existe.data:
             # Actualizar ruta existente
             ruta_id = existe.data[0]['id']
-            supabase.table('rutas_calculadas')\
+            obtener_cliente().table('rutas_calculadas')\
                 .update(ruta_data)\
                 .eq('id', ruta_id)\
                 .execute()
                 
             # Eliminar tramos antiguos
-            supabase.table('tramos_ruta')\
+            obtener_cliente().table('tramos_ruta')\
                 .delete()\
                 .eq('ruta_id', ruta_id)\
                 .execute()
         else:
             # Insertar nueva ruta
-            resultado = supabase.table('rutas_calculadas')\
+            resultado = obtener_cliente().table('rutas_calculadas')\
                 .insert(ruta_data)\
                 .execute()
             ruta_id = resultado.data[0]['id']
@@ -263,7 +259,7 @@ def guardar_ruta_bd(origen, destino, distancia_total, tramos, nombre_a_id):
                 'distancia': distancia,
                 'orden': i + 1
             }
-            supabase.table('tramos_ruta').insert(tramo_data).execute()
+            obtener_cliente().table('tramos_ruta').insert(tramo_data).execute()
         
         print(f"Ruta de {origen} a {destino} guardada en la base de datos con ID {ruta_id}")
     except Exception as e:
@@ -0,0 +1,409 @@
+import time
+import heapq
+import tracemalloc
+import networkx as nx
+import numpy as np
+from geopy.distance import geodesic
+
+from algoritmos_busqueda import AlgoritmosBusqueda, _a_estrella_csr, _voraz_csr
+from heuristicas import ProveedorHeuristica, HeuristicaALT, haversine_vectorizada
+from contraccion import JerarquiaContraccion
+from generador_grafo import LANDMARKS_POR_DEFECTO
+from lat_long import COORDENADAS_CIUDADES
+from cargar_relaciones import CONEXIONES_REALES
+
+# Pares origen-destino usados en las mediciones
+PARES_REFERENCIA = [
+    ("Tulcán", "Macara"),
+    ("Esmeraldas", "Loja"),
+    ("Quito", "Guayaquil"),
+    ("Quito", "Tena"),
+    ("Rumichaca", "Huaquillas"),
+    ("Pto. Putumayo", "Salinas"),
+    ("San Lorenzo", "Zamora"),
+    ("Manta", "Pto. Morona"),
+]
+
+
+def grafo_referencia():
+    """Construir el grafo de 40 ciudades sin consultar la base de datos"""
+    G = nx.Graph()
+    for ciudad in COORDENADAS_CIUDADES:
+        G.add_node(ciudad)
+    for ciudad1, ciudad2, distancia in CONEXIONES_REALES:
+        G.add_edge(ciudad1, ciudad2, weight=distancia)
+    return G, dict(COORDENADAS_CIUDADES)
+
+
+class _TablaGeodesica:
+    """Tabla que calcula la distancia geodésica en cada consulta (comportamiento anterior)"""
+    
+    def __init__(self, nombres, coords, destino):
+        self.nombres = nombres
+        self.coords = coords
+        self.dest_coords = coords[destino]
+    
+    def __getitem__(self, indices):
+        return np.array([
+            geodesic(self.coords[self.nombres[i]], self.dest_coords).kilometers
+            if self.nombres[i] in self.coords else 0.0
+            for i in np.atleast_1d(indices)
+        ])
+
+
+class HeuristicaGeodesica:
+    """Proveedor de referencia: una llamada a geopy por cada inserción en la frontera"""
+    
+    def __init__(self, nombres, coords):
+        self.nombres = nombres
+        self.coords = coords
+    
+    def arreglo(self, destino):
+        return _TablaGeodesica(self.nombres, self.coords, destino)
+
+
+def grafo_malla(filas=120, columnas=120):
+    """
+    Construir una malla sobre el territorio de Ecuador para rutas largas.
+    Las distancias de cada arista son un 10% mayores que la distancia en línea recta.
+    """
+    latitudes = np.linspace(1.2, -4.9, filas)
+    longitudes = np.linspace(-80.9, -75.3, columnas)
+    G = nx.Graph()
+    coords = {}
+    for i in range(filas):
+        for j in range(columnas):
+            coords[(i, j)] = (latitudes[i], longitudes[j])
+            G.add_node((i, j))
+    for i in range(filas):
+        for j in range(columnas):
+            for vecino in [(i + 1, j), (i, j + 1)]:
+                if vecino in coords:
+                    lat, lon = coords[vecino]
+                    distancia = haversine_vectorizada(np.array([coords[(i, j)][0]]), np.array([coords[(i, j)][1]]), lat, lon)
+                    G.add_edge((i, j), vecino, weight=float(distancia[0]) * 1.1)
+    return G, coords
+
+
+def _voraz_copiando_caminos(grafo, origen, destino, heuristicas):
+    """Versión anterior de la búsqueda voraz: cada inserción copia el camino completo"""
+    offsets, vecinos, pesos = grafo.offsets, grafo.vecinos, grafo.pesos
+    frontera = [(0.0, origen, [origen], 0.0)]
+    visitados = set()
+    while frontera:
+        _, actual, camino, dist_acumulada = heapq.heappop(frontera)
+        if actual == destino:
+            return camino, dist_acumulada
+        if actual in visitados:
+            continue
+        visitados.add(actual)
+        inicio, fin = offsets[actual], offsets[actual + 1]
+        vecinos_actual = vecinos[inicio:fin]
+        for vecino, peso, heuristica in zip(vecinos_actual.tolist(), pesos[inicio:fin].tolist(),
+                                            heuristicas[vecinos_actual].tolist()):
+            if vecino not in visitados:
+                heapq.heappush(frontera, (heuristica, vecino, camino + [vecino], dist_acumulada + peso))
+    return None
+
+
+def _a_estrella_copiando_caminos(grafo, origen, destino, heuristicas):
+    """Versión anterior de A*: cada inserción copia el camino completo"""
+    offsets, vecinos, pesos = grafo.offsets, grafo.vecinos, grafo.pesos
+    frontera = [(0.0, origen, [origen], 0.0)]
+    visitados = set()
+    g_scores = {origen: 0.0}
+    while frontera:
+        _, actual, camino, g_score = heapq.heappop(frontera)
+        if actual == destino:
+            return camino, g_score
+        if actual in visitados:
+            continue
+        visitados.add(actual)
+        inicio, fin = offsets[actual], offsets[actual + 1]
+        vecinos_actual = vecinos[inicio:fin]
+        for vecino, peso, h_score in zip(vecinos_actual.tolist(), pesos[inicio:fin].tolist(),
+                                         heuristicas[vecinos_actual].tolist()):
+            tentative_g_score = g_score + peso
+            if vecino in g_scores and tentative_g_score >= g_scores[vecino]:
+                continue
+            g_scores[vecino] = tentative_g_score
+            heapq.heappush(frontera, (tentative_g_score + h_score, vecino, camino + [vecino], tentative_g_score))
+    return None
+
+
+def memoria_pico(funcion):
+    """Memoria pico (KiB) reservada durante una llamada a funcion"""
+    tracemalloc.start()
+    try:
+        funcion()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return pico / 1024
+
+
+def tiempo_medio(funcion, repeticiones):
+    """Devuelve el tiempo medio (ms) de una llamada a funcion"""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) * 1000 / repeticiones
+
+
+def benchmark_heuristica(repeticiones=200):
+    """
+    Compara A* y búsqueda voraz usando la heurística geodésica por inserción
+    frente a la tabla de heurísticas precalculada con NumPy.
+    """
+    G, coords = grafo_referencia()
+    compacto = AlgoritmosBusqueda.obtener_compacto(G, coords)
+    geodesica = HeuristicaGeodesica(compacto.nombres, coords)
+    precalculada = ProveedorHeuristica(compacto.nombres, compacto.coords[:, 0], compacto.coords[:, 1])
+    
+    print(f"{'Consulta':35} {'Algoritmo':8} {'geodesic (ms)':>14} {'fría (ms)':>10} {'caché (ms)':>11}")
+    for origen, destino in PARES_REFERENCIA:
+        for nombre, algoritmo in [("A*", AlgoritmosBusqueda.a_estrella),
+                                  ("Voraz", AlgoritmosBusqueda.busqueda_voraz)]:
+            t_geo = tiempo_medio(lambda: algoritmo(G, origen, destino, coords, geodesica), repeticiones)
+            
+            # Consulta en frío: la tabla del destino se recalcula en cada llamada
+            def consulta_fria():
+                precalculada.limpiar()
+                algoritmo(G, origen, destino, coords, precalculada)
+            t_frio = tiempo_medio(consulta_fria, repeticiones)
+            
+            # Consulta repetida: la tabla del destino ya está en la caché
+            t_cache = tiempo_medio(lambda: algoritmo(G, origen, destino, coords, precalculada), repeticiones)
+            
+            # Ambas variantes deben encontrar la misma ruta
+            r_geo = algoritmo(G, origen, destino, coords, geodesica)
+            r_pre = algoritmo(G, origen, destino, coords, precalculada)
+            assert r_geo['ruta'] == r_pre['ruta'], f"Rutas distintas para {origen} → {destino}"
+            
+            print(f"{origen + ' → ' + destino:35} {nombre:8} {t_geo:14.3f} {t_frio:10.3f} {t_cache:11.3f}")
+
+
+def benchmark_memoria():
+    """
+    Compara la memoria pico por consulta de A* y búsqueda voraz copiando el camino
+    en cada inserción frente a la reconstrucción con punteros a padres.
+    """
+    G_ciudades, coords_ciudades = grafo_referencia()
+    G_malla, coords_malla = grafo_malla()
+    filas, columnas = max(coords_malla)
+    
+    consultas = [(G_ciudades, coords_ciudades, o, d) for o, d in PARES_REFERENCIA[:3]]
+    # En la malla se usan rutas de esquina a esquina (caminos de unos 240 nodos)
+    consultas.append((G_malla, coords_malla, (0, 0), (filas, columnas)))
+    consultas.append((G_malla, coords_malla, (0, columnas), (filas, 0)))
+    
+    print(f"{'Consulta':35} {'Algoritmo':8} {'copiando (KiB)':>15} {'punteros (KiB)':>15} {'reducción':>10}")
+    for G, coords, origen, destino in consultas:
+        grafo = AlgoritmosBusqueda.obtener_compacto(G, coords)
+        heuristicas = grafo.heuristica.arreglo(destino)
+        o, d = grafo.indice[origen], grafo.indice[destino]
+        
+        for nombre, anterior, actual in [("A*", _a_estrella_copiando_caminos, _a_estrella_csr),
+                                         ("Voraz", _voraz_copiando_caminos, _voraz_csr)]:
+            m_anterior = memoria_pico(lambda: anterior(grafo, o, d, heuristicas))
+            m_actual = memoria_pico(lambda: actual(grafo, o, d, heuristicas))
+            assert anterior(grafo, o, d, heuristicas)[1] == actual(grafo, o, d, heuristicas)[1]
+            
+            reduccion = 100 * (1 - m_actual / m_anterior)
+            print(f"{str(origen) + ' → ' + str(destino):35} {nombre:8} {m_anterior:15.1f} {m_actual:15.1f} {reduccion:9.1f}%")
+
+
+def benchmark_bidireccional(consultas_malla=20, repeticiones=20):
+    """
+    Compara los nodos expandidos (asentados) y el tiempo de Dijkstra y A*
+    frente a sus variantes bidireccionales.
+    """
+    G_ciudades, coords_ciudades = grafo_referencia()
+    G_malla, coords_malla = grafo_malla()
+    
+    generador = np.random.default_rng(42)
+    nodos_malla = list(G_malla.nodes())
+    consultas = [("Ciudades", G_ciudades, coords_ciudades, o, d) for o, d in PARES_REFERENCIA]
+    for _ in range(consultas_malla):
+        o, d = generador.choice(len(nodos_malla), 2, replace=False)
+        consultas.append(("Malla", G_malla, coords_malla, nodos_malla[o], nodos_malla[d]))
+    
+    algoritmos = [
+        ("Dijkstra", lambda G, o, d, c: AlgoritmosBusqueda.dijkstra(G, o, d)),
+        ("Dijkstra bid.", lambda G, o, d, c: AlgoritmosBusqueda.dijkstra_bidireccional(G, o, d)),
+        ("A*", AlgoritmosBusqueda.a_estrella),
+        ("A* bid.", AlgoritmosBusqueda.a_estrella_bidireccional),
+    ]
+    
+    totales = {}
+    for grafo, G, coords, origen, destino in consultas:
+        referencia = None
+        for nombre, algoritmo in algoritmos:
+            resultado = algoritmo(G, origen, destino, coords)
+            if referencia is None:
+                referencia = resultado['distancia_total']
+            assert abs(resultado['distancia_total'] - referencia) < 1e-6, f"{nombre}: {origen} → {destino}"
+            
+            tiempo = tiempo_medio(lambda: algoritmo(G, origen, destino, coords), repeticiones)
+            expandidos, ms, n = totales.get((grafo, nombre), (0, 0.0, 0))
+            totales[(grafo, nombre)] = (expandidos + resultado['nodos_expandidos'], ms + tiempo, n + 1)
+    
+    print(f"{'Grafo':10} {'Algoritmo':14} {'expandidos/consulta':>20} {'ms/consulta':>12}")
+    for (grafo, nombre), (expandidos, ms, n) in totales.items():
+        print(f"{grafo:10} {nombre:14} {expandidos / n:20.1f} {ms / n:12.3f}")
+
+
+def benchmark_instrumentacion(consultas_malla=20, repeticiones=10):
+    """
+    Mide el costo de la instrumentación: tiempo de cada algoritmo sin contadores
+    y con contadores, y muestra los contadores medios por consulta en la malla.
+    
+    Antes de medir, cada consulta se ejecuta una vez en los dos modos (así el grafo
+    compacto y las tablas de la heurística ya están construidos); luego cada consulta
+    se mide sin y con contadores, alternando el orden, y se informa la mediana de
+    las repeticiones en ms por consulta.
+    """
+    G, coords = grafo_malla()
+    generador = np.random.default_rng(7)
+    nodos = list(G.nodes())
+    pares = [tuple(nodos[i] for i in generador.choice(len(nodos), 2, replace=False)) for _ in range(consultas_malla)]
+    
+    algoritmos = [
+        ("Dijkstra", lambda o, d, i: AlgoritmosBusqueda.dijkstra(G, o, d, instrumentar=i)),
+        ("Voraz", lambda o, d, i: AlgoritmosBusqueda.busqueda_voraz(G, o, d, coords, instrumentar=i)),
+        ("A*", lambda o, d, i: AlgoritmosBusqueda.a_estrella(G, o, d, coords, instrumentar=i)),
+        ("Dijkstra bid.", lambda o, d, i: AlgoritmosBusqueda.dijkstra_bidireccional(G, o, d, instrumentar=i)),
+        ("A* bid.", lambda o, d, i: AlgoritmosBusqueda.a_estrella_bidireccional(G, o, d, coords, instrumentar=i)),
+    ]
+    
+    print(f"{'Algoritmo':14} {'sin (ms)':>9} {'con (ms)':>9} {'costo':>7} {'expandidos':>11} {'inserciones':>12} "
+          f"{'extracciones':>13} {'heurística':>11} {'frontera máx.':>14}")
+    for nombre, algoritmo in algoritmos:
+        for o, d in pares:
+            algoritmo(o, d, False)
+            algoritmo(o, d, True)
+        
+        tiempos = {False: [], True: []}
+        for repeticion in range(repeticiones):
+            pasada = {False: 0.0, True: 0.0}
+            for i, (o, d) in enumerate(pares):
+                for instrumentar in ((False, True) if (repeticion + i) % 2 == 0 else (True, False)):
+                    inicio = time.perf_counter()
+                    algoritmo(o, d, instrumentar)
+                    pasada[instrumentar] += time.perf_counter() - inicio
+            for instrumentar, segundos in pasada.items():
+                tiempos[instrumentar].append(segundos * 1000 / len(pares))
+        sin = float(np.median(tiempos[False]))
+        con = float(np.median(tiempos[True]))
+        
+        totales = {}
+        for o, d in pares:
+            for clave, valor in algoritmo(o, d, True)['estadisticas'].items():
+                totales[clave] = totales.get(clave, 0) + valor / len(pares)
+        
+        print(f"{nombre:14} {sin:9.3f} {con:9.3f} {(con / sin - 1) * 100:6.1f}% {totales['nodos_expandidos']:11.1f} "
+              f"{totales['inserciones']:12.1f} {totales['extracciones']:13.1f} "
+              f"{totales['evaluaciones_heuristica']:11.1f} {totales['frontera_maxima']:14.1f}")
+
+
+def benchmark_landmarks(consultas_malla=20, k_malla=8):
+    """
+    Compara los nodos expandidos por A* con la heurística en línea recta frente a
+    la heurística ALT (landmarks), en todas las parejas de ciudades y en la malla.
+    """
+    G_ciudades, coords_ciudades = grafo_referencia()
+    ciudades = AlgoritmosBusqueda.obtener_compacto(G_ciudades, coords_ciudades)
+    G_malla, coords_malla = grafo_malla()
+    malla = AlgoritmosBusqueda.obtener_compacto(G_malla, coords_malla)
+    
+    inicio = time.perf_counter()
+    alt_ciudades = HeuristicaALT.desde_grafo(ciudades, LANDMARKS_POR_DEFECTO, k=4)
+    t_ciudades = (time.perf_counter() - inicio) * 1000
+    inicio = time.perf_counter()
+    alt_malla = HeuristicaALT.desde_grafo(malla, k=k_malla)
+    t_malla = (time.perf_counter() - inicio) * 1000
+    print(f"Preprocesamiento ALT: ciudades {t_ciudades:.1f} ms (4 landmarks), malla {t_malla:.1f} ms ({k_malla} landmarks)")
+    
+    generador = np.random.default_rng(7)
+    nodos_malla = list(G_malla.nodes())
+    pares_malla = []
+    for _ in range(consultas_malla):
+        o, d = generador.choice(len(nodos_malla), 2, replace=False)
+        pares_malla.append((nodos_malla[o], nodos_malla[d]))
+    pares_ciudades = [(o, d) for o in coords_ciudades for d in coords_ciudades if o != d]
+    
+    print(f"{'Grafo':10} {'Heurística':12} {'expandidos/consulta':>20} {'ms/consulta':>12}")
+    for grafo, G, coords, pares, alt in [("Ciudades", G_ciudades, coords_ciudades, pares_ciudades, alt_ciudades),
+                                         ("Malla", G_malla, coords_malla, pares_malla, alt_malla)]:
+        compacto = AlgoritmosBusqueda.obtener_compacto(G, coords)
+        for nombre, heuristica in [("Línea recta", compacto.heuristica), ("ALT", alt)]:
+            expandidos = 0
+            inicio = time.perf_counter()
+            for origen, destino in pares:
+                resultado = AlgoritmosBusqueda.a_estrella(G, origen, destino, coords, heuristica)
+                expandidos += resultado['nodos_expandidos']
+            ms = (time.perf_counter() - inicio) * 1000 / len(pares)
+            print(f"{grafo:10} {nombre:12} {expandidos / len(pares):20.1f} {ms:12.3f}")
+
+
+
+def benchmark_contraccion(consultas_malla=50):
+    """
+    Mide el preprocesamiento de la jerarquía de contracción (tiempo y atajos) y
+    compara el tiempo por consulta frente a Dijkstra, verificando que las
+    distancias coincidan.
+    """
+    G_ciudades, coords_ciudades = grafo_referencia()
+    G_malla, coords_malla = grafo_malla()
+    
+    generador = np.random.default_rng(7)
+    nodos_malla = list(G_malla.nodes())
+    pares_malla = []
+    for _ in range(consultas_malla):
+        o, d = generador.choice(len(nodos_malla), 2, replace=False)
+        pares_malla.append((nodos_malla[o], nodos_malla[d]))
+    pares_ciudades = [(o, d) for o in coords_ciudades for d in coords_ciudades if o != d]
+    
+    print(f"{'Grafo':10} {'preproceso (s)':>15} {'aristas':>8} {'atajos':>8} {'Dijkstra (ms)':>14} {'CH (ms)':>8} "
+          f"{'aceleración':>12} {'expandidos D/CH':>16}")
+    for grafo, G, coords, pares in [("Ciudades", G_ciudades, coords_ciudades, pares_ciudades),
+                                    ("Malla", G_malla, coords_malla, pares_malla)]:
+        compacto = AlgoritmosBusqueda.obtener_compacto(G, coords)
+        
+        inicio = time.perf_counter()
+        G.graph['contraccion'] = JerarquiaContraccion.construir(compacto)
+        t_preproceso = time.perf_counter() - inicio
+        
+        tiempos = {}
+        expandidos = {}
+        distancias = {}
+        for nombre, funcion in [("Dijkstra", AlgoritmosBusqueda.dijkstra),
+                                ("CH", AlgoritmosBusqueda.contraccion_jerarquica)]:
+            expandidos[nombre] = 0
+            distancias[nombre] = []
+            inicio = time.perf_counter()
+            for origen, destino in pares:
+                resultado = funcion(G, origen, destino)
+                expandidos[nombre] += resultado['nodos_expandidos']
+                distancias[nombre].append(resultado['distancia_total'])
+            tiempos[nombre] = (time.perf_counter() - inicio) * 1000 / len(pares)
+        
+        if not np.allclose(distancias["Dijkstra"], distancias["CH"]):
+            print(f"¡ADVERTENCIA! Las distancias de CH no coinciden con Dijkstra en {grafo}")
+        
+        print(f"{grafo:10} {t_preproceso:15.2f} {compacto.numero_aristas:8} {G.graph['contraccion'].atajos:8} "
+              f"{tiempos['Dijkstra']:14.3f} {tiempos['CH']:8.3f} {tiempos['Dijkstra'] / tiempos['CH']:11.1f}x "
+              f"{expandidos['Dijkstra'] / len(pares):7.1f}/{expandidos['CH'] / len(pares):.1f}")
+
+if __name__ == "__main__":
+    benchmark_heuristica()
+    print()
+    benchmark_memoria()
+    print()
+    benchmark_bidireccional()
+    print()
+    benchmark_instrumentacion()
+    print()
+    benchmark_landmarks()
+    print()
+    benchmark_contraccion()
@@ -0,0 +1,300 @@
+import os
+import sys
+import subprocess
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+
+from generador_grafo import GeneradorGrafo
+from instantanea_datos import InstantaneaDatos
+import conexion_bd
+from almacenamiento import AlmacenamientoSQLite, AlmacenamientoSupabase, configurar_almacenamiento, obtener_almacenamiento
+from ciudades_crud import CiudadesCRUD
+from matriz_distancias import MatrizDistancias
+from importacion_excel import importar_distancias_excel
+from benchmark_busqueda import grafo_referencia, grafo_malla, memoria_pico
+
+
+def benchmark_arranque(repeticiones=3):
+    """
+    Mide el arranque en frío: carga de ciudades y distancias desde la base de datos
+    frente a la instantánea local, para los datos reales y para la malla.
+    """
+    with tempfile.TemporaryDirectory() as directorio:
+        archivo = os.path.join(directorio, "datos_grafo.npz")
+        
+        print(f"{'Datos':10} {'origen':14} {'tiempo (ms)':>12}")
+        inicio = time.perf_counter()
+        ciudades, distancias = GeneradorGrafo.cargar_datos_bd(archivo, usar_instantanea=False)
+        ms_bd = (time.perf_counter() - inicio) * 1000
+        if ciudades:
+            print(f"{'Ciudades':10} {'base de datos':14} {ms_bd:12.2f}")
+            inicio = time.perf_counter()
+            for _ in range(repeticiones):
+                GeneradorGrafo.cargar_datos_bd(archivo, refrescar=False)
+            print(f"{'Ciudades':10} {'instantánea':14} {(time.perf_counter() - inicio) * 1000 / repeticiones:12.2f}")
+        else:
+            print("No se pudo consultar la base de datos; solo se mide la malla")
+        
+        # Malla: mismas tablas que la base de datos, con ambas direcciones de cada arista
+        G, coords = grafo_malla()
+        ids = {nodo: i for i, nodo in enumerate(G.nodes())}
+        filas_ciudades = [{'id': ids[n], 'nombre': f"{n[0]}-{n[1]}", 'latitud': coords[n][0], 'longitud': coords[n][1]}
+                          for n in G.nodes()]
+        filas_distancias = [{'origen_id': ids[a], 'destino_id': ids[b], 'distancia': w}
+                            for u, v, w in G.edges(data='weight') for a, b in ((u, v), (v, u))]
+        InstantaneaDatos.desde_filas(filas_ciudades, filas_distancias).guardar(archivo)
+        
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            GeneradorGrafo.cargar_datos_bd(archivo, refrescar=False)
+        print(f"{'Malla':10} {'instantánea':14} {(time.perf_counter() - inicio) * 1000 / repeticiones:12.2f}")
+
+
+def benchmark_conexion_bd(consultas=10):
+    """
+    Mide el tiempo de importación de los módulos que acceden a la base de datos
+    (el cliente ya no se crea al importar), el costo de crear un cliente y la
+    latencia por consulta con el cliente compartido frente a un cliente nuevo en
+    cada consulta (conexiones sin reutilizar).
+    """
+    directorio = os.path.dirname(os.path.abspath(__file__))
+    print(f"{'Importación':28} {'tiempo (ms)':>12}")
+    for modulo in ["algoritmos_busqueda", "generador_grafo", "ciudades_crud"]:
+        codigo = f"import time; t = time.perf_counter(); import {modulo}; print((time.perf_counter() - t) * 1000)"
+        salida = subprocess.run([sys.executable, "-c", codigo], cwd=directorio, capture_output=True, text=True)
+        tiempo = float(salida.stdout.strip()) if salida.returncode == 0 else float('nan')
+        print(f"{modulo:28} {tiempo:12.2f}")
+    
+    try:
+        conexion_bd.cerrar_cliente()
+        inicio = time.perf_counter()
+        cliente = conexion_bd.obtener_cliente()
+        print(f"{'creación del cliente':28} {(time.perf_counter() - inicio) * 1000:12.2f}")
+        
+        def consulta(c):
+            c.table('ciudades').select('id').limit(1).execute()
+        
+        # Primera consulta: abre la conexión; las siguientes la reutilizan (keep-alive)
+        inicio = time.perf_counter()
+        consulta(cliente)
+        print(f"{'primera consulta':28} {(time.perf_counter() - inicio) * 1000:12.2f}")
+        
+        inicio = time.perf_counter()
+        for _ in range(consultas):
+            consulta(conexion_bd.obtener_cliente())
+        print(f"{'consulta (cliente compartido)':28} {(time.perf_counter() - inicio) * 1000 / consultas:12.2f}")
+        
+        inicio = time.perf_counter()
+        for _ in range(consultas):
+            conexion_bd.cerrar_cliente()
+            consulta(conexion_bd.obtener_cliente())
+        print(f"{'consulta (cliente nuevo)':28} {(time.perf_counter() - inicio) * 1000 / consultas:12.2f}")
+    except Exception as e:
+        print(f"No se pudo consultar la base de datos: {e}")
+
+
+def _medir_crud(repeticiones):
+    """Tiempo medio (ms) de cada operación de CiudadesCRUD y de la carga del grafo con el backend actual"""
+    tiempos = {}
+    
+    def medir(nombre, funcion):
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            resultado = funcion()
+        tiempos[nombre] = (time.perf_counter() - inicio) * 1000 / repeticiones
+        return resultado
+    
+    ciudades = medir("listar", CiudadesCRUD.listar_ciudades)
+    medir("cargar grafo", obtener_almacenamiento().datos_grafo)
+    medir("obtener", lambda: CiudadesCRUD.obtener_ciudad(ciudades[0]['id']))
+    medir("buscar", lambda: CiudadesCRUD.buscar_ciudad("qui"))
+    
+    # Escrituras sobre una ciudad temporal que se elimina al final
+    conexiones = [{'ciudad_id': c['id'], 'distancia': 10.0} for c in ciudades[:3]]
+    tiempos["crear"] = tiempos["actualizar"] = tiempos["eliminar"] = 0.0
+    for i in range(repeticiones):
+        inicio = time.perf_counter()
+        ciudad = CiudadesCRUD.crear_ciudad(f"Benchmark {i}", -1.0, -78.0, conexiones)
+        tiempos["crear"] += (time.perf_counter() - inicio) * 1000 / repeticiones
+        if "error" in ciudad:
+            raise RuntimeError(ciudad["error"])
+        
+        inicio = time.perf_counter()
+        CiudadesCRUD.actualizar_ciudad(ciudad['id'], latitud=-1.5)
+        tiempos["actualizar"] += (time.perf_counter() - inicio) * 1000 / repeticiones
+        
+        inicio = time.perf_counter()
+        CiudadesCRUD.eliminar_ciudad(ciudad['id'])
+        tiempos["eliminar"] += (time.perf_counter() - inicio) * 1000 / repeticiones
+    
+    return tiempos
+
+
+def benchmark_almacenamiento(repeticiones=5):
+    """
+    Compara las operaciones CRUD y la carga del grafo entre el backend SQLite
+    (con los datos de Supabase si hay conexión, o con las 40 ciudades de referencia)
+    y el backend de Supabase.
+    """
+    anterior = obtener_almacenamiento()
+    supabase_bd = AlmacenamientoSupabase()
+    
+    with tempfile.TemporaryDirectory() as directorio:
+        sqlite_bd = AlmacenamientoSQLite(os.path.join(directorio, "rutas.db"))
+        try:
+            sqlite_bd.copiar_desde(supabase_bd)
+            backends = [("SQLite", sqlite_bd), ("Supabase", supabase_bd)]
+        except Exception as e:
+            print(f"No se pudo consultar Supabase ({e}); se usan las ciudades de referencia")
+            G, coords = grafo_referencia()
+            ids = {nombre: i + 1 for i, nombre in enumerate(G.nodes())}
+            sqlite_bd.importar(
+                [{'id': ids[n], 'nombre': n, 'latitud': coords[n][0], 'longitud': coords[n][1]} for n in G.nodes()],
+                [{'origen_id': ids[a], 'destino_id': ids[b], 'distancia': w}
+                 for u, v, w in G.edges(data='weight') for a, b in ((u, v), (v, u))]
+            )
+            backends = [("SQLite", sqlite_bd)]
+        
+        resultados = {}
+        try:
+            for nombre, backend in backends:
+                configurar_almacenamiento(backend)
+                try:
+                    resultados[nombre] = _medir_crud(repeticiones)
+                except Exception as e:
+                    print(f"Error al medir {nombre}: {e}")
+        finally:
+            configurar_almacenamiento(anterior)
+            sqlite_bd.cerrar()
+    
+    operaciones = ["listar", "cargar grafo", "obtener", "buscar", "crear", "actualizar", "eliminar"]
+    print(f"{'Operación (ms)':14}" + "".join(f"{nombre:>12}" for nombre in resultados))
+    for operacion in operaciones:
+        print(f"{operacion:14}" + "".join(f"{t[operacion]:12.2f}" for t in resultados.values()))
+
+
+def dataframe_matriz(n, densidad=0.3, semilla=0):
+    """
+    DataFrame sintético con el formato del Excel de distancias (leído con header=1):
+    fila de encabezados, columnas "No." y "CIUDAD" y una columna de distancias por
+    ciudad. Solo una fracción de los pares tiene distancia; el resto queda en 0.
+    """
+    rng = np.random.default_rng(semilla)
+    puntos = rng.uniform(0, 1000, size=(n, 2))
+    matriz = np.hypot(*(puntos[:, None, :] - puntos[None, :, :]).transpose(2, 0, 1)).round(1)
+    conectadas = np.triu(rng.random((n, n)) < densidad, k=1)
+    matriz[~(conectadas | conectadas.T)] = 0
+    
+    encabezado = pd.DataFrame([["No.", "CIUDAD", *range(1, n + 1)]])
+    filas = pd.concat([pd.DataFrame({0: np.arange(1, n + 1), 1: [f"Ciudad {i}" for i in range(n)]}),
+                       pd.DataFrame(matriz, columns=range(2, n + 2))], axis=1)
+    return pd.concat([encabezado, filas], ignore_index=True)
+
+
+def _aristas_celda_a_celda(df, filas):
+    """Recorrido anterior de la matriz (acceso escalar df.iloc) limitado a las primeras filas"""
+    ciudades = [df.iloc[i, 1] for i in range(1, len(df))]
+    aristas = []
+    for i in range(filas):
+        for j in range(len(ciudades)):
+            if i != j:
+                distancia = df.iloc[i + 1, j + 2]
+                if pd.notna(distancia) and distancia > 0:
+                    aristas.append((ciudades[i], ciudades[j], float(distancia)))
+    return aristas
+
+
+def benchmark_importacion_excel(tamanos=(1000, 5000), filas_muestra=5):
+    """
+    Compara la importación de la matriz de distancias celda a celda (df.iloc en dos
+    bucles anidados) con la vectorizada de MatrizDistancias, en matrices sintéticas.
+    El recorrido celda a celda se mide sobre unas pocas filas y se extrapola a N.
+    La lectura del archivo Excel no se mide (es igual en ambos casos).
+    """
+    print(f"{'Ciudades':>8} {'aristas':>10} {'celda a celda (s)':>18} {'matriz (s)':>11} "
+          f"{'grafo (s)':>10} {'lotes BD (s)':>13} {'aceleración':>12}")
+    for n in tamanos:
+        df = dataframe_matriz(n)
+        
+        inicio = time.perf_counter()
+        _aristas_celda_a_celda(df, filas_muestra)
+        t_celdas = (time.perf_counter() - inicio) * n / filas_muestra
+        
+        inicio = time.perf_counter()
+        matriz = MatrizDistancias.desde_dataframe(df)
+        origenes, _, _ = matriz.aristas()
+        t_matriz = time.perf_counter() - inicio
+        
+        inicio = time.perf_counter()
+        matriz.crear_grafo()
+        t_grafo = time.perf_counter() - inicio
+        
+        nombre_a_id = {nombre: i + 1 for i, nombre in enumerate(matriz.nombres)}
+        inicio = time.perf_counter()
+        for _ in matriz.lotes_distancias(nombre_a_id):
+            pass
+        t_lotes = time.perf_counter() - inicio
+        
+        print(f"{n:8d} {len(origenes):10d} {t_celdas:17.1f}* {t_matriz:11.3f} {t_grafo:10.3f} "
+              f"{t_lotes:13.3f} {t_celdas / t_matriz:11.0f}x")
+    print("* estimado a partir de las primeras filas")
+
+
+def benchmark_importacion_streaming(tamanos=(200, 800), latencia=0.005, tamano_lote=1000):
+    """
+    Compara la importación completa (leer el libro entero, armar la lista de todas
+    las distancias e insertar los lotes uno tras otro) con la importación en flujo
+    (bloques de filas y escritores concurrentes), sobre libros .xlsx sintéticos.
+    Cada inserción simula una petición a la base de datos con una latencia fija.
+    Se mide el tiempo y la memoria pico de cada una.
+    """
+    import openpyxl
+    
+    def escribir(lote):
+        time.sleep(latencia)
+    
+    print(f"{'Ciudades':>8} {'modo':10} {'tiempo (s)':>11} {'registros/s':>12} {'memoria pico (KiB)':>19}")
+    with tempfile.TemporaryDirectory() as directorio:
+        for n in tamanos:
+            archivo = os.path.join(directorio, f"matriz_{n}.xlsx")
+            libro = openpyxl.Workbook(write_only=True)
+            hoja = libro.create_sheet()
+            hoja.append(["CUADRO DE DISTANCIAS"])
+            for fila in dataframe_matriz(n).itertuples(index=False):
+                hoja.append(list(fila))
+            libro.save(archivo)
+            indice_a_id = {i: i for i in range(1, n + 1)}
+            
+            def completa():
+                matriz = MatrizDistancias.desde_excel(archivo)
+                registros = [lote for lote in matriz.lotes_distancias({nombre: i + 1 for i, nombre in
+                                                                       enumerate(matriz.nombres)}, tamano_lote)]
+                for lote in registros:
+                    escribir(lote)
+            
+            def flujo():
+                importar_distancias_excel(archivo, indice_a_id, escribir, tamano_lote=tamano_lote,
+                                          intervalo_progreso=float('inf'))
+            
+            registros = sum(len(lote) for lote in MatrizDistancias.desde_excel(archivo).lotes_distancias(
+                {f"Ciudad {i}": i + 1 for i in range(n)}, tamano_lote))
+            for modo, funcion in (("completa", completa), ("flujo", flujo)):
+                inicio = time.perf_counter()
+                funcion()
+                segundos = time.perf_counter() - inicio
+                pico = memoria_pico(funcion)
+                print(f"{n:8d} {modo:10} {segundos:11.2f} {registros / segundos:12.0f} {pico:19.0f}")
+
+
+if __name__ == "__main__":
+    benchmark_arranque()
+    print()
+    benchmark_conexion_bd()
+    print()
+    benchmark_almacenamiento()
+    print()
+    benchmark_importacion_excel()
+    print()
+    benchmark_importacion_streaming()
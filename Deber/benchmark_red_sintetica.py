@@ -0,0 +1,185 @@
+import argparse
+import json
+import platform
+import time
+import tracemalloc
+from datetime import datetime
+import networkx as nx
+import numpy as np
+
+from algoritmos_busqueda import AlgoritmosBusqueda
+from red_sintetica import generar_puntos, generar_aristas, generar_red_vial, crear_grafo_busqueda
+
+# Motores de búsqueda que se pueden medir: nombre -> función(G, origen, destino).
+# Para medir un motor nuevo basta con agregarlo aquí.
+MOTORES = {
+    'dijkstra': lambda G, o, d: AlgoritmosBusqueda.dijkstra(G, o, d),
+    'busqueda_voraz': lambda G, o, d: AlgoritmosBusqueda.busqueda_voraz(G, o, d, None),
+    'a_estrella': lambda G, o, d: AlgoritmosBusqueda.a_estrella(G, o, d, None),
+    'dijkstra_bidireccional': lambda G, o, d: AlgoritmosBusqueda.dijkstra_bidireccional(G, o, d),
+    'a_estrella_bidireccional': lambda G, o, d: AlgoritmosBusqueda.a_estrella_bidireccional(G, o, d, None),
+    'contraccion_jerarquica': lambda G, o, d: AlgoritmosBusqueda.contraccion_jerarquica(G, o, d),
+}
+
+MOTORES_POR_DEFECTO = ['dijkstra', 'busqueda_voraz', 'a_estrella', 'dijkstra_bidireccional', 'a_estrella_bidireccional']
+
+# Tamaños de red por defecto (nodos). La red de 1M tarda unos 20 s en generarse y
+# varios minutos en medirse; para una corrida rápida: --nodos 10000 100000
+TAMANOS_POR_DEFECTO = (10_000, 100_000, 1_000_000)
+
+
+def grafo_vial(nodos, semilla=0):
+    """
+    Red vial sintética como grafo NetworkX completo con coordenadas {nodo: (lat, lon)},
+    para las mediciones que recorren nodos y aristas (dibujo). Las búsquedas usan
+    crear_grafo_busqueda, que no crea nodos NetworkX.
+    """
+    latitudes, longitudes = generar_puntos(nodos, semilla=semilla)
+    origenes, destinos, distancias = generar_aristas(latitudes, longitudes, semilla=semilla)
+    G = nx.Graph()
+    G.add_weighted_edges_from(zip(origenes.tolist(), destinos.tolist(), distancias.tolist()))
+    return G, {i: (lat, lon) for i, (lat, lon) in enumerate(zip(latitudes.tolist(), longitudes.tolist()))}
+
+
+def _percentiles(valores):
+    """Resumen de una lista de mediciones: media, p50, p95, p99 y máximo"""
+    valores = np.asarray(valores, dtype=np.float64)
+    if len(valores) == 0:
+        return None
+    p50, p95, p99 = np.percentile(valores, [50, 95, 99])
+    return {'media': float(valores.mean()), 'p50': float(p50), 'p95': float(p95), 'p99': float(p99),
+            'max': float(valores.max())}
+
+
+def medir_motor(G, motor, pares, referencia=None, muestras_memoria=3):
+    """
+    Medir un motor sobre los pares origen-destino dados.
+
+    La primera consulta se mide aparte como preparación (construcción de la
+    jerarquía, de la heurística, etc.). La memoria pico se mide con tracemalloc
+    en las primeras consultas, en una pasada separada para no afectar la latencia.
+
+    Args:
+        G: Grafo de búsqueda (con G.graph['compacto'])
+        motor: Función(G, origen, destino) que devuelve el resultado de la búsqueda
+        pares: Lista de pares (origen, destino)
+        referencia: Distancias óptimas de cada par, para calcular el sobrecosto
+        muestras_memoria: Consultas en las que se mide la memoria pico
+    """
+    inicio = time.perf_counter()
+    motor(G, *pares[0])
+    preparacion = time.perf_counter() - inicio
+
+    latencias, expandidos, distancias = [], [], []
+    for origen, destino in pares:
+        inicio = time.perf_counter()
+        resultado = motor(G, origen, destino)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        if isinstance(resultado, str):
+            distancias.append(None)
+            continue
+        expandidos.append(resultado['nodos_expandidos'])
+        distancias.append(resultado['distancia_total'])
+
+    picos = []
+    for origen, destino in pares[:muestras_memoria]:
+        tracemalloc.start()
+        try:
+            motor(G, origen, destino)
+            picos.append(tracemalloc.get_traced_memory()[1] / 1024)
+        finally:
+            tracemalloc.stop()
+
+    informe = {
+        'consultas': len(pares),
+        'sin_ruta': sum(d is None for d in distancias),
+        'preparacion_s': preparacion,
+        'latencia_ms': _percentiles(latencias),
+        'nodos_expandidos': _percentiles(expandidos),
+        'memoria_pico_kib': max(picos) if picos else None,
+    }
+    if referencia is not None:
+        sobrecostos = [(d / r - 1) * 100 for d, r in zip(distancias, referencia)
+                       if d is not None and r is not None and r > 0]
+        informe['sobrecosto_pct'] = _percentiles(sobrecostos)
+    return informe, distancias
+
+
+def ejecutar_suite(tamanos=TAMANOS_POR_DEFECTO, consultas=30, motores=None, semilla=0, archivo_reporte=None):
+    """
+    Generar redes viales sintéticas de cada tamaño y medir los motores de búsqueda
+    sobre los mismos pares origen-destino aleatorios.
+
+    Args:
+        tamanos: Número de nodos de cada red
+        consultas: Pares origen-destino por red
+        motores: Nombres de MOTORES a medir (por defecto MOTORES_POR_DEFECTO)
+        semilla: Semilla de las redes y de los pares
+        archivo_reporte: Si se indica, el reporte se guarda en JSON en este archivo
+
+    Returns:
+        Diccionario con el reporte (el mismo que se guarda en JSON)
+    """
+    motores = list(motores or MOTORES_POR_DEFECTO)
+    reporte = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'plataforma': platform.platform(),
+        'semilla': semilla,
+        'consultas': consultas,
+        'redes': []
+    }
+
+    for nodos in tamanos:
+        inicio = time.perf_counter()
+        compacto = generar_red_vial(nodos, semilla=semilla)
+        generacion = time.perf_counter() - inicio
+        G = crear_grafo_busqueda(compacto)
+
+        rng = np.random.default_rng(semilla + nodos)
+        pares = [tuple(int(x) for x in rng.choice(nodos, 2, replace=False)) for _ in range(consultas)]
+
+        red = {
+            'nodos': nodos,
+            'aristas': compacto.numero_aristas,
+            'generacion_s': generacion,
+            'memoria_grafo_kib': sum(a.nbytes for a in (compacto.offsets, compacto.vecinos, compacto.pesos)) / 1024,
+            'motores': {}
+        }
+        print(f"Red de {nodos} nodos y {compacto.numero_aristas} aristas generada en {generacion:.2f} s")
+
+        # Las distancias de Dijkstra son la referencia óptima para el sobrecosto
+        referencia = None
+        for nombre in motores:
+            informe, distancias = medir_motor(G, MOTORES[nombre], pares, referencia)
+            if nombre == 'dijkstra':
+                referencia = distancias
+            red['motores'][nombre] = informe
+            latencia = informe['latencia_ms']
+            print(f"  {nombre:26} p50 {latencia['p50']:10.2f} ms  p95 {latencia['p95']:10.2f} ms  "
+                  f"p99 {latencia['p99']:10.2f} ms  expandidos p50 {informe['nodos_expandidos']['p50']:10.0f}  "
+                  f"memoria {informe['memoria_pico_kib']:10.0f} KiB")
+
+        reporte['redes'].append(red)
+
+    if archivo_reporte:
+        with open(archivo_reporte, 'w', encoding='utf-8') as archivo:
+            json.dump(reporte, archivo, indent=2, ensure_ascii=False)
+        print(f"Reporte guardado en {archivo_reporte}")
+
+    return reporte
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de los algoritmos de búsqueda sobre redes viales sintéticas")
+    parser.add_argument("--nodos", type=int, nargs="+", default=list(TAMANOS_POR_DEFECTO),
+                        help="Tamaños de red a medir (por ejemplo: 10000 100000)")
+    parser.add_argument("--consultas", type=int, default=30, help="Pares origen-destino por red")
+    parser.add_argument("--motores", nargs="+", choices=sorted(MOTORES), default=MOTORES_POR_DEFECTO,
+                        help="Motores de búsqueda a medir")
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla de las redes y de los pares")
+    parser.add_argument("--salida", default="reporte_red_sintetica.json", help="Archivo JSON del reporte")
+    args = parser.parse_args()
+
+    ejecutar_suite(args.nodos, args.consultas, args.motores, args.semilla, args.salida)
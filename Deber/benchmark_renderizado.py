@@ -0,0 +1,164 @@
+import os
+import time
+import tempfile
+import networkx as nx
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from PIL import Image
+
+from algoritmos_busqueda import AlgoritmosBusqueda
+from generador_grafo import GeneradorGrafo
+from benchmark_busqueda import PARES_REFERENCIA, grafo_referencia, tiempo_medio
+from benchmark_red_sintetica import grafo_vial
+
+
+def _visualizar_ruta_completa(G, resultado_ruta, coords, filename):
+    """Dibujo anterior de la ruta: grafo completo con pyplot y savefig a 300 dpi en cada llamada"""
+    ruta = resultado_ruta['ruta']
+    aristas_ruta = [(ruta[i], ruta[i+1]) for i in range(len(ruta)-1)]
+    
+    plt.figure(figsize=(16, 12))
+    pos = GeneradorGrafo._posiciones(G, coords)
+    for u, v, data in G.edges(data=True):
+        if (u, v) not in aristas_ruta and (v, u) not in aristas_ruta:
+            width = max(0.2, 2 * (1 / (data['weight'] / 50)))
+            nx.draw_networkx_edges(G, pos, edgelist=[(u, v)], width=width, alpha=0.15, edge_color='gray')
+    nx.draw_networkx_nodes(G, pos, node_size=120, node_color='lightgray', alpha=0.3)
+    for u, v in aristas_ruta:
+        nx.draw_networkx_edges(G, pos, edgelist=[(u, v)], width=4, edge_color='red', arrows=True,
+                               arrowsize=20, arrowstyle='-|>')
+    nx.draw_networkx_nodes(G, pos, nodelist=ruta, node_size=300, node_color='lightcoral')
+    nx.draw_networkx_nodes(G, pos, nodelist=[ruta[0], ruta[-1]], node_size=500, node_color='gold',
+                           edgecolors='darkorange', linewidths=2)
+    nx.draw_networkx_labels(G, pos, labels={n: n for n in ruta}, font_size=10, font_weight='bold',
+                            bbox=dict(facecolor='white', alpha=0.8, pad=0.5))
+    nx.draw_networkx_edge_labels(G, pos, edge_labels={(u, v): f"{G[u][v]['weight']:.1f} km" for u, v in aristas_ruta},
+                                 font_size=9, font_weight='bold', bbox=dict(facecolor='white', alpha=0.7, pad=0.2))
+    plt.title(f"Ruta {resultado_ruta['algoritmo']}: {ruta[0]} → {ruta[-1]}", fontsize=16, fontweight='bold')
+    plt.figtext(0.5, 0.01, f"Distancia total: {resultado_ruta['distancia_total']:.1f} km\nRuta: {' → '.join(ruta)}",
+                ha='center', fontsize=11, bbox=dict(facecolor='lightyellow', alpha=0.9, pad=0.5))
+    plt.axis('off')
+    plt.tight_layout(rect=[0, 0.05, 1, 0.95])
+    plt.savefig(filename, dpi=300, bbox_inches='tight')
+    plt.close()
+
+
+def benchmark_renderizado(repeticiones=5, tamano_canvas=(900, 700)):
+    """
+    Compara el dibujo de la ruta redibujando todo el grafo en cada llamada con el
+    fondo en caché (solo se dibuja la ruta encima), a la resolución por defecto y
+    al tamaño del canvas de la interfaz. El primer dibujo con caché incluye la
+    construcción del fondo y se muestra aparte.
+    """
+    G, coords = grafo_referencia()
+    G.graph['version'] = 0
+    resultados = [AlgoritmosBusqueda.a_estrella(G, origen, destino, coords) for origen, destino in PARES_REFERENCIA]
+    
+    with tempfile.TemporaryDirectory() as directorio:
+        archivo = os.path.join(directorio, "ruta.png")
+        
+        def completo():
+            for resultado in resultados:
+                _visualizar_ruta_completa(G, resultado, coords, archivo)
+        
+        def con_cache(tamano):
+            def dibujar():
+                for resultado in resultados:
+                    GeneradorGrafo.visualizar_ruta(G, resultado, coords, archivo, tamano=tamano)
+            return dibujar
+        
+        print(f"{'modo':28} {'primera ruta (ms)':>18} {'por ruta (ms)':>14} {'aceleración':>12}")
+        t_completo = tiempo_medio(completo, repeticiones) / len(resultados)
+        print(f"{'completo 300 dpi':28} {t_completo:18.0f} {t_completo:14.0f} {1:11.1f}x")
+        for modo, tamano in (("caché 300 dpi", None), (f"caché {tamano_canvas[0]}x{tamano_canvas[1]} px", tamano_canvas)):
+            G.graph.pop('fondo_mapa', None)
+            inicio = time.perf_counter()
+            GeneradorGrafo.visualizar_ruta(G, resultados[0], coords, archivo, tamano=tamano)
+            t_primera = (time.perf_counter() - inicio) * 1000
+            t_ruta = tiempo_medio(con_cache(tamano), repeticiones) / len(resultados)
+            print(f"{modo:28} {t_primera:18.0f} {t_ruta:14.0f} {t_completo / t_ruta:11.1f}x")
+
+
+def _dibujar_aristas_una_por_una(ejes, G, pos):
+    """Dibujo anterior de las aristas: una llamada a networkx (y un artista) por arista"""
+    for u, v, data in G.edges(data=True):
+        width = max(0.2, 2 * (1 / (data['weight'] / 50)))
+        nx.draw_networkx_edges(G, pos, edgelist=[(u, v)], width=width, alpha=0.15, edge_color='gray', ax=ejes)
+
+
+def benchmark_dibujo_aristas(tamanos=(100, 500, 2000)):
+    """
+    Compara el dibujo de las aristas arista por arista con una sola LineCollection
+    en redes viales sintéticas de distinto tamaño. Se mide crear los artistas y
+    dibujar la figura (16×12 pulgadas a 100 dpi); los nodos y etiquetas no cambian.
+    """
+    def dibujar(G, pos, una_por_una):
+        figura = Figure(figsize=(16, 12), dpi=100)
+        FigureCanvasAgg(figura)
+        ejes = figura.add_subplot()
+        if una_por_una:
+            _dibujar_aristas_una_por_una(ejes, G, pos)
+        else:
+            GeneradorGrafo._dibujar_aristas(ejes, G, pos, ancho_minimo=0.2, escala=2, color='gray', alpha=0.15)
+        figura.canvas.draw()
+    
+    print(f"{'Nodos':>6} {'aristas':>8} {'una por una (s)':>16} {'LineCollection (s)':>19} {'aceleración':>12}")
+    for nodos in tamanos:
+        G, coords = grafo_vial(nodos)
+        pos = GeneradorGrafo._posiciones(G, coords)
+        tiempos = []
+        for una_por_una in (True, False):
+            inicio = time.perf_counter()
+            dibujar(G, pos, una_por_una)
+            tiempos.append(time.perf_counter() - inicio)
+        print(f"{nodos:6d} {G.number_of_edges():8d} {tiempos[0]:16.2f} {tiempos[1]:19.3f} "
+              f"{tiempos[0] / tiempos[1]:11.0f}x")
+
+
+def benchmark_imagen_memoria(repeticiones=5, tamano_canvas=(900, 700)):
+    """
+    Compara el camino de la imagen de una ruta hasta el canvas: PNG a 300 dpi en
+    disco, lectura y reducción LANCZOS al tamaño del canvas (anterior) con el
+    dibujo en memoria directamente al tamaño del canvas. Ambos usan el fondo en
+    caché; falta solo la conversión a PhotoImage, que es igual en los dos casos.
+    """
+    G, coords = grafo_referencia()
+    G.graph['version'] = 0
+    resultados = [AlgoritmosBusqueda.a_estrella(G, origen, destino, coords) for origen, destino in PARES_REFERENCIA]
+    
+    with tempfile.TemporaryDirectory() as directorio:
+        archivo = os.path.join(directorio, "ruta.png")
+        
+        def disco():
+            for resultado in resultados:
+                GeneradorGrafo.visualizar_ruta(G, resultado, coords, archivo)
+                imagen = Image.open(archivo)
+                ratio = min(tamano_canvas[0] / imagen.size[0], tamano_canvas[1] / imagen.size[1])
+                imagen.resize((int(imagen.size[0] * ratio), int(imagen.size[1] * ratio)), Image.LANCZOS)
+        
+        def memoria():
+            for resultado in resultados:
+                GeneradorGrafo.imagen_ruta(G, resultado, coords, tamano_canvas)
+        
+        # Fondos construidos antes de medir
+        disco()
+        memoria()
+        
+        t_disco = tiempo_medio(disco, repeticiones) / len(resultados)
+        t_memoria = tiempo_medio(memoria, repeticiones) / len(resultados)
+    
+    print(f"{'modo':36} {'por ruta (ms)':>14}")
+    print(f"{'PNG 300 dpi + lectura + LANCZOS':36} {t_disco:14.0f}")
+    print(f"{f'memoria {tamano_canvas[0]}x{tamano_canvas[1]} px':36} {t_memoria:14.0f}")
+    print(f"Aceleración: {t_disco / t_memoria:.0f}x")
+
+
+if __name__ == "__main__":
+    benchmark_renderizado()
+    print()
+    benchmark_dibujo_aristas()
+    print()
+    benchmark_imagen_memoria()
@@ -0,0 +1,90 @@
+import threading
+from collections import OrderedDict
+
+# Versión del grafo: cambia cada vez que se reconstruye el grafo o se modifica la base
+# de datos, de modo que las rutas guardadas con una versión anterior no se reutilizan.
+_version_grafo = 0
+_bloqueo_version = threading.Lock()
+
+
+def version_grafo():
+    """Devolver la versión actual del grafo"""
+    return _version_grafo
+
+
+def incrementar_version_grafo():
+    """Marcar el grafo como modificado y devolver la nueva versión"""
+    global _version_grafo
+    with _bloqueo_version:
+        _version_grafo += 1
+        return _version_grafo
+
+
+class CacheRutas:
+    """
+    Caché LRU acotada de resultados de búsqueda.
+
+    Las claves son (origen, destino, algoritmo, versión del grafo). Al cambiar la
+    versión las entradas anteriores dejan de coincidir y terminan desalojándose
+    por antigüedad. Es segura para usarse desde varios hilos.
+    """
+
+    def __init__(self, max_rutas=128):
+        """
+        Args:
+            max_rutas: Número máximo de resultados guardados en la caché
+        """
+        self.max_rutas = max_rutas
+        self._rutas = OrderedDict()
+        self._bloqueo = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+
+    @staticmethod
+    def clave(origen, destino, algoritmo, version=None):
+        """Construir la clave de una búsqueda (por defecto con la versión actual del grafo)"""
+        return (origen, destino, algoritmo, version_grafo() if version is None else version)
+
+    def obtener(self, clave):
+        """Devolver el valor guardado para la clave o None si no está en la caché"""
+        with self._bloqueo:
+            if clave not in self._rutas:
+                self.fallos += 1
+                return None
+            self._rutas.move_to_end(clave)
+            self.aciertos += 1
+            return self._rutas[clave]
+
+    def guardar(self, clave, valor):
+        """Guardar un valor, desalojando el menos usado recientemente si se supera el límite"""
+        with self._bloqueo:
+            self._rutas[clave] = valor
+            self._rutas.move_to_end(clave)
+            while len(self._rutas) > self.max_rutas:
+                self._rutas.popitem(last=False)
+                self.desalojos += 1
+
+    def limpiar(self):
+        """Vaciar la caché sin reiniciar las estadísticas"""
+        with self._bloqueo:
+            self._rutas.clear()
+
+    def estadisticas(self):
+        """Devolver un diccionario con el tamaño, aciertos, fallos, desalojos y tasa de aciertos"""
+        with self._bloqueo:
+            consultas = self.aciertos + self.fallos
+            return {
+                'tamano': len(self._rutas),
+                'max_rutas': self.max_rutas,
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'desalojos': self.desalojos,
+                'tasa_aciertos': self.aciertos / consultas if consultas else 0.0
+            }
+
+    def resumen(self):
+        """Texto corto con las estadísticas de la caché"""
+        e = self.estadisticas()
+        return (f"caché {e['tamano']}/{e['max_rutas']}: {e['aciertos']} aciertos, {e['fallos']} fallos, "
+                f"{e['desalojos']} desalojos ({e['tasa_aciertos']:.0%})")
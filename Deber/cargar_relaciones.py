@@ -1,15 +1,8 @@
-import os
-from dotenv import load_dotenv
-from supabase import create_client
+import argparse
 import pandas as pd
+from almacenamiento import obtener_almacenamiento, TAMANO_LOTE
+from ciudades_crud import datos_modificados
 
-# Cargar variables de entorno
-load_dotenv()
-
-# Configurar conexión a Supabase
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 
 # Definir las conexiones reales entre ciudades ecuatorianas
 # Formato: (ciudad1, ciudad2, distancia_km)
@@ -85,16 +78,89 @@ CONEXIONES_REALES = [
     ("Pedernales", "Muisne", 134)
 ]
 
-def migrar_tabla_distancias():
+def construir_distancias(nombre_a_id):
+    """
+    Construir en memoria los registros de distancias (ambas direcciones) de las
+    conexiones reales.
+    
+    Returns:
+        (registros, conexiones_no_creadas): registros {'origen_id', 'destino_id', 'distancia'}
+        y conexiones cuyas ciudades no existen en la base de datos
+    """
+    registros = {}
+    conexiones_no_creadas = []
+    
+    for ciudad1, ciudad2, distancia in CONEXIONES_REALES:
+        # Verificar que ambas ciudades existen
+        faltantes = [c for c in (ciudad1, ciudad2) if c not in nombre_a_id]
+        if faltantes:
+            for ciudad in faltantes:
+                print(f"Advertencia: Ciudad '{ciudad}' no existe en la base de datos.")
+            conexiones_no_creadas.append((ciudad1, ciudad2, distancia))
+            continue
+        
+        # Registro de distancia bidireccional (en ambas direcciones)
+        id1, id2 = nombre_a_id[ciudad1], nombre_a_id[ciudad2]
+        registros[(id1, id2)] = {'origen_id': id1, 'destino_id': id2, 'distancia': distancia}
+        registros[(id2, id1)] = {'origen_id': id2, 'destino_id': id1, 'distancia': distancia}
+    
+    return list(registros.values()), conexiones_no_creadas
+
+def diferencia_distancias(actuales, nuevos):
+    """
+    Comparar la tabla actual con los registros nuevos.
+    
+    Returns:
+        (insertar, actualizar, eliminar): registros que faltan, registros existentes
+        (con su id) cuya distancia cambió e ids de registros que sobran o están repetidos
+    """
+    por_par = {}
+    eliminar = []
+    for registro in actuales:
+        par = (registro['origen_id'], registro['destino_id'])
+        if par in por_par:
+            eliminar.append(registro['id'])
+        else:
+            por_par[par] = registro
+    
+    insertar = []
+    actualizar = []
+    for registro in nuevos:
+        existente = por_par.pop((registro['origen_id'], registro['destino_id']), None)
+        if existente is None:
+            insertar.append(registro)
+        elif float(existente['distancia']) != float(registro['distancia']):
+            actualizar.append({'id': existente['id'], **registro})
+    
+    eliminar.extend(registro['id'] for registro in por_par.values())
+    return insertar, actualizar, eliminar
+
+def migrar_tabla_distancias(solo_diferencias=False, simular=False, tamano_lote=TAMANO_LOTE):
     """
-    Vaciar la tabla de distancias y llenarla solo con las conexiones reales.
+    Reemplazar la tabla de distancias por solo las conexiones reales.
+    
+    El nuevo conjunto de aristas se construye en memoria. Por defecto se escribe por
+    lotes en una tabla de preparación que sustituye a la real de forma atómica, de
+    modo que las aplicaciones en ejecución nunca ven el grafo vacío o a medias.
+    
+    Con solo_diferencias el cambio no es atómico en Supabase: las inserciones,
+    actualizaciones y eliminaciones son peticiones separadas, y un cliente que lea
+    entre ellas ve el grafo a medias (en SQLite van en una sola transacción).
+    
+    Si se escribió algo, la versión del grafo aumenta y la instantánea local se
+    invalida (tenía las aristas anteriores).
+    
+    Args:
+        solo_diferencias: Si es True, solo se insertan, actualizan o eliminan las filas que cambiaron
+        simular: Si es True, se muestra la diferencia sin escribir nada
+        tamano_lote: Número máximo de filas por petición
     """
     print("Iniciando migración de la tabla de distancias...")
+    almacenamiento = obtener_almacenamiento()
     
     # 1. Obtener todas las ciudades
     print("Obteniendo lista de ciudades...")
-    respuesta_ciudades = supabase.table('ciudades').select('id, nombre').execute()
-    ciudades = respuesta_ciudades.data
+    ciudades = almacenamiento.listar_ciudades()
     
     if not ciudades:
         print("Error: No hay ciudades en la base de datos.")
@@ -103,68 +169,42 @@ def migrar_tabla_distancias():
     # Crear diccionario para mapear nombres a IDs
     nombre_a_id = {ciudad['nombre']: ciudad['id'] for ciudad in ciudades}
     
-    # 2. Vaciar la tabla de distancias
-    print("Vaciando la tabla de distancias...")
+    # 2. Construir el nuevo conjunto de distancias y compararlo con el actual
+    nuevos, conexiones_no_creadas = construir_distancias(nombre_a_id)
+    insertar, actualizar, eliminar = diferencia_distancias(almacenamiento.listar_distancias(), nuevos)
+    print(f"Diferencias: {len(insertar)} registros nuevos, {len(actualizar)} con distancia distinta, "
+          f"{len(eliminar)} sobrantes")
+    
+    # 3. Escribir los cambios (una escritura que falla puede haber aplicado una parte)
+    escrito = not simular and bool(insertar or actualizar or eliminar)
     try:
-        # Para eliminar todos los registros en PostgreSQL/Supabase, necesitamos usar un truco
-        # porque DELETE requiere una cláusula WHERE
-        supabase.table('distancias').delete().neq('id', 0).execute()
-        print("Tabla de distancias vaciada correctamente.")
+        if simular:
+            id_a_nombre = {ciudad_id: nombre for nombre, ciudad_id in nombre_a_id.items()}
+            for registro in insertar:
+                print(f"  + {id_a_nombre[registro['origen_id']]} -> {id_a_nombre[registro['destino_id']]} ({registro['distancia']} km)")
+            for registro in actualizar:
+                print(f"  ~ {id_a_nombre[registro['origen_id']]} -> {id_a_nombre[registro['destino_id']]} ({registro['distancia']} km)")
+            print(f"  - {len(eliminar)} registros")
+            print("Simulación: no se escribió ningún cambio.")
+        elif solo_diferencias:
+            almacenamiento.aplicar_cambios_distancias(insertar, actualizar, eliminar, tamano_lote)
+            print("Diferencias aplicadas correctamente.")
+        else:
+            print("Escribiendo la tabla de preparación e intercambiándola...")
+            almacenamiento.reemplazar_distancias(nuevos, tamano_lote)
+            print("Tabla de distancias reemplazada correctamente.")
     except Exception as e:
-        print(f"Error al vaciar la tabla: {e}")
-        print("Intentando un enfoque alternativo...")
-        try:
-            # Enfoque alternativo: obtener todos los IDs y eliminarlos uno por uno
-            todos_ids = supabase.table('distancias').select('id').execute()
-            if todos_ids.data:
-                for registro in todos_ids.data:
-                    supabase.table('distancias').delete().eq('id', registro['id']).execute()
-            print("Tabla de distancias vaciada correctamente.")
-        except Exception as e2:
-            print(f"Error al usar el enfoque alternativo: {e2}")
-            return False
-    
-    # 3. Insertar las conexiones reales
-    print("Insertando conexiones reales...")
-    conexiones_creadas = 0
-    conexiones_no_creadas = []
-    
-    for ciudad1, ciudad2, distancia in CONEXIONES_REALES:
-        # Verificar que ambas ciudades existen
-        if ciudad1 not in nombre_a_id:
-            print(f"Advertencia: Ciudad '{ciudad1}' no existe en la base de datos.")
-            conexiones_no_creadas.append((ciudad1, ciudad2, distancia))
-            continue
-            
-        if ciudad2 not in nombre_a_id:
-            print(f"Advertencia: Ciudad '{ciudad2}' no existe en la base de datos.")
-            conexiones_no_creadas.append((ciudad1, ciudad2, distancia))
-            continue
-        
-        # Crear registro de distancia bidireccional (en ambas direcciones)
-        try:
-            # Dirección 1: ciudad1 -> ciudad2
-            supabase.table('distancias').insert({
-                'origen_id': nombre_a_id[ciudad1],
-                'destino_id': nombre_a_id[ciudad2],
-                'distancia': distancia
-            }).execute()
-            
-            # Dirección 2: ciudad2 -> ciudad1
-            supabase.table('distancias').insert({
-                'origen_id': nombre_a_id[ciudad2],
-                'destino_id': nombre_a_id[ciudad1],
-                'distancia': distancia
-            }).execute()
-            
-            conexiones_creadas += 1
-            print(f"Conexión creada: {ciudad1} - {ciudad2} ({distancia} km)")
-            
-        except Exception as e:
-            print(f"Error al crear conexión {ciudad1} - {ciudad2}: {e}")
-            conexiones_no_creadas.append((ciudad1, ciudad2, distancia))
+        print(f"Error al escribir las distancias: {e}")
+        if not solo_diferencias and not simular:
+            print("Verifique que la función intercambiar_distancias exista en la base de datos "
+                  "(almacenamiento.SQL_INTERCAMBIO_DISTANCIAS) o use el modo --diferencias.")
+        return False
+    finally:
+        if escrito:
+            datos_modificados()
     
-    print(f"\nMigración completada. {conexiones_creadas} conexiones creadas de {len(CONEXIONES_REALES)}")
+    conexiones_creadas = len(CONEXIONES_REALES) - len(conexiones_no_creadas)
+    print(f"\nMigración completada. {conexiones_creadas} conexiones de {len(CONEXIONES_REALES)}")
     
     if conexiones_no_creadas:
         print(f"Advertencia: {len(conexiones_no_creadas)} conexiones no se pudieron crear:")
@@ -174,8 +214,8 @@ def migrar_tabla_distancias():
     return True
 
 def verificar_con_usuario():
-    """Verificar con el usuario antes de vaciar la tabla"""
-    print("\n¡ATENCIÓN! Este script va a ELIMINAR TODOS LOS DATOS de la tabla 'distancias'.")
+    """Verificar con el usuario antes de reemplazar la tabla"""
+    print("\n¡ATENCIÓN! Este script va a REEMPLAZAR TODOS LOS DATOS de la tabla 'distancias'.")
     print("La tabla se rellenará con solo las conexiones reales entre ciudades.")
     print("Este proceso no se puede deshacer.")
     
@@ -184,13 +224,18 @@ def verificar_con_usuario():
 
 # Función principal
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migración de la tabla de distancias")
+    parser.add_argument("--simular", action="store_true", help="Mostrar las diferencias sin escribir nada")
+    parser.add_argument("--diferencias", action="store_true", help="Escribir solo las filas que cambiaron")
+    parser.add_argument("--lote", type=int, default=TAMANO_LOTE, help="Filas por petición")
+    args = parser.parse_args()
+    
     print("=== MIGRACIÓN DE TABLA DE DISTANCIAS ===")
     
-    if verificar_con_usuario():
-        if migrar_tabla_distancias():
+    if args.simular or verificar_con_usuario():
+        if migrar_tabla_distancias(args.diferencias, args.simular, args.lote):
             print("\nMigración completada con éxito.")
         else:
             print("\nOcurrió un error durante la migración.")
     else:
         print("\nOperación cancelada por el usuario.")
-        
\ No newline at end of file
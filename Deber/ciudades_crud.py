@@ -1,16 +1,15 @@
-import os
-from dotenv import load_dotenv
-from supabase import create_client
+from almacenamiento import obtener_almacenamiento
 import numpy as np
 from geopy.distance import geodesic
+from cache_rutas import incrementar_version_grafo
+from instantanea_datos import InstantaneaDatos
 
-# Cargar variables de entorno
-load_dotenv()
 
-# Configurar conexión a Supabase
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+def datos_modificados():
+    """Marcar el grafo como modificado: nueva versión y la instantánea local deja de estar al día"""
+    incrementar_version_grafo()
+    InstantaneaDatos.invalidar()
+
 
 class CiudadesCRUD:
     """Clase para gestionar operaciones CRUD de ciudades"""
@@ -19,8 +18,7 @@ class CiudadesCRUD:
     def listar_ciudades():
         """Obtener todas las ciudades de la base de datos"""
         try:
-            response = supabase.table('ciudades').select('*').order('nombre').execute()
-            return response.data
+            return obtener_almacenamiento().listar_ciudades()
         except Exception as e:
             print(f"Error al listar ciudades: {e}")
             return []
@@ -29,10 +27,7 @@ class CiudadesCRUD:
     def obtener_ciudad(ciudad_id):
         """Obtener una ciudad por su ID"""
         try:
-            response = supabase.table('ciudades').select('*').eq('id', ciudad_id).execute()
-            if response.data:
-                return response.data[0]
-            return None
+            return obtener_almacenamiento().obtener_ciudad(ciudad_id)
         except Exception as e:
             print(f"Error al obtener ciudad: {e}")
             return None
@@ -41,13 +36,33 @@ class CiudadesCRUD:
     def buscar_ciudad(nombre):
         """Buscar ciudades por nombre (búsqueda parcial)"""
         try:
-            # Usar el operador ILIKE para búsqueda insensible a mayúsculas/minúsculas y parcial
-            response = supabase.table('ciudades').select('*').ilike('nombre', f'%{nombre}%').execute()
-            return response.data
+            # Búsqueda parcial e insensible a mayúsculas/minúsculas
+            return obtener_almacenamiento().buscar_ciudades(nombre)
         except Exception as e:
             print(f"Error al buscar ciudad: {e}")
             return []
     
+    @staticmethod
+    def listar_conexiones(G=None):
+        """
+        Obtener todas las conexiones (sin duplicar las dos direcciones) con el nombre
+        de ambas ciudades: [{'ciudad1': nombre, 'ciudad2': nombre, 'distancia': km}, ...]
+        
+        Args:
+            G: Grafo ya cargado; si se proporciona, las conexiones se toman de él
+               sin consultar la base de datos
+        """
+        try:
+            if G is not None:
+                conexiones = [{'ciudad1': min(u, v), 'ciudad2': max(u, v), 'distancia': distancia}
+                              for u, v, distancia in G.edges(data='weight')]
+                return sorted(conexiones, key=lambda c: (c['ciudad1'], c['ciudad2']))
+            
+            return obtener_almacenamiento().listar_conexiones()
+        except Exception as e:
+            print(f"Error al listar conexiones: {e}")
+            return []
+    
     @staticmethod
     def crear_ciudad(nombre, latitud, longitud, conexiones=None, indice_original=None):
         """
@@ -62,6 +77,8 @@ class CiudadesCRUD:
             indice_original: Índice original en el Excel
         """
         try:
+            almacenamiento = obtener_almacenamiento()
+            
             # Validar datos
             if not nombre or nombre.strip() == "":
                 return {"error": "El nombre de la ciudad es obligatorio"}
@@ -70,19 +87,14 @@ class CiudadesCRUD:
                 return {"error": "Latitud y longitud son obligatorios"}
             
             # Verificar si ya existe una ciudad con el mismo nombre
-            existing = supabase.table('ciudades').select('id').eq('nombre', nombre).execute()
-            if existing.data:
+            if almacenamiento.existe_ciudad(nombre):
                 return {"error": f"Ya existe una ciudad con el nombre '{nombre}'"}
             
             # Asignar nuevo índice si no se proporciona
             if indice_original is None:
                 # Obtener el máximo índice actual
-                indices = supabase.table('ciudades').select('indice_original').execute()
-                if indices.data:
-                    max_indice = max([c['indice_original'] for c in indices.data if c['indice_original'] is not None])
-                    indice_original = max_indice + 1
-                else:
-                    indice_original = 1
+                max_indice = almacenamiento.maximo_indice_original()
+                indice_original = 1 if max_indice is None else max_indice + 1
             
             # Crear la nueva ciudad
             nueva_ciudad = {
@@ -92,38 +104,39 @@ class CiudadesCRUD:
                 'indice_original': indice_original
             }
             
-            response = supabase.table('ciudades').insert(nueva_ciudad).execute()
+            # Validar en una sola consulta que las ciudades destino existen
+            conexiones_creadas = []
+            if conexiones and isinstance(conexiones, list):
+                existentes = {c['id'] for c in almacenamiento.obtener_ciudades({c['ciudad_id'] for c in conexiones})}
+                for conexion in conexiones:
+                    if conexion['ciudad_id'] not in existentes:
+                        print(f"Advertencia: Ciudad destino ID {conexion['ciudad_id']} no existe")
+                        continue
+                    conexiones_creadas.append({'ciudad_id': conexion['ciudad_id'], 'distancia': conexion['distancia']})
+            
+            ciudad_creada = almacenamiento.insertar_ciudad(nueva_ciudad)
             
-            if not response.data:
+            if not ciudad_creada:
                 return {"error": "No se pudo crear la ciudad"}
             
-            ciudad_creada = response.data[0]
+            # Crear todas las conexiones en ambas direcciones con una sola inserción
+            registros = []
+            for conexion in conexiones_creadas:
+                registros.append({'origen_id': ciudad_creada['id'], 'destino_id': conexion['ciudad_id'],
+                                  'distancia': conexion['distancia']})
+                registros.append({'origen_id': conexion['ciudad_id'], 'destino_id': ciudad_creada['id'],
+                                  'distancia': conexion['distancia']})
+            try:
+                almacenamiento.insertar_distancias(registros)
+            except Exception as e:
+                # Si las conexiones no se pudieron crear, no se deja la ciudad a medias
+                almacenamiento.eliminar_ciudad(ciudad_creada['id'])
+                return {"error": f"No se pudieron crear las conexiones de la ciudad: {e}"}
             
-            # Crear conexiones si se proporcionaron
-            if conexiones and isinstance(conexiones, list):
-                for conexion in conexiones:
-                    ciudad2_id = conexion['ciudad_id']
-                    distancia = conexion['distancia']
-                    
-                    # Validar que la ciudad destino existe
-                    ciudad_destino = CiudadesCRUD.obtener_ciudad(ciudad2_id)
-                    if not ciudad_destino:
-                        print(f"Advertencia: Ciudad destino ID {ciudad2_id} no existe")
-                        continue
-                    
-                    # Crear distancia bidireccional (ambas direcciones)
-                    supabase.table('distancias').insert({
-                        'origen_id': ciudad_creada['id'],
-                        'destino_id': ciudad2_id,
-                        'distancia': distancia
-                    }).execute()
-                    
-                    supabase.table('distancias').insert({
-                        'origen_id': ciudad2_id,
-                        'destino_id': ciudad_creada['id'],
-                        'distancia': distancia
-                    }).execute()
+            # Conexiones realmente creadas, para actualizar el grafo en memoria
+            ciudad_creada['conexiones'] = conexiones_creadas
             
+            datos_modificados()
             return ciudad_creada
         
         except Exception as e:
@@ -152,10 +165,11 @@ class CiudadesCRUD:
                 datos_actualizados['longitud'] = longitud
             
             # Actualizar la ciudad
-            response = supabase.table('ciudades').update(datos_actualizados).eq('id', ciudad_id).execute()
+            ciudad_actualizada = obtener_almacenamiento().actualizar_ciudad(ciudad_id, datos_actualizados)
             
-            if response.data:
-                return response.data[0]
+            if ciudad_actualizada:
+                datos_modificados()
+                return ciudad_actualizada
             
             return {"error": "No se pudo actualizar la ciudad"}
         
@@ -163,41 +177,96 @@ class CiudadesCRUD:
             print(f"Error al actualizar ciudad: {e}")
             return {"error": str(e)}
     
+    @staticmethod
+    def crear_conexion(ciudad1_id, ciudad2_id, distancia):
+        """
+        Crear una conexión bidireccional entre dos ciudades existentes
+        
+        Args:
+            ciudad1_id: ID de la primera ciudad
+            ciudad2_id: ID de la segunda ciudad
+            distancia: Distancia en km entre ambas ciudades
+        """
+        try:
+            if ciudad1_id == ciudad2_id:
+                return {"error": "Debe seleccionar dos ciudades diferentes"}
+            
+            if distancia is None or distancia <= 0:
+                return {"error": "La distancia debe ser mayor que cero"}
+            
+            # Validar en una sola consulta que ambas ciudades existen
+            almacenamiento = obtener_almacenamiento()
+            existentes = {c['id'] for c in almacenamiento.obtener_ciudades({ciudad1_id, ciudad2_id})}
+            for ciudad_id in (ciudad1_id, ciudad2_id):
+                if ciudad_id not in existentes:
+                    return {"error": f"La ciudad con ID {ciudad_id} no existe"}
+            
+            # Verificar que la conexión no exista ya
+            if almacenamiento.existe_distancia(ciudad1_id, ciudad2_id):
+                return {"error": "Ya existe una conexión entre estas ciudades"}
+            
+            # Crear distancia bidireccional (ambas direcciones)
+            almacenamiento.insertar_distancias([
+                {'origen_id': ciudad1_id, 'destino_id': ciudad2_id, 'distancia': distancia},
+                {'origen_id': ciudad2_id, 'destino_id': ciudad1_id, 'distancia': distancia}
+            ])
+            
+            datos_modificados()
+            return {'origen_id': ciudad1_id, 'destino_id': ciudad2_id, 'distancia': distancia}
+        
+        except Exception as e:
+            print(f"Error al crear conexión: {e}")
+            return {"error": str(e)}
+    
     @staticmethod
     def eliminar_ciudad(ciudad_id):
         """Eliminar una ciudad y sus distancias asociadas"""
+        resultado = CiudadesCRUD.eliminar_ciudades([ciudad_id])
+        if "error" in resultado:
+            return resultado
+        
+        ciudad = resultado["eliminadas"][0]
+        return {
+            "mensaje": f"Ciudad '{ciudad['nombre']}' eliminada correctamente",
+            "id": ciudad['id'],
+            "nombre": ciudad['nombre']
+        }
+    
+    @staticmethod
+    def eliminar_ciudades(ciudad_ids):
+        """
+        Eliminar varias ciudades a la vez, con sus distancias (ambas direcciones),
+        las rutas calculadas que pasan por ellas y los tramos de esas rutas
+        
+        Args:
+            ciudad_ids: Lista de IDs de las ciudades a eliminar
+        """
         try:
-            # Verificar que la ciudad existe
-            ciudad = CiudadesCRUD.obtener_ciudad(ciudad_id)
-            if not ciudad:
-                return {"error": "Ciudad no encontrada"}
+            almacenamiento = obtener_almacenamiento()
+            
+            # Verificar en una sola consulta que las ciudades existen
+            ciudades = {c['id']: c for c in almacenamiento.obtener_ciudades(set(ciudad_ids))}
+            faltantes = [ciudad_id for ciudad_id in ciudad_ids if ciudad_id not in ciudades]
+            if faltantes:
+                if len(ciudad_ids) == 1:
+                    return {"error": "Ciudad no encontrada"}
+                return {"error": f"Ciudades no encontradas: {', '.join(str(i) for i in faltantes)}"}
+            
+            try:
+                eliminadas = almacenamiento.eliminar_ciudades(list(ciudades))
+            finally:
+                # Aunque falle a medias, las distancias pudieron cambiar
+                datos_modificados()
             
-            # Eliminar distancias relacionadas con esta ciudad
-            supabase.table('distancias').delete().eq('origen_id', ciudad_id).execute()
-            supabase.table('distancias').delete().eq('destino_id', ciudad_id).execute()
-            
-            # Eliminar rutas relacionadas
-            # Primero obtenemos IDs de rutas que involucran esta ciudad
-            rutas_response = supabase.table('rutas_calculadas').select('id').filter("origen_id", "eq", ciudad_id).filter("destino_id", "eq", ciudad_id).execute()
-            if rutas_response.data:
-                rutas_ids = [ruta['id'] for ruta in rutas_response.data]
-                
-                # Eliminar tramos de esas rutas
-                for ruta_id in rutas_ids:
-                    supabase.table('tramos_ruta').delete().eq('ruta_id', ruta_id).execute()
-                
-                # Eliminar las rutas
-                for ruta_id in rutas_ids:
-                    supabase.table('rutas_calculadas').delete().eq('id', ruta_id).execute()
-            
-            # Eliminar la ciudad
-            response = supabase.table('ciudades').delete().eq('id', ciudad_id).execute()
-            
-            if response.data:
-                return {"mensaje": f"Ciudad '{ciudad['nombre']}' eliminada correctamente"}
-            
-            return {"error": "No se pudo eliminar la ciudad"}
+            if not eliminadas:
+                return {"error": "No se pudo eliminar la ciudad"}
+            
+            eliminadas = [{'id': ciudades[i]['id'], 'nombre': ciudades[i]['nombre']} for i in eliminadas]
+            return {
+                "mensaje": f"{len(eliminadas)} ciudad(es) eliminada(s) correctamente",
+                "eliminadas": eliminadas
+            }
         
         except Exception as e:
             print(f"Error al eliminar ciudad: {e}")
-            return {"error": str(e)}
\ No newline at end of file
+            return {"error": str(e)}
@@ -0,0 +1,49 @@
+import os
+import threading
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+# Configuración de la conexión a Supabase
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+
+# Tiempo máximo de espera (segundos) de las consultas a la base de datos
+TIEMPO_ESPERA = float(os.getenv("SUPABASE_TIMEOUT", "10"))
+
+_cliente = None
+_bloqueo = threading.Lock()
+
+
+def obtener_cliente():
+    """
+    Devolver el cliente de Supabase compartido por todos los módulos.
+
+    El cliente se crea en la primera llamada (no al importar), por lo que los
+    módulos de búsqueda se pueden importar sin credenciales. Al ser único, todas
+    las consultas reutilizan su grupo de conexiones HTTP (keep-alive) en lugar de
+    abrir uno por módulo.
+    """
+    global _cliente
+    if _cliente is None:
+        with _bloqueo:
+            if _cliente is None:
+                from supabase import create_client, ClientOptions
+
+                if not SUPABASE_URL or not SUPABASE_KEY:
+                    raise RuntimeError("Faltan las variables de entorno SUPABASE_URL y SUPABASE_KEY")
+
+                opciones = ClientOptions(
+                    postgrest_client_timeout=TIEMPO_ESPERA,
+                    storage_client_timeout=TIEMPO_ESPERA
+                )
+                _cliente = create_client(SUPABASE_URL, SUPABASE_KEY, options=opciones)
+    return _cliente
+
+
+def cerrar_cliente():
+    """Descartar el cliente compartido; la siguiente llamada a obtener_cliente crea uno nuevo"""
+    global _cliente
+    with _bloqueo:
+        _cliente = None
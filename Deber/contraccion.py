@@ -0,0 +1,297 @@
+import os
+import heapq
+import numpy as np
+
+
+class JerarquiaContraccion:
+    """
+    Jerarquía de contracción (Contraction Hierarchies) sobre el grafo compacto.
+
+    Los nodos se contraen en orden de importancia; al contraer un nodo v se agrega
+    un atajo u-w (con v como nodo intermedio) cuando u-v-w es el único camino mínimo
+    entre u y w. Después, cada consulta es una búsqueda bidireccional que solo sube
+    de rango, y los atajos se desempaquetan para recuperar los tramos originales.
+
+    Las aristas hacia nodos de mayor rango se guardan en formato CSR: para el nodo u
+    están en destinos[offsets[u]:offsets[u+1]], con su peso y su nodo intermedio
+    (-1 si es una arista original).
+    """
+
+    def __init__(self, nombres, rangos, offsets, destinos, pesos, intermedios, firma, atajos):
+        """
+        Args:
+            nombres: Lista con el nombre de cada nodo (mismo orden que el grafo compacto)
+            rangos: Arreglo con el orden de contracción de cada nodo
+            offsets: Arreglo de tamaño n+1 con el inicio de las aristas ascendentes
+            destinos: Nodo de mayor rango al que llega cada arista
+            pesos: Peso de cada arista ascendente
+            intermedios: Nodo contraído que reemplaza cada atajo (-1 si es original)
+            firma: Huella del grafo a partir del cual se construyó la jerarquía
+            atajos: Número de atajos agregados durante la contracción
+        """
+        self.nombres = list(nombres)
+        self.rangos = np.asarray(rangos, dtype=np.int64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.destinos = np.asarray(destinos, dtype=np.int32)
+        self.pesos = np.asarray(pesos, dtype=np.float64)
+        self.intermedios = np.asarray(intermedios, dtype=np.int32)
+        self.firma = firma
+        self.atajos = int(atajos)
+
+    @staticmethod
+    def _busqueda_testigo(adyacencia, origen, excluido, limite, max_asentados):
+        """
+        Dijkstra local desde origen que no pasa por el nodo excluido.
+        Se detiene al superar la distancia límite o el número máximo de nodos asentados.
+        """
+        distancias = {origen: 0.0}
+        frontera = [(0.0, origen)]
+        asentados = 0
+
+        while frontera and asentados < max_asentados:
+            dist_actual, actual = heapq.heappop(frontera)
+            if dist_actual > distancias[actual]:
+                continue
+            if dist_actual > limite:
+                break
+            asentados += 1
+
+            for vecino, (peso, _) in adyacencia[actual].items():
+                if vecino == excluido:
+                    continue
+                nueva_dist = dist_actual + peso
+                if nueva_dist < distancias.get(vecino, float('inf')):
+                    distancias[vecino] = nueva_dist
+                    heapq.heappush(frontera, (nueva_dist, vecino))
+
+        return distancias
+
+    @staticmethod
+    def _atajos_necesarios(adyacencia, nodo, max_asentados):
+        """Lista de atajos (u, w, peso) que requiere la contracción de nodo"""
+        vecinos = list(adyacencia[nodo].items())
+        atajos = []
+
+        for i, (u, (peso_u, _)) in enumerate(vecinos):
+            restantes = vecinos[i + 1:]
+            if not restantes:
+                continue
+
+            limite = peso_u + max(peso_w for _, (peso_w, _) in restantes)
+            testigos = JerarquiaContraccion._busqueda_testigo(adyacencia, u, nodo, limite, max_asentados)
+
+            for w, (peso_w, _) in restantes:
+                peso_atajo = peso_u + peso_w
+                if testigos.get(w, float('inf')) > peso_atajo:
+                    atajos.append((u, w, peso_atajo))
+
+        return atajos
+
+    @classmethod
+    def construir(cls, grafo, max_asentados=60):
+        """
+        Construir la jerarquía a partir de un GrafoCompacto.
+
+        El orden de contracción usa la diferencia de aristas (atajos agregados menos
+        aristas eliminadas) más el número de vecinos ya contraídos, con
+        actualización perezosa de prioridades.
+
+        Args:
+            grafo: GrafoCompacto
+            max_asentados: Límite de nodos asentados en cada búsqueda de testigos
+        """
+        n = grafo.numero_nodos
+
+        # Grafo de trabajo: adyacencia[u] = {v: (peso, intermedio)}
+        adyacencia = [dict() for _ in range(n)]
+        for u in range(n):
+            vecinos, pesos = grafo.vecinos_de(u)
+            for v, peso in zip(vecinos, pesos):
+                if v != u and peso < adyacencia[u].get(v, (float('inf'), -1))[0]:
+                    adyacencia[u][v] = (peso, -1)
+
+        # Aristas ascendentes definitivas: se registran al contraer el nodo de menor rango
+        ascendentes = [[] for _ in range(n)]
+        vecinos_contraidos = [0] * n
+        rangos = np.full(n, -1, dtype=np.int64)
+
+        def prioridad(nodo):
+            atajos = len(cls._atajos_necesarios(adyacencia, nodo, max_asentados))
+            return atajos - len(adyacencia[nodo]) + vecinos_contraidos[nodo]
+
+        cola = [(prioridad(v), v) for v in range(n)]
+        heapq.heapify(cola)
+        total_atajos = 0
+        rango = 0
+
+        while cola:
+            _, nodo = heapq.heappop(cola)
+            if rangos[nodo] >= 0:
+                continue
+
+            # Actualización perezosa: si la prioridad empeoró, se reinserta
+            actual = prioridad(nodo)
+            if cola and actual > cola[0][0]:
+                heapq.heappush(cola, (actual, nodo))
+                continue
+
+            for u, w, peso in cls._atajos_necesarios(adyacencia, nodo, max_asentados):
+                if peso < adyacencia[u].get(w, (float('inf'), -1))[0]:
+                    adyacencia[u][w] = (peso, nodo)
+                    adyacencia[w][u] = (peso, nodo)
+                    total_atajos += 1
+
+            rangos[nodo] = rango
+            rango += 1
+
+            # Las aristas restantes del nodo van hacia nodos de mayor rango
+            for vecino, (peso, intermedio) in adyacencia[nodo].items():
+                ascendentes[nodo].append((vecino, peso, intermedio))
+                del adyacencia[vecino][nodo]
+                vecinos_contraidos[vecino] += 1
+            adyacencia[nodo] = {}
+
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum([len(aristas) for aristas in ascendentes], out=offsets[1:])
+        aristas = [arista for lista in ascendentes for arista in lista]
+        destinos = [a[0] for a in aristas]
+        pesos = [a[1] for a in aristas]
+        intermedios = [a[2] for a in aristas]
+
+        return cls(grafo.nombres, rangos, offsets, destinos, pesos, intermedios,
+                   grafo.firma, total_atajos)
+
+    def _arista(self, u, v):
+        """Peso e intermedio de la arista u-v de la jerarquía"""
+        if self.rangos[u] > self.rangos[v]:
+            u, v = v, u
+        inicio, fin = self.offsets[u], self.offsets[u + 1]
+        posiciones = np.nonzero(self.destinos[inicio:fin] == v)[0]
+        k = inicio + posiciones[np.argmin(self.pesos[inicio:fin][posiciones])]
+        return float(self.pesos[k]), int(self.intermedios[k])
+
+    def desempaquetar(self, camino):
+        """Reemplazar los atajos de un camino por los nodos originales que representan"""
+        resultado = [camino[0]]
+        pendientes = [(camino[i], camino[i + 1]) for i in range(len(camino) - 1)][::-1]
+
+        while pendientes:
+            u, v = pendientes.pop()
+            _, intermedio = self._arista(u, v)
+            if intermedio < 0:
+                resultado.append(v)
+            else:
+                pendientes.append((intermedio, v))
+                pendientes.append((u, intermedio))
+
+        return resultado
+
+    def consultar(self, origen, destino, estadisticas=None):
+        """
+        Búsqueda bidireccional ascendente entre origen y destino.
+        Devuelve (camino, distancia, nodos_expandidos); camino es None si no hay ruta.
+        Si se pasa estadisticas (EstadisticasBusqueda), se registran los contadores.
+        """
+        if origen == destino:
+            return [origen], 0.0, 0
+
+        offsets, destinos, pesos = self.offsets, self.destinos, self.pesos
+        distancias = ({origen: 0.0}, {destino: 0.0})
+        padres = ({origen: -1}, {destino: -1})
+        fronteras = ([(0.0, origen)], [(0.0, destino)])
+        infinito = float('inf')
+        mejor = infinito
+        encuentro = -1
+        expandidos = 0
+
+        while fronteras[0] or fronteras[1]:
+            # Cada lado continúa mientras su mínimo pueda mejorar la mejor ruta
+            for lado in (0, 1):
+                frontera = fronteras[lado]
+                if frontera and frontera[0][0] >= mejor:
+                    if estadisticas is not None:
+                        estadisticas.descartar(len(frontera))
+                    frontera.clear()
+                if not frontera:
+                    continue
+
+                dist_actual, actual = heapq.heappop(frontera)
+                if estadisticas is not None:
+                    estadisticas.extracciones += 1
+                propias = distancias[lado]
+                if dist_actual > propias[actual]:
+                    continue
+                expandidos += 1
+
+                total = dist_actual + distancias[1 - lado].get(actual, infinito)
+                if total < mejor:
+                    mejor = total
+                    encuentro = actual
+
+                inicio, fin = offsets[actual], offsets[actual + 1]
+                for vecino, peso in zip(destinos[inicio:fin].tolist(), pesos[inicio:fin].tolist()):
+                    nueva_dist = dist_actual + peso
+                    if nueva_dist < propias.get(vecino, infinito):
+                        propias[vecino] = nueva_dist
+                        padres[lado][vecino] = actual
+                        heapq.heappush(frontera, (nueva_dist, vecino))
+
+                if estadisticas is not None:
+                    estadisticas.expansion(len(fronteras[0]) + len(fronteras[1]))
+
+        if estadisticas is not None:
+            estadisticas.cerrar_frontera(0)
+
+        if encuentro < 0:
+            return None, None, expandidos
+
+        # Camino en la jerarquía: origen → encuentro → destino
+        camino = [encuentro]
+        while padres[0][camino[-1]] >= 0:
+            camino.append(padres[0][camino[-1]])
+        camino.reverse()
+        actual = encuentro
+        while padres[1][actual] >= 0:
+            actual = padres[1][actual]
+            camino.append(actual)
+
+        return self.desempaquetar(camino), mejor, expandidos
+
+    def guardar(self, ruta_archivo):
+        """Guardar la jerarquía en disco (escritura atómica)"""
+        temporal = ruta_archivo + '.tmp'
+        with open(temporal, 'wb') as archivo:
+            np.savez_compressed(
+                archivo,
+                nombres=np.array(self.nombres),
+                rangos=self.rangos,
+                offsets=self.offsets,
+                destinos=self.destinos,
+                pesos=self.pesos,
+                intermedios=self.intermedios,
+                firma=np.array(self.firma),
+                atajos=np.array(self.atajos)
+            )
+        os.replace(temporal, ruta_archivo)
+        print(f"Jerarquía de contracción guardada en {ruta_archivo}")
+
+    @classmethod
+    def cargar(cls, ruta_archivo, grafo):
+        """
+        Cargar la jerarquía desde disco.
+        Devuelve None si el archivo no existe o fue construido para otro grafo.
+        """
+        if not os.path.exists(ruta_archivo):
+            return None
+
+        try:
+            with np.load(ruta_archivo) as datos:
+                firma = str(datos['firma'])
+                if firma != grafo.firma:
+                    print(f"La jerarquía en {ruta_archivo} no corresponde al grafo actual")
+                    return None
+                return cls(datos['nombres'].tolist(), datos['rangos'], datos['offsets'], datos['destinos'],
+                           datos['pesos'], datos['intermedios'], firma, int(datos['atajos']))
+        except Exception as e:
+            print(f"Error al cargar la jerarquía de contracción: {e}")
+            return None
@@ -0,0 +1,64 @@
+import time
+
+
+class EstadisticasBusqueda:
+    """
+    Contadores del trabajo realizado por una búsqueda de ruta.
+
+    Los algoritmos reciben la instancia como parámetro opcional; con None no se
+    cuenta nada y el único costo es una comparación por nodo extraído de la frontera.
+    Las inserciones no se cuentan una a una: toda entrada insertada en la frontera
+    termina extraída, descartada o todavía en la frontera al acabar.
+    """
+
+    __slots__ = ('expandidos', 'inserciones', 'extracciones', 'evaluaciones_heuristica', 'frontera_maxima',
+                 'tiempo_ms', 'tiempo_cpu_ms', '_descartadas', '_inicio', '_inicio_cpu')
+
+    def __init__(self):
+        self.expandidos = 0
+        self.inserciones = 0
+        self.extracciones = 0
+        self.evaluaciones_heuristica = 0
+        self.frontera_maxima = 0
+        self.tiempo_ms = 0.0
+        self.tiempo_cpu_ms = 0.0
+        self._descartadas = 0
+        self._inicio = time.perf_counter()
+        self._inicio_cpu = time.thread_time()
+
+    def expansion(self, tamano_frontera, heuristicas=0):
+        """
+        Registrar la expansión de un nodo, después de insertar sus vecinos.
+
+        Args:
+            tamano_frontera: Entradas en la frontera tras la expansión
+            heuristicas: Valores de la heurística consultados en la expansión
+        """
+        self.evaluaciones_heuristica += int(heuristicas)
+        if tamano_frontera > self.frontera_maxima:
+            self.frontera_maxima = tamano_frontera
+
+    def descartar(self, entradas):
+        """Registrar entradas que se quitan de la frontera sin extraerlas"""
+        self._descartadas += entradas
+
+    def cerrar_frontera(self, restantes):
+        """Registrar las entradas que quedaron en la frontera al terminar"""
+        self.inserciones = self.extracciones + self._descartadas + restantes
+
+    def detener(self):
+        """Fijar el tiempo transcurrido (reloj y CPU del hilo) desde la creación"""
+        self.tiempo_ms = (time.perf_counter() - self._inicio) * 1000
+        self.tiempo_cpu_ms = (time.thread_time() - self._inicio_cpu) * 1000
+
+    def como_diccionario(self):
+        """Contadores como diccionario (para el resultado de la búsqueda)"""
+        return {
+            'nodos_expandidos': self.expandidos,
+            'inserciones': self.inserciones,
+            'extracciones': self.extracciones,
+            'evaluaciones_heuristica': self.evaluaciones_heuristica,
+            'frontera_maxima': self.frontera_maxima,
+            'tiempo_ms': self.tiempo_ms,
+            'tiempo_cpu_ms': self.tiempo_cpu_ms
+        }
@@ -1,33 +1,120 @@
 import networkx as nx
-import os
+import time
+import threading
 import numpy as np
-from dotenv import load_dotenv
-from supabase import create_client
-import matplotlib.pyplot as plt
+from PIL import Image
+from almacenamiento import obtener_almacenamiento
+from matplotlib.figure import Figure
+from matplotlib.collections import LineCollection
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from geopy.distance import geodesic
+from grafo_compacto import GrafoCompacto
+from tabla_rutas import TablaRutas
+from heuristicas import HeuristicaALT
+from contraccion import JerarquiaContraccion
+from cache_rutas import incrementar_version_grafo, version_grafo
+from instantanea_datos import InstantaneaDatos, ARCHIVO_INSTANTANEA
 
-# Cargar variables de entorno
-load_dotenv()
 
-# Configurar conexión a Supabase
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Landmarks para la heurística ALT: pasos fronterizos y puertos en los extremos del país
+LANDMARKS_POR_DEFECTO = ["Rumichaca", "Huaquillas", "Macara", "Pto. Morona"]
+
+
+# Tamaño (pulgadas) y resolución por defecto de las imágenes de rutas
+TAMANO_FIGURA_RUTA = (16, 12)
+RESOLUCION_RUTA = 300
+
+# Posición del mapa dentro de la figura [izquierda, abajo, ancho, alto], con espacio
+# para el título arriba y el resumen de la ruta abajo
+AREA_MAPA = [0.02, 0.09, 0.96, 0.85]
+
+# Protege la caché de fondos en G.graph['fondo_mapa'] (la usan varios hilos de dibujo a la vez)
+_bloqueo_fondo = threading.Lock()
 
 class GeneradorGrafo:
     """Clase para generar y manipular el grafo de ciudades y distancias"""
     
     @staticmethod
-    def cargar_datos_bd():
-        """Cargar los datos de ciudades y distancias desde la base de datos"""
-        try:
-            # Obtener ciudades con coordenadas
-            ciudades_response = supabase.table('ciudades').select('id, nombre, latitud, longitud').execute()
-            ciudades = ciudades_response.data
+    def cargar_datos_bd(archivo_instantanea=ARCHIVO_INSTANTANEA, usar_instantanea=True, refrescar=True,
+                        al_refrescar=None):
+        """
+        Cargar los datos de ciudades y distancias.
+        
+        Si existe una instantánea local válida se usa directamente y, en segundo plano,
+        se descargan los datos de la base de datos; si cambiaron, la instantánea se
+        reemplaza (de forma atómica) y se llama a al_refrescar(). Sin instantánea se
+        descarga de la base de datos y se guarda una para el siguiente arranque.
+        
+        Args:
+            archivo_instantanea: Archivo de la instantánea local (None para no usarla)
+            usar_instantanea: Si es False se descarga de la base de datos aunque exista la instantánea
+            refrescar: Si es True, se actualiza la instantánea en segundo plano tras usarla
+            al_refrescar: Función sin argumentos que se llama cuando la instantánea cambió
+        """
+        inicio = time.perf_counter()
+        
+        instantanea = InstantaneaDatos.cargar(archivo_instantanea) if archivo_instantanea else None
+        if instantanea is not None and usar_instantanea:
+            ciudades, distancias = instantanea.a_filas()
+            print(f"Datos cargados desde {archivo_instantanea}: {len(ciudades)} ciudades y {len(distancias)} "
+                  f"distancias en {time.perf_counter() - inicio:.3f} s")
             
-            # Obtener distancias
-            distancias_response = supabase.table('distancias').select('origen_id, destino_id, distancia').execute()
-            distancias = distancias_response.data
+            if refrescar:
+                threading.Thread(target=GeneradorGrafo._refrescar_instantanea,
+                                 args=(archivo_instantanea, instantanea.firma, al_refrescar, version_grafo()),
+                                 daemon=True).start()
+            return ciudades, distancias
+        
+        ciudades, distancias = GeneradorGrafo._descargar_datos_bd()
+        print(f"Descarga desde la base de datos en {time.perf_counter() - inicio:.3f} s")
+        
+        if ciudades and distancias:
+            if archivo_instantanea:
+                InstantaneaDatos.desde_filas(ciudades, distancias).guardar(archivo_instantanea)
+        elif instantanea is not None:
+            # Sin conexión: se trabaja con la última instantánea disponible
+            print(f"Usando la instantánea {archivo_instantanea} porque no se pudo consultar la base de datos")
+            return instantanea.a_filas()
+        
+        return ciudades, distancias
+    
+    @staticmethod
+    def _refrescar_instantanea(archivo_instantanea, firma_actual, al_refrescar=None, version_inicio=None):
+        """
+        Descargar los datos y reemplazar la instantánea si cambiaron.
+        
+        Si durante la descarga se hizo algún cambio desde la aplicación (la versión
+        del grafo ya no es version_inicio), los datos descargados pueden no incluirlo:
+        se descartan para no deshacer el cambio en el grafo ni en la instantánea.
+        """
+        ciudades, distancias = GeneradorGrafo._descargar_datos_bd()
+        if not ciudades or not distancias:
+            return
+        
+        if version_inicio is not None and version_grafo() != version_inicio:
+            print("Los datos cambiaron durante la descarga; se descarta la actualización de la instantánea")
+            return
+        
+        nueva = InstantaneaDatos.desde_filas(ciudades, distancias)
+        if nueva.firma == firma_actual:
+            print("La instantánea de datos está al día")
+            return
+        
+        nueva.guardar(archivo_instantanea)
+        if version_inicio is not None and version_grafo() != version_inicio:
+            # Un cambio terminó mientras se guardaba: la instantánea nueva ya no está al día
+            InstantaneaDatos.invalidar(archivo_instantanea)
+            return
+        
+        if al_refrescar:
+            al_refrescar()
+    
+    @staticmethod
+    def _descargar_datos_bd():
+        """Descargar los datos de ciudades y distancias desde la base de datos"""
+        try:
+            # Ciudades con coordenadas y distancias del backend configurado (Supabase o SQLite)
+            ciudades, distancias = obtener_almacenamiento().datos_grafo()
             
             print(f"Datos cargados: {len(ciudades)} ciudades y {len(distancias)} distancias")
             
@@ -37,11 +124,27 @@ class GeneradorGrafo:
             return [], []
     
     @staticmethod
-    def crear_grafo():
+    def crear_grafo(precalcular_rutas=False, archivo_rutas="tabla_rutas.npz", precalcular_landmarks=False,
+                    preprocesar_contraccion=False, archivo_contraccion="contraccion.npz",
+                    usar_instantanea=True, refrescar_instantanea=True, al_refrescar=None):
         """
         Crear un grafo NetworkX a partir de las distancias reales entre ciudades
+        
+        Args:
+            precalcular_rutas: Si es True, se calculan (o cargan de disco) las matrices
+                               de distancias y siguiente salto entre todos los pares
+            archivo_rutas: Archivo donde se guardan las matrices precalculadas
+            precalcular_landmarks: Si es True, se prepara la heurística ALT para A*
+            preprocesar_contraccion: Si es True, se construye (o carga de disco) la
+                                     jerarquía de contracción
+            archivo_contraccion: Archivo donde se guarda la jerarquía de contracción
+            usar_instantanea: Si es True, se arranca desde la instantánea local de los datos
+            refrescar_instantanea: Si es True, la instantánea se actualiza en segundo plano
+            al_refrescar: Función que se llama cuando la instantánea se actualizó con datos nuevos
         """
-        ciudades, distancias = GeneradorGrafo.cargar_datos_bd()
+        ciudades, distancias = GeneradorGrafo.cargar_datos_bd(usar_instantanea=usar_instantanea,
+                                                               refrescar=refrescar_instantanea,
+                                                               al_refrescar=al_refrescar)
         
         if not ciudades or not distancias:
             print("No se pudieron cargar los datos para crear el grafo")
@@ -99,73 +202,306 @@ class GeneradorGrafo:
             for i, comp in enumerate(componentes):
                 print(f"  Componente {i+1} tiene {len(comp)} ciudades: {', '.join(comp)}")
         
+        # Representación compacta (ids enteros, arreglos CSR y coordenadas) para los algoritmos
+        G.graph['compacto'] = GrafoCompacto.desde_networkx(G, coords)
+        
+        # Nueva versión del grafo: invalida las rutas guardadas en caché
+        G.graph['version'] = incrementar_version_grafo()
+        
+        if precalcular_rutas:
+            GeneradorGrafo.precalcular_rutas(G, archivo_rutas)
+        
+        if precalcular_landmarks:
+            GeneradorGrafo.precalcular_landmarks(G)
+        
+        if preprocesar_contraccion:
+            GeneradorGrafo.preprocesar_contraccion(G, archivo_contraccion)
+        
         return G, coords, nombre_a_id
     
     @staticmethod
-    def visualizar_grafo(G, coords=None, filename="grafo_ecuador.png"):
-        """Visualizar el grafo completo"""
-        plt.figure(figsize=(16, 12))
+    def _refrescar_grafo(G, coords):
+        """
+        Reconstruir la representación compacta tras modificar el grafo en memoria.
+        Las estructuras precalculadas (tabla de rutas, landmarks, jerarquía) quedan
+        obsoletas y se descartan; los algoritmos vuelven a su versión sin precálculo.
+        """
+        G.graph['compacto'] = GrafoCompacto.desde_networkx(G, coords)
+        for clave in ('tabla_rutas', 'landmarks', 'contraccion', 'fondo_mapa'):
+            G.graph.pop(clave, None)
         
-        # Usar un layout adecuado
-        if coords:
-            # Si tenemos coordenadas geográficas, usarlas para el layout
-            # Usamos coordenadas negativas en X para longitud porque Ecuador está en el hemisferio occidental
-            pos = {node: (-coords[node][1], coords[node][0]) for node in G.nodes() if node in coords}
-            
-            # Para nodos sin coordenadas, usar spring layout
-            nodes_sin_coords = [node for node in G.nodes() if node not in coords]
-            if nodes_sin_coords:
-                pos_restantes = nx.spring_layout(G.subgraph(nodes_sin_coords), seed=42)
-                pos.update(pos_restantes)
+        # El grafo queda sincronizado con la versión que dejó la operación CRUD
+        G.graph['version'] = version_grafo()
+    
+    @staticmethod
+    def agregar_ciudad(G, coords, nombre_a_id, ciudad, conexiones=None):
+        """
+        Agregar al grafo en memoria una ciudad recién creada, sin recargar la base de datos.
+        
+        Args:
+            G: Grafo creado por crear_grafo
+            coords: Diccionario de coordenadas del grafo
+            nombre_a_id: Diccionario {nombre: id} del grafo
+            ciudad: Ciudad devuelta por CiudadesCRUD.crear_ciudad
+            conexiones: Lista [{'ciudad_id': id, 'distancia': km}, ...] (por defecto, ciudad['conexiones'])
+        """
+        if conexiones is None:
+            conexiones = ciudad.get('conexiones', [])
+        id_a_nombre = {ciudad_id: nombre for nombre, ciudad_id in nombre_a_id.items()}
+        
+        nombre = ciudad['nombre']
+        G.add_node(nombre, id=ciudad['id'])
+        nombre_a_id[nombre] = ciudad['id']
+        if ciudad.get('latitud') is not None and ciudad.get('longitud') is not None:
+            coords[nombre] = (ciudad['latitud'], ciudad['longitud'])
+        
+        for conexion in conexiones:
+            if conexion['ciudad_id'] in id_a_nombre:
+                G.add_edge(nombre, id_a_nombre[conexion['ciudad_id']], weight=conexion['distancia'])
+        
+        GeneradorGrafo._refrescar_grafo(G, coords)
+    
+    @staticmethod
+    def actualizar_ciudad(G, coords, nombre_a_id, ciudad):
+        """
+        Aplicar al grafo en memoria el cambio de nombre o coordenadas de una ciudad.
+        
+        Args:
+            ciudad: Ciudad devuelta por CiudadesCRUD.actualizar_ciudad
+        """
+        nombre_anterior = next(nombre for nombre, ciudad_id in nombre_a_id.items() if ciudad_id == ciudad['id'])
+        nombre = ciudad['nombre']
+        
+        if nombre != nombre_anterior:
+            nx.relabel_nodes(G, {nombre_anterior: nombre}, copy=False)
+            del nombre_a_id[nombre_anterior]
+            nombre_a_id[nombre] = ciudad['id']
+            coords.pop(nombre_anterior, None)
+        
+        if ciudad.get('latitud') is not None and ciudad.get('longitud') is not None:
+            coords[nombre] = (ciudad['latitud'], ciudad['longitud'])
+        
+        GeneradorGrafo._refrescar_grafo(G, coords)
+    
+    @staticmethod
+    def eliminar_ciudad(G, coords, nombre_a_id, nombre):
+        """Quitar del grafo en memoria una ciudad eliminada y sus conexiones"""
+        G.remove_node(nombre)
+        nombre_a_id.pop(nombre, None)
+        coords.pop(nombre, None)
+        
+        GeneradorGrafo._refrescar_grafo(G, coords)
+    
+    @staticmethod
+    def agregar_conexion(G, coords, nombre_a_id, conexion):
+        """
+        Agregar al grafo en memoria una conexión recién creada.
+        
+        Args:
+            conexion: Conexión devuelta por CiudadesCRUD.crear_conexion
+        """
+        id_a_nombre = {ciudad_id: nombre for nombre, ciudad_id in nombre_a_id.items()}
+        G.add_edge(id_a_nombre[conexion['origen_id']], id_a_nombre[conexion['destino_id']],
+                   weight=conexion['distancia'])
+        
+        GeneradorGrafo._refrescar_grafo(G, coords)
+    
+    @staticmethod
+    def precalcular_rutas(G, archivo_rutas="tabla_rutas.npz"):
+        """
+        Preparar la tabla de rutas entre todos los pares de ciudades del grafo.
+        Se reutiliza la tabla guardada en disco si corresponde al mismo grafo;
+        en caso contrario se recalcula y se guarda.
+        """
+        grafo = G.graph['compacto']
+        
+        tabla = TablaRutas.cargar(archivo_rutas, grafo) if archivo_rutas else None
+        if tabla is None:
+            print(f"Calculando tabla de rutas para {grafo.numero_nodos} ciudades...")
+            tabla = TablaRutas.calcular(grafo)
+            if archivo_rutas:
+                tabla.guardar(archivo_rutas)
         else:
-            # Si no hay coordenadas, usar spring layout para todos
-            pos = nx.spring_layout(G, seed=42, k=0.8)
+            print(f"Tabla de rutas cargada desde {archivo_rutas}")
+        
+        G.graph['tabla_rutas'] = tabla
+        return tabla
+    
+    @staticmethod
+    def precalcular_landmarks(G, nombres_landmarks=None, k=4):
+        """
+        Preparar la heurística ALT (landmarks) para A* y guardarla en G.graph['landmarks'].
+        
+        Args:
+            G: Grafo creado por crear_grafo
+            nombres_landmarks: Ciudades preferidas como landmarks (por defecto, las fronteras)
+            k: Número de landmarks
+        """
+        if nombres_landmarks is None:
+            nombres_landmarks = LANDMARKS_POR_DEFECTO
+        
+        grafo = G.graph['compacto']
+        heuristica = HeuristicaALT.desde_grafo(grafo, nombres_landmarks, k)
+        G.graph['landmarks'] = heuristica
+        
+        nombres = [grafo.nombres[l] for l in heuristica.landmarks]
+        print(f"Landmarks precalculados: {', '.join(str(n) for n in nombres)}")
+        return heuristica
+    
+    @staticmethod
+    def preprocesar_contraccion(G, archivo_contraccion="contraccion.npz"):
+        """
+        Preparar la jerarquía de contracción y guardarla en G.graph['contraccion'].
+        Se reutiliza la jerarquía guardada en disco si corresponde al mismo grafo;
+        en caso contrario se construye y se guarda.
+        """
+        grafo = G.graph['compacto']
         
+        jerarquia = JerarquiaContraccion.cargar(archivo_contraccion, grafo) if archivo_contraccion else None
+        if jerarquia is None:
+            print(f"Construyendo jerarquía de contracción para {grafo.numero_nodos} ciudades...")
+            inicio = time.perf_counter()
+            jerarquia = JerarquiaContraccion.construir(grafo)
+            print(f"Jerarquía construida en {time.perf_counter() - inicio:.2f} s con {jerarquia.atajos} atajos")
+            if archivo_contraccion:
+                jerarquia.guardar(archivo_contraccion)
+        else:
+            print(f"Jerarquía de contracción cargada desde {archivo_contraccion}")
+        
+        G.graph['contraccion'] = jerarquia
+        return jerarquia
+    
+    @staticmethod
+    def visualizar_grafo(G, coords=None, filename="grafo_ecuador.png"):
+        """
+        Visualizar el grafo completo y guardarlo en un archivo (exportación a 300 dpi).
+        Usa una figura propia, no el estado global de pyplot, porque se llama desde
+        los hilos de la interfaz.
+        """
+        figura = Figure(figsize=(16, 12))
+        FigureCanvasAgg(figura)
+        ejes = figura.add_subplot()
+        
+        GeneradorGrafo._dibujar_grafo(ejes, G, GeneradorGrafo._posiciones(G, coords))
+        
+        ejes.set_title('Red de Carreteras entre Ciudades de Ecuador', fontsize=16)
+        ejes.axis('off')
+        figura.tight_layout()
+        figura.savefig(filename, dpi=300, bbox_inches='tight')
+        
+        print(f"Grafo guardado como {filename}")
+        return filename
+    
+    @staticmethod
+    def imagen_grafo(G, coords=None, tamano=None):
+        """
+        Dibujar el grafo completo en memoria, sin archivos ni codificación PNG.
+        
+        Args:
+            tamano: Tamaño (ancho, alto) en píxeles; por defecto TAMANO_FIGURA_RUTA
+                    a RESOLUCION_RUTA
+        
+        Returns:
+            Imagen PIL en modo RGBA
+        """
+        figura, ejes = GeneradorGrafo._figura(tamano)
+        GeneradorGrafo._dibujar_grafo(ejes, G, GeneradorGrafo._posiciones(G, coords))
+        ejes.margins(0.05)
+        ejes.autoscale_view()
+        ejes.set_title('Red de Carreteras entre Ciudades de Ecuador', fontsize=16)
+        ejes.axis('off')
+        return GeneradorGrafo._imagen_figura(figura)
+    
+    @staticmethod
+    def _dibujar_grafo(ejes, G, pos):
+        """Dibujar aristas, nodos y etiquetas del grafo completo en los ejes"""
         # Dibujar aristas con grosor basado en distancia
-        for u, v, data in G.edges(data=True):
-            # Grosor inversamente proporcional a la distancia (más delgado para distancias mayores)
-            width = max(0.5, 5 * (1 / (data['weight'] / 50)))
-            nx.draw_networkx_edges(G, pos, edgelist=[(u, v)], width=width, alpha=0.6, edge_color='royalblue')
+        # Grosor inversamente proporcional a la distancia (más delgado para distancias mayores)
+        GeneradorGrafo._dibujar_aristas(ejes, G, pos, ancho_minimo=0.5, escala=5,
+                                        color='royalblue', alpha=0.6)
         
         # Dibujar nodos
         nx.draw_networkx_nodes(G, pos, node_size=200, node_color='lightblue', 
-                              edgecolors='darkblue', linewidths=1.5)
+                              edgecolors='darkblue', linewidths=1.5, ax=ejes)
         
         # Dibujar etiquetas
         nx.draw_networkx_labels(
             G, pos, 
             font_size=9, 
             font_weight='bold',
-            bbox=dict(facecolor='white', alpha=0.8, pad=0.5)
+            bbox=dict(facecolor='white', alpha=0.8, pad=0.5),
+            ax=ejes
         )
+    
+    @staticmethod
+    def _figura(tamano=None, transparente=False):
+        """
+        Figura fuera de pyplot (se puede usar desde cualquier hilo) con los ejes en AREA_MAPA.
         
-        plt.title('Red de Carreteras entre Ciudades de Ecuador', fontsize=16)
-        plt.axis('off')
-        plt.tight_layout()
-        plt.savefig(filename, dpi=300, bbox_inches='tight')
-        plt.close()
+        Args:
+            tamano: Tamaño (ancho, alto) en píxeles; por defecto TAMANO_FIGURA_RUTA
+                    a RESOLUCION_RUTA
+            transparente: Sin fondo en la figura ni en los ejes (para superponerla)
         
-        print(f"Grafo guardado como {filename}")
-        return filename
+        Returns:
+            (figura, ejes)
+        """
+        if tamano is not None:
+            dpi = 100
+            figura = Figure(figsize=(tamano[0] / dpi, tamano[1] / dpi), dpi=dpi)
+        else:
+            figura = Figure(figsize=TAMANO_FIGURA_RUTA, dpi=RESOLUCION_RUTA)
+        FigureCanvasAgg(figura)
+        ejes = figura.add_axes(AREA_MAPA)
+        if transparente:
+            figura.patch.set_visible(False)
+            ejes.patch.set_visible(False)
+        return figura, ejes
     
     @staticmethod
-    def visualizar_ruta(G, resultado_ruta, coords=None, filename="ruta_optima.png"):
-        """Visualiza la ruta entre dos ciudades"""
-        if isinstance(resultado_ruta, str):
-            print(resultado_ruta)
-            return None
+    def _imagen_figura(figura):
+        """Dibujar la figura y devolver sus píxeles como imagen PIL RGBA"""
+        figura.canvas.draw()
+        return Image.fromarray(np.asarray(figura.canvas.buffer_rgba()).copy())
+    
+    @staticmethod
+    def _dibujar_aristas(ejes, G, pos, ancho_minimo, escala, color, alpha):
+        """
+        Dibujar todas las aristas del grafo como una sola LineCollection.
         
-        ruta = resultado_ruta['ruta']
-        distancia_total = resultado_ruta['distancia_total']
-        algoritmo = resultado_ruta.get('algoritmo', 'No especificado')
+        El grosor de cada arista es escala * 50 / distancia (más delgado para
+        distancias mayores), nunca menor que ancho_minimo. Se ve igual que dibujar
+        las aristas una por una, pero matplotlib maneja un solo artista.
         
-        aristas_ruta = [(ruta[i], ruta[i+1]) for i in range(len(ruta)-1)]
+        Returns:
+            La LineCollection agregada a los ejes (None si no hay aristas)
+        """
+        aristas = [(pos[u], pos[v], peso) for u, v, peso in G.edges(data='weight') if u in pos and v in pos]
+        if not aristas:
+            return None
+        
+        segmentos = np.array([(p_u, p_v) for p_u, p_v, _ in aristas], dtype=np.float64)
+        pesos = np.array([peso for _, _, peso in aristas], dtype=np.float64)
+        anchos = np.maximum(ancho_minimo, escala * (1 / (pesos / 50)))
         
-        plt.figure(figsize=(16, 12))
+        coleccion = LineCollection(segmentos, colors=color, linewidths=anchos, antialiaseds=(1,), alpha=alpha)
+        coleccion.set_zorder(1)  # aristas detrás de los nodos
+        ejes.add_collection(coleccion, autolim=False)
         
-        # Posición de los nodos
+        # Mismos límites que al dibujar arista por arista con networkx, que amplía
+        # cada vez los límites de los datos un 5 % del tamaño de la arista dibujada
+        minimos, maximos = segmentos.min(axis=1), segmentos.max(axis=1)
+        margenes = 0.05 * (maximos - minimos)
+        ejes.update_datalim([(minimos - margenes).min(axis=0), (maximos + margenes).max(axis=0)])
+        ejes.autoscale_view()
+        return coleccion
+    
+    @staticmethod
+    def _posiciones(G, coords=None):
+        """Posición de cada nodo en el mapa (coordenadas geográficas o spring layout)"""
         if coords:
             # Si tenemos coordenadas geográficas, usarlas para el layout
+            # Usamos coordenadas negativas en X para longitud porque Ecuador está en el hemisferio occidental
             pos = {node: (-coords[node][1], coords[node][0]) for node in G.nodes() if node in coords}
             
             # Para nodos sin coordenadas, usar spring layout
@@ -176,36 +512,140 @@ class GeneradorGrafo:
         else:
             # Si no hay coordenadas, usar spring layout para todos
             pos = nx.spring_layout(G, seed=42, k=0.8)
+        return pos
+    
+    @staticmethod
+    def _fondo_mapa(G, coords, tamano=None):
+        """
+        Imagen de fondo de las rutas: todas las aristas y nodos del grafo en gris.
+        
+        Se dibuja una sola vez por versión del grafo y tamaño de imagen y se guarda
+        como mapa de píxeles en G.graph['fondo_mapa'] junto con las posiciones de los
+        nodos y los límites de los ejes, para dibujar encima solo la ruta. El fondo
+        se dibuja con la caché bloqueada, así dos hilos no lo dibujan a la vez.
+        """
+        clave = (G.graph.get('version'), tuple(tamano) if tamano is not None else None)
+        with _bloqueo_fondo:
+            fondos = G.graph.setdefault('fondo_mapa', {})
+            if clave in fondos:
+                return fondos[clave]
+            
+            pos = GeneradorGrafo._posiciones(G, coords)
+            figura, ejes = GeneradorGrafo._figura(tamano)
+            
+            # Dibujar grafo completo en gris claro (fondo)
+            GeneradorGrafo._dibujar_aristas(ejes, G, pos, ancho_minimo=0.2, escala=2, color='gray', alpha=0.15)
+            
+            # Dibujar nodos del grafo (fondo)
+            nx.draw_networkx_nodes(G, pos, node_size=120, node_color='lightgray', alpha=0.3, ax=ejes)
+            
+            # Límites fijos: la ruta se dibuja después con exactamente la misma escala
+            ejes.margins(0.05)
+            ejes.autoscale_view()
+            ejes.axis('off')
+            
+            fondo = {
+                'imagen': GeneradorGrafo._imagen_figura(figura),
+                'pos': pos,
+                'limites': (ejes.get_xlim(), ejes.get_ylim())
+            }
+            
+            # Solo se conservan los fondos de la versión actual del grafo
+            for anterior in [c for c in fondos if c[0] != clave[0]]:
+                del fondos[anterior]
+            fondos[clave] = fondo
+            return fondo
+    
+    @staticmethod
+    def visualizar_ruta(G, resultado_ruta, coords=None, filename="ruta_optima.png", tamano=None):
+        """
+        Visualiza la ruta entre dos ciudades y la guarda en un archivo.
         
-        # Dibujar grafo completo en gris claro (fondo)
-        for u, v, data in G.edges(data=True):
-            # No dibujar las aristas que son parte de la ruta (se dibujarán después)
-            if (u, v) not in aristas_ruta and (v, u) not in aristas_ruta:
-                width = max(0.2, 2 * (1 / (data['weight'] / 50)))
-                nx.draw_networkx_edges(G, pos, edgelist=[(u, v)], width=width, 
-                                      alpha=0.15, edge_color='gray')
-        
-        # Dibujar nodos del grafo (fondo)
-        nx.draw_networkx_nodes(G, pos, node_size=120, node_color='lightgray', alpha=0.3)
-        
-        # Resaltar las aristas de la ruta
-        for i, (u, v) in enumerate(aristas_ruta):
-            nx.draw_networkx_edges(
-                G, pos, 
-                edgelist=[(u, v)], 
-                width=4, 
-                edge_color='red',
-                arrows=True,
-                arrowsize=20,
-                arrowstyle='-|>'
-            )
+        La imagen se compone como en imagen_ruta y se recorta al contenido con el mismo
+        margen que savefig(bbox_inches='tight'): el área de los ejes (que contiene
+        todo el fondo), el título y el resumen de la ruta.
+        
+        Args:
+            tamano: Tamaño (ancho, alto) en píxeles de la figura; por defecto
+                    TAMANO_FIGURA_RUTA a RESOLUCION_RUTA
+        """
+        if isinstance(resultado_ruta, str):
+            print(resultado_ruta)
+            return None
+        
+        fondo = GeneradorGrafo._fondo_mapa(G, coords, tamano)
+        figura, ejes = GeneradorGrafo._figura(tamano, transparente=True)
+        GeneradorGrafo._dibujar_ruta(figura, ejes, G, resultado_ruta, fondo)
+        imagen = Image.alpha_composite(fondo['imagen'], GeneradorGrafo._imagen_figura(figura))
+        
+        # Caja del contenido en pulgadas (origen abajo a la izquierda), a píxeles de la imagen;
+        # como en savefig, puede salirse de la figura y ese borde queda en blanco
+        caja = figura.get_tightbbox().padded(0.1)
+        izquierda, arriba = round(caja.x0 * figura.dpi), imagen.height - round(caja.y1 * figura.dpi)
+        recorte = Image.new('RGBA', (int(caja.width * figura.dpi), int(caja.height * figura.dpi)), 'white')
+        recorte.paste(imagen, (-izquierda, -arriba))
+        recorte.save(filename)
+        print(f"Ruta guardada como {filename}")
+        return filename
+    
+    @staticmethod
+    def imagen_ruta(G, resultado_ruta, coords=None, tamano=None):
+        """
+        Dibujar la ruta entre dos ciudades en memoria, sin archivos ni codificación PNG.
+        
+        El fondo (todas las aristas y nodos) se toma de la caché de _fondo_mapa; en
+        cada llamada solo se dibujan la ruta, sus extremos y las etiquetas.
+        
+        Args:
+            tamano: Tamaño (ancho, alto) en píxeles de la imagen; por defecto
+                    TAMANO_FIGURA_RUTA a RESOLUCION_RUTA
+        
+        Returns:
+            Imagen PIL en modo RGBA, o None si resultado_ruta es un mensaje de error
+        """
+        if isinstance(resultado_ruta, str):
+            print(resultado_ruta)
+            return None
+        
+        # Fondo ya dibujado (caché); la ruta se dibuja en una figura transparente
+        # con los ejes en la misma posición y escala
+        fondo = GeneradorGrafo._fondo_mapa(G, coords, tamano)
+        figura, ejes = GeneradorGrafo._figura(tamano, transparente=True)
+        GeneradorGrafo._dibujar_ruta(figura, ejes, G, resultado_ruta, fondo)
+        
+        # Superponer la ruta al fondo
+        return Image.alpha_composite(fondo['imagen'], GeneradorGrafo._imagen_figura(figura))
+    
+    @staticmethod
+    def _dibujar_ruta(figura, ejes, G, resultado_ruta, fondo):
+        """Dibujar la ruta, sus extremos, las etiquetas y el resumen con la escala del fondo"""
+        ruta = resultado_ruta['ruta']
+        distancia_total = resultado_ruta['distancia_total']
+        algoritmo = resultado_ruta.get('algoritmo', 'No especificado')
+        
+        aristas_ruta = [(ruta[i], ruta[i+1]) for i in range(len(ruta)-1)]
+        pos = fondo['pos']
+        
+        # Resaltar las aristas de la ruta (una sola llamada; las flechas son
+        # necesariamente un parche por arista, pero la ruta tiene pocas)
+        nx.draw_networkx_edges(
+            G, pos, 
+            edgelist=aristas_ruta, 
+            width=4, 
+            edge_color='red',
+            arrows=True,
+            arrowsize=20,
+            arrowstyle='-|>',
+            ax=ejes
+        )
         
         # Resaltar nodos de la ruta
         nx.draw_networkx_nodes(
             G, pos, 
             nodelist=ruta, 
             node_size=300, 
-            node_color='lightcoral'
+            node_color='lightcoral',
+            ax=ejes
         )
         
         # Destacar origen y destino
@@ -215,7 +655,8 @@ class GeneradorGrafo:
             node_size=500, 
             node_color='gold',
             edgecolors='darkorange',
-            linewidths=2
+            linewidths=2,
+            ax=ejes
         )
         
         # Etiquetas de nodos en la ruta
@@ -225,7 +666,8 @@ class GeneradorGrafo:
             labels=label_dict,
             font_size=10, 
             font_weight='bold',
-            bbox=dict(facecolor='white', alpha=0.8, pad=0.5)
+            bbox=dict(facecolor='white', alpha=0.8, pad=0.5),
+            ax=ejes
         )
         
         # Etiquetas de aristas con distancias
@@ -235,18 +677,16 @@ class GeneradorGrafo:
             edge_labels=edge_labels, 
             font_size=9,
             font_weight='bold',
-            bbox=dict(facecolor='white', alpha=0.7, pad=0.2)
+            bbox=dict(facecolor='white', alpha=0.7, pad=0.2),
+            ax=ejes
         )
         
         # Título e información
-        plt.title(f"Ruta {algoritmo}: {ruta[0]} → {ruta[-1]}", fontsize=16, fontweight='bold')
-        plt.figtext(0.5, 0.01, f"Distancia total: {distancia_total:.1f} km\nRuta: {' → '.join(ruta)}", 
-                   ha='center', fontsize=11, bbox=dict(facecolor='lightyellow', alpha=0.9, pad=0.5))
+        ejes.set_title(f"Ruta {algoritmo}: {ruta[0]} → {ruta[-1]}", fontsize=16, fontweight='bold')
+        figura.text(0.5, 0.01, f"Distancia total: {distancia_total:.1f} km\nRuta: {' → '.join(ruta)}", 
+                    ha='center', fontsize=11, bbox=dict(facecolor='lightyellow', alpha=0.9, pad=0.5))
         
-        plt.axis('off')
-        plt.tight_layout(rect=[0, 0.05, 1, 0.95])
-        plt.savefig(filename, dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        print(f"Ruta guardada como {filename}")
-        return filename
\ No newline at end of file
+        # Misma escala que el fondo (dibujar la ruta no debe mover los ejes)
+        ejes.set_xlim(fondo['limites'][0])
+        ejes.set_ylim(fondo['limites'][1])
+        ejes.axis('off')
@@ -0,0 +1,165 @@
+import heapq
+import hashlib
+import numpy as np
+
+from heuristicas import ProveedorHeuristica
+
+
+class GrafoCompacto:
+    """
+    Representación compacta del grafo de ciudades en formato CSR.
+    
+    Los nodos se identifican con enteros 0..n-1. Los vecinos del nodo u están en
+    vecinos[offsets[u]:offsets[u+1]] y los pesos correspondientes en la misma
+    porción de pesos. Cada arista no dirigida aparece en ambas direcciones.
+    """
+    
+    def __init__(self, nombres, ids, offsets, vecinos, pesos, latitudes, longitudes):
+        """
+        Args:
+            nombres: Lista con el nombre de cada nodo (posición = id entero)
+            ids: Arreglo con el id de la base de datos de cada nodo (-1 si no tiene)
+            offsets: Arreglo de tamaño n+1 con el inicio de los vecinos de cada nodo
+            vecinos: Arreglo con los ids enteros de los vecinos
+            pesos: Arreglo con la distancia (km) de cada arista
+            latitudes: Arreglo de latitudes (NaN si el nodo no tiene coordenadas)
+            longitudes: Arreglo de longitudes (NaN si el nodo no tiene coordenadas)
+        """
+        self.nombres = list(nombres)
+        self.indice = {nombre: i for i, nombre in enumerate(self.nombres)}
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.vecinos = np.asarray(vecinos, dtype=np.int32)
+        self.pesos = np.asarray(pesos, dtype=np.float64)
+        self.coords = np.column_stack([
+            np.asarray(latitudes, dtype=np.float64),
+            np.asarray(longitudes, dtype=np.float64)
+        ])
+        # Indica si al menos un nodo tiene coordenadas (necesarias para las heurísticas)
+        self.tiene_coordenadas = bool(np.isfinite(self.coords).any())
+        self._heuristica = None
+        self._firma = None
+    
+    @property
+    def numero_nodos(self):
+        return len(self.nombres)
+    
+    @property
+    def numero_aristas(self):
+        """Número de aristas no dirigidas"""
+        return len(self.vecinos) // 2
+    
+    @property
+    def heuristica(self):
+        """Proveedor de heurísticas alineado con los ids enteros de este grafo"""
+        if self._heuristica is None:
+            self._heuristica = ProveedorHeuristica(self.nombres, self.coords[:, 0], self.coords[:, 1])
+        return self._heuristica
+    
+    @property
+    def firma(self):
+        """
+        Huella (sha256) de los nodos y aristas. Se calcula una sola vez: el grafo
+        compacto no se modifica, cada cambio del grafo construye uno nuevo.
+        """
+        if self._firma is None:
+            h = hashlib.sha256()
+            h.update('\x00'.join(str(nombre) for nombre in self.nombres).encode('utf-8'))
+            for arreglo in (self.offsets, self.vecinos, self.pesos):
+                h.update(np.ascontiguousarray(arreglo).tobytes())
+            self._firma = h.hexdigest()
+        return self._firma
+    
+    @classmethod
+    def desde_aristas(cls, nombres, ids, origenes, destinos, distancias, latitudes, longitudes):
+        """
+        Construir el grafo a partir de arreglos de aristas no dirigidas.
+        
+        Args:
+            nombres: Lista de nombres de nodos
+            ids: Ids de base de datos de los nodos
+            origenes: Arreglo con el id entero de origen de cada arista
+            destinos: Arreglo con el id entero de destino de cada arista
+            distancias: Arreglo con la distancia de cada arista
+            latitudes: Arreglo de latitudes
+            longitudes: Arreglo de longitudes
+        """
+        n = len(nombres)
+        origenes = np.asarray(origenes, dtype=np.int64)
+        destinos = np.asarray(destinos, dtype=np.int64)
+        distancias = np.asarray(distancias, dtype=np.float64)
+        
+        # Duplicar cada arista en ambas direcciones y ordenar por nodo de origen
+        fuentes = np.concatenate([origenes, destinos])
+        objetivos = np.concatenate([destinos, origenes])
+        pesos = np.concatenate([distancias, distancias])
+        
+        orden = np.argsort(fuentes, kind='stable')
+        fuentes = fuentes[orden]
+        objetivos = objetivos[orden]
+        pesos = pesos[orden]
+        
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(fuentes, minlength=n), out=offsets[1:])
+        
+        return cls(nombres, ids, offsets, objetivos, pesos, latitudes, longitudes)
+    
+    @classmethod
+    def desde_networkx(cls, G, coords=None):
+        """
+        Construir el grafo compacto a partir de un grafo NetworkX.
+        
+        Args:
+            G: Grafo NetworkX con pesos en el atributo 'weight'
+            coords: Diccionario con coordenadas de los nodos {nodo: (lat, lon)}
+        """
+        coords = coords or {}
+        nombres = list(G.nodes())
+        indice = {nombre: i for i, nombre in enumerate(nombres)}
+        
+        ids = [G.nodes[nombre].get('id', -1) for nombre in nombres]
+        latitudes = [coords[nombre][0] if nombre in coords else np.nan for nombre in nombres]
+        longitudes = [coords[nombre][1] if nombre in coords else np.nan for nombre in nombres]
+        
+        m = G.number_of_edges()
+        origenes = np.empty(m, dtype=np.int64)
+        destinos = np.empty(m, dtype=np.int64)
+        distancias = np.empty(m, dtype=np.float64)
+        for k, (u, v, peso) in enumerate(G.edges(data='weight')):
+            origenes[k] = indice[u]
+            destinos[k] = indice[v]
+            distancias[k] = peso
+        
+        return cls.desde_aristas(nombres, ids, origenes, destinos, distancias, latitudes, longitudes)
+    
+    def vecinos_de(self, u):
+        """Devolver (vecinos, pesos) del nodo u como listas de Python"""
+        inicio, fin = self.offsets[u], self.offsets[u + 1]
+        return self.vecinos[inicio:fin].tolist(), self.pesos[inicio:fin].tolist()
+    
+    def peso(self, u, v):
+        """Distancia de la arista u-v (la menor si hubiera aristas paralelas)"""
+        inicio, fin = self.offsets[u], self.offsets[u + 1]
+        coincidencias = self.pesos[inicio:fin][self.vecinos[inicio:fin] == v]
+        return float(coincidencias.min())
+    
+    def distancias_desde(self, origen):
+        """Distancias mínimas desde el nodo origen a todos los nodos (inf si no hay ruta)"""
+        infinito = float('inf')
+        distancias = [infinito] * self.numero_nodos
+        distancias[origen] = 0.0
+        frontera = [(0.0, origen)]
+        
+        while frontera:
+            dist_actual, actual = heapq.heappop(frontera)
+            if dist_actual > distancias[actual]:
+                continue
+            
+            inicio, fin = self.offsets[actual], self.offsets[actual + 1]
+            for vecino, peso in zip(self.vecinos[inicio:fin].tolist(), self.pesos[inicio:fin].tolist()):
+                nueva_dist = dist_actual + peso
+                if nueva_dist < distancias[vecino]:
+                    distancias[vecino] = nueva_dist
+                    heapq.heappush(frontera, (nueva_dist, vecino))
+        
+        return np.array(distancias)
\ No newline at end of file
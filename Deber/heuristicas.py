@@ -0,0 +1,193 @@
+import numpy as np
+from collections import OrderedDict
+
+# Semiejes del elipsoide WGS-84 en km.
+# La esfera de radio polar está contenida en el elipsoide; la distancia de círculo
+# máximo entre las proyecciones radiales (latitud geocéntrica) de dos puntos nunca
+# supera la distancia geodésica, por lo que la heurística es admisible siempre que
+# las distancias por carretera no sean menores que la geodésica.
+SEMIEJE_MAYOR_KM = 6378.137
+RADIO_TIERRA_KM = 6356.752314245
+_FACTOR_GEOCENTRICO = (RADIO_TIERRA_KM / SEMIEJE_MAYOR_KM) ** 2
+
+
+def latitud_geocentrica(latitudes):
+    """Convertir latitudes geodésicas (grados) a latitudes geocéntricas (radianes)"""
+    return np.arctan(_FACTOR_GEOCENTRICO * np.tan(np.radians(latitudes)))
+
+
+def haversine_vectorizada(latitudes, longitudes, lat_destino, lon_destino):
+    """
+    Calcula la distancia de círculo máximo (km) desde un arreglo de puntos
+    hasta un único destino usando la fórmula de haversine.
+    
+    Args:
+        latitudes: Arreglo NumPy con latitudes en grados
+        longitudes: Arreglo NumPy con longitudes en grados
+        lat_destino: Latitud del destino en grados
+        lon_destino: Longitud del destino en grados
+    """
+    lat1 = latitud_geocentrica(latitudes)
+    lon1 = np.radians(longitudes)
+    lat2 = latitud_geocentrica(lat_destino)
+    lon2 = np.radians(lon_destino)
+    
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class ProveedorHeuristica:
+    """
+    Precalcula la distancia en línea recta desde todos los nodos hasta un destino.
+    
+    La tabla de cada destino se calcula una sola vez con NumPy y se guarda en una
+    caché LRU, de modo que las consultas repetidas hacia destinos frecuentes
+    (Quito, Guayaquil) no vuelven a pagar el cálculo.
+    """
+    
+    def __init__(self, nombres, latitudes, longitudes, max_destinos=256):
+        """
+        Args:
+            nombres: Lista de nombres de nodos (define el índice de cada nodo)
+            latitudes: Arreglo de latitudes (NaN si el nodo no tiene coordenadas)
+            longitudes: Arreglo de longitudes (NaN si el nodo no tiene coordenadas)
+            max_destinos: Número máximo de destinos guardados en la caché
+        """
+        self.nombres = list(nombres)
+        self.indice = {nombre: i for i, nombre in enumerate(self.nombres)}
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+        self.max_destinos = max_destinos
+        self._cache = OrderedDict()
+        
+        # Con algún nodo sin coordenadas la línea recta deja de ser consistente
+        # (h = 0 en ese nodo y la distancia completa en sus vecinos)
+        self.coordenadas_completas = not (np.isnan(self.latitudes).any() or np.isnan(self.longitudes).any())
+    
+    @classmethod
+    def desde_coords(cls, coords, max_destinos=256):
+        """Construir el proveedor a partir de un diccionario {nodo: (lat, lon)}"""
+        nombres = list(coords.keys())
+        latitudes = np.array([coords[n][0] for n in nombres], dtype=np.float64)
+        longitudes = np.array([coords[n][1] for n in nombres], dtype=np.float64)
+        return cls(nombres, latitudes, longitudes, max_destinos)
+    
+    def _calcular(self, destino_idx):
+        """Calcular la tabla de distancias hacia el destino con índice destino_idx"""
+        # Si falta alguna coordenada se usa h = 0 en todos los nodos: A* se comporta
+        # como Dijkstra, pero la heurística sigue siendo consistente y la ruta óptima.
+        # Dar h = 0 solo a los nodos sin coordenadas permitiría h(u) > w(u, v) + h(v).
+        if not self.coordenadas_completas:
+            return np.zeros(len(self.nombres))
+        
+        return haversine_vectorizada(
+            self.latitudes, self.longitudes,
+            self.latitudes[destino_idx], self.longitudes[destino_idx]
+        )
+    
+    def arreglo(self, destino):
+        """Obtener la tabla de heurísticas (arreglo NumPy indexado por nodo) hacia el destino"""
+        destino_idx = self.indice[destino]
+        
+        if destino_idx in self._cache:
+            self._cache.move_to_end(destino_idx)
+            return self._cache[destino_idx]
+        
+        distancias = self._calcular(destino_idx)
+        self._cache[destino_idx] = distancias
+        
+        if len(self._cache) > self.max_destinos:
+            self._cache.popitem(last=False)
+        
+        return distancias
+    
+    def limpiar(self):
+        """Vaciar la caché de destinos"""
+        self._cache.clear()
+
+
+class HeuristicaALT(ProveedorHeuristica):
+    """
+    Heurística ALT (A*, landmarks y desigualdad triangular).
+    
+    Para cada landmark L se guardan las distancias exactas por carretera desde L y
+    hacia L. Por la desigualdad triangular, d(v, t) >= d(L, t) - d(L, v) y
+    d(v, t) >= d(v, L) - d(t, L). La heurística es el máximo de estas cotas y de la
+    distancia en línea recta, así que sigue siendo admisible y consistente.
+    """
+    
+    def __init__(self, nombres, latitudes, longitudes, landmarks, distancias_desde,
+                 distancias_hacia=None, max_destinos=256):
+        """
+        Args:
+            nombres: Lista de nombres de nodos (define el índice de cada nodo)
+            latitudes: Arreglo de latitudes (NaN si el nodo no tiene coordenadas)
+            longitudes: Arreglo de longitudes (NaN si el nodo no tiene coordenadas)
+            landmarks: Índices de los nodos usados como landmarks
+            distancias_desde: Matriz K×n con d(L, v) para cada landmark L
+            distancias_hacia: Matriz K×n con d(v, L); en un grafo no dirigido es la misma
+            max_destinos: Número máximo de destinos guardados en la caché
+        """
+        super().__init__(nombres, latitudes, longitudes, max_destinos)
+        self.landmarks = list(landmarks)
+        self.distancias_desde = np.asarray(distancias_desde, dtype=np.float64)
+        if distancias_hacia is None:
+            distancias_hacia = self.distancias_desde
+        self.distancias_hacia = np.asarray(distancias_hacia, dtype=np.float64)
+    
+    @classmethod
+    def desde_grafo(cls, grafo, nombres_landmarks=None, k=4, max_destinos=256):
+        """
+        Seleccionar K landmarks y precalcular sus distancias sobre un GrafoCompacto.
+        
+        Se usan primero los nodos de nombres_landmarks que existan en el grafo; si
+        faltan, se completan eligiendo el nodo más alejado de los ya seleccionados.
+        
+        Args:
+            grafo: GrafoCompacto
+            nombres_landmarks: Nombres de nodos preferidos como landmarks
+            k: Número de landmarks
+            max_destinos: Número máximo de destinos guardados en la caché
+        """
+        k = min(k, grafo.numero_nodos)
+        landmarks = []
+        for nombre in nombres_landmarks or []:
+            if nombre in grafo.indice and grafo.indice[nombre] not in landmarks and len(landmarks) < k:
+                landmarks.append(grafo.indice[nombre])
+        
+        filas = [grafo.distancias_desde(l) for l in landmarks]
+        
+        while len(landmarks) < k:
+            if filas:
+                cercania = np.min(filas, axis=0)
+            else:
+                # Sin landmarks iniciales se parte del nodo más alejado del nodo 0
+                cercania = grafo.distancias_desde(0)
+            cercania = np.where(np.isfinite(cercania), cercania, -1.0)
+            cercania[landmarks] = -1.0
+            
+            siguiente = int(np.argmax(cercania))
+            if cercania[siguiente] < 0:
+                break
+            landmarks.append(siguiente)
+            filas.append(grafo.distancias_desde(siguiente))
+        
+        distancias = np.array(filas).reshape(len(landmarks), grafo.numero_nodos)
+        return cls(grafo.nombres, grafo.coords[:, 0], grafo.coords[:, 1], landmarks, distancias,
+                   max_destinos=max_destinos)
+    
+    def _calcular(self, destino_idx):
+        """Máximo entre la distancia en línea recta y las cotas de los landmarks"""
+        linea_recta = super()._calcular(destino_idx)
+        
+        with np.errstate(invalid='ignore'):
+            cota_desde = self.distancias_desde[:, destino_idx, None] - self.distancias_desde
+            cota_hacia = self.distancias_hacia - self.distancias_hacia[:, destino_idx, None]
+            cotas = np.maximum(cota_desde, cota_hacia)
+        
+        # Landmarks que no alcanzan a alguno de los nodos no aportan cota (inf - inf, -inf)
+        cotas = np.where(np.isfinite(cotas), cotas, 0.0)
+        return np.maximum(linea_recta, cotas.max(axis=0, initial=0.0))
\ No newline at end of file
@@ -0,0 +1,325 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from almacenamiento import obtener_almacenamiento, TAMANO_LOTE
+
+# Filas de la matriz que se leen y transforman a la vez
+FILAS_POR_BLOQUE = 64
+
+# Escritores concurrentes y lotes en vuelo como máximo (limitan la memoria y la carga en la base de datos)
+ESCRITORES = 4
+MAX_PENDIENTES = 8
+
+# Reintentos de cada lote y espera inicial (segundos, se duplica en cada intento)
+REINTENTOS = 3
+ESPERA_REINTENTO = 0.5
+
+
+def _filas_excel(ruta_archivo):
+    """
+    Recorrer las filas de la primera hoja como tuplas de valores.
+
+    Los .xlsx se leen en modo de solo lectura de openpyxl, que no carga el libro
+    completo. El formato .xls (BIFF) no permite leer por partes: xlrd carga la hoja,
+    pero las filas se siguen entregando una a una.
+    """
+    if os.path.splitext(ruta_archivo)[1].lower() == '.xls':
+        import xlrd
+
+        libro = xlrd.open_workbook(ruta_archivo, on_demand=True)
+        try:
+            hoja = libro.sheet_by_index(0)
+            for i in range(hoja.nrows):
+                yield tuple(hoja.row_values(i))
+        finally:
+            libro.release_resources()
+    else:
+        import openpyxl
+
+        libro = openpyxl.load_workbook(ruta_archivo, read_only=True, data_only=True)
+        try:
+            yield from libro.worksheets[0].iter_rows(values_only=True)
+        finally:
+            libro.close()
+
+
+def _numeros(valores):
+    """Convertir una secuencia de celdas a float; las no numéricas quedan en NaN"""
+    return pd.to_numeric(pd.Series(valores, dtype=object), errors='coerce').to_numpy(dtype=np.float64)
+
+
+def leer_bloques_excel(ruta_archivo, filas_por_bloque=FILAS_POR_BLOQUE):
+    """
+    Leer la matriz de distancias del Excel por bloques de filas.
+
+    La fila de encabezados ("No.", "CIUDAD", 1, 2, ...) da el índice original de la
+    ciudad de cada columna; las filas de datos tienen el índice original, el nombre
+    y una distancia por columna. Las demás filas (título, vacías) se omiten.
+
+    Yields:
+        (indices, nombres, bloque, indices_columnas): índice original y nombre de cada
+        fila del bloque, arreglo filas×columnas de distancias e índice original de la
+        ciudad de cada columna
+    """
+    indices_columnas = None
+    indices, nombres, filas = [], [], []
+
+    for fila in _filas_excel(ruta_archivo):
+        if len(fila) < 3:
+            continue
+        if indices_columnas is None:
+            if isinstance(fila[0], str) and fila[0].strip().lower().startswith('no'):
+                indices_columnas = _numeros(fila[2:])
+            continue
+
+        indice = _numeros(fila[:1])[0]
+        if np.isnan(indice) or fila[1] is None or str(fila[1]).strip() == "":
+            continue
+
+        indices.append(int(indice))
+        nombres.append(str(fila[1]).strip())
+        filas.append(fila[2:2 + len(indices_columnas)])
+
+        if len(filas) == filas_por_bloque:
+            yield np.array(indices), nombres, _bloque(filas, len(indices_columnas)), indices_columnas
+            indices, nombres, filas = [], [], []
+
+    if filas:
+        yield np.array(indices), nombres, _bloque(filas, len(indices_columnas)), indices_columnas
+
+
+def _bloque(filas, columnas):
+    """Arreglo filas×columnas de distancias (NaN en las celdas vacías o no numéricas)"""
+    bloque = np.full((len(filas), columnas), np.nan)
+    for i, fila in enumerate(filas):
+        valores = _numeros(fila)
+        bloque[i, :len(valores)] = valores
+    return bloque
+
+
+def leer_ciudades_excel(ruta_archivo):
+    """Ciudades del Excel [{'nombre', 'indice_original'}] sin leer la matriz de distancias"""
+    ciudades = []
+    for fila in _filas_excel(ruta_archivo):
+        if len(fila) < 2 or fila[1] is None or str(fila[1]).strip() == "":
+            continue
+        indice = _numeros(fila[:1])[0]
+        if not np.isnan(indice):
+            ciudades.append({'nombre': str(fila[1]).strip(), 'indice_original': int(indice)})
+    return ciudades
+
+
+def registros_bloque(indices, bloque, indices_columnas, indice_a_id):
+    """
+    Convertir un bloque de la matriz en registros de la tabla distancias.
+
+    Se conservan las celdas con distancia positiva entre dos ciudades distintas
+    que existen en indice_a_id.
+
+    Args:
+        indices: Índice original de la ciudad de cada fila
+        bloque: Arreglo filas×columnas de distancias
+        indices_columnas: Índice original de la ciudad de cada columna
+        indice_a_id: Diccionario {indice_original: id} de las ciudades en la base de datos
+    """
+    def ids(valores):
+        return np.array([indice_a_id.get(int(v), -1) if not np.isnan(v) else -1 for v in valores], dtype=np.int64)
+
+    origenes = ids(np.asarray(indices, dtype=np.float64))
+    destinos = ids(indices_columnas)
+
+    with np.errstate(invalid='ignore'):
+        validas = bloque > 0
+    validas &= (origenes[:, None] >= 0) & (destinos[None, :] >= 0) & (origenes[:, None] != destinos[None, :])
+    filas, columnas = np.nonzero(validas)
+
+    return [
+        {'origen_id': o, 'destino_id': d, 'distancia': km}
+        for o, d, km in zip(origenes[filas].tolist(), destinos[columnas].tolist(), bloque[filas, columnas].tolist())
+    ]
+
+
+def lote_escrito(almacenamiento):
+    """
+    Función que indica si un lote de distancias ya quedó guardado.
+
+    Cada lote se inserta de forma atómica (todo o nada) y cada par origen-destino
+    aparece una sola vez en la importación, que se hace sobre la tabla vacía: si
+    el primer registro del lote está en la base de datos, el lote completo lo está.
+    """
+    def confirmar(lote):
+        return almacenamiento.existe_distancia(lote[0]['origen_id'], lote[0]['destino_id'])
+    return confirmar
+
+
+class EscritorLotes:
+    """
+    Grupo de escritores concurrentes de lotes con un límite de lotes en vuelo.
+
+    enviar() se bloquea cuando ya hay max_pendientes lotes sin terminar, de modo que
+    la lectura nunca se adelanta más de ese número de lotes a la escritura. Un
+    INSERT que falla (por ejemplo, por un tiempo de espera agotado) pudo haberse
+    guardado igual en el servidor, así que un lote solo se reintenta si confirmar()
+    indica que no llegó a escribirse; sin confirmar no se reintenta. Los reintentos
+    usan espera exponencial; si se agotan, el primer error se vuelve a lanzar en
+    enviar() o en terminar().
+    """
+
+    def __init__(self, escribir, escritores=ESCRITORES, max_pendientes=MAX_PENDIENTES,
+                 reintentos=REINTENTOS, espera_reintento=ESPERA_REINTENTO, confirmar=None):
+        """
+        Args:
+            escribir: Función que escribe un lote (lista de registros)
+            escritores: Número de hilos de escritura
+            max_pendientes: Lotes enviados y aún sin terminar como máximo
+            reintentos: Reintentos de cada lote antes de abandonar
+            espera_reintento: Espera (segundos) antes del primer reintento
+            confirmar: Función que indica si un lote que falló quedó escrito de todos modos
+        """
+        self.escribir = escribir
+        self.confirmar = confirmar
+        self.reintentos = reintentos if confirmar is not None else 0
+        self.espera_reintento = espera_reintento
+        self._ejecutor = ThreadPoolExecutor(max_workers=escritores, thread_name_prefix="escritor-lotes")
+        self._pendientes = threading.BoundedSemaphore(max_pendientes)
+        self._bloqueo = threading.Lock()
+        self._error = None
+        self.lotes = 0
+        self.registros = 0
+        self.reintentos_realizados = 0
+
+    def _escribir_lote(self, lote):
+        try:
+            for intento in range(self.reintentos + 1):
+                if self._error is not None:
+                    return
+                try:
+                    self.escribir(lote)
+                    break
+                except Exception as e:
+                    # También tras el último intento: un lote guardado no debe abortar la importación
+                    if self.confirmar is not None and self._ya_escrito(lote):
+                        print(f"Error al escribir un lote ({e}), pero el lote sí quedó guardado")
+                        break
+                    if intento == self.reintentos:
+                        with self._bloqueo:
+                            if self._error is None:
+                                self._error = e
+                        return
+                    with self._bloqueo:
+                        self.reintentos_realizados += 1
+                    print(f"Error al escribir un lote ({e}); reintento {intento + 1} de {self.reintentos}")
+                    time.sleep(self.espera_reintento * 2 ** intento)
+
+            with self._bloqueo:
+                self.lotes += 1
+                self.registros += len(lote)
+        finally:
+            self._pendientes.release()
+
+    def _ya_escrito(self, lote):
+        """Consultar si el lote quedó guardado; si la consulta también falla se asume que no"""
+        try:
+            return bool(self.confirmar(lote))
+        except Exception as e:
+            print(f"No se pudo comprobar si el lote quedó guardado ({e})")
+            return False
+
+    def enviar(self, lote):
+        """Encolar un lote para escribirlo (espera si hay demasiados en vuelo)"""
+        if self._error is not None:
+            raise self._error
+        self._pendientes.acquire()
+        self._ejecutor.submit(self._escribir_lote, lote)
+
+    def terminar(self):
+        """Esperar a que se escriban todos los lotes enviados"""
+        self._ejecutor.shutdown(wait=True)
+        if self._error is not None:
+            raise self._error
+
+
+def importar_distancias_excel(ruta_archivo, indice_a_id, escribir=None, tamano_lote=TAMANO_LOTE,
+                              filas_por_bloque=FILAS_POR_BLOQUE, escritores=ESCRITORES,
+                              max_pendientes=MAX_PENDIENTES, reintentos=REINTENTOS, intervalo_progreso=2.0,
+                              confirmar=None):
+    """
+    Importar la matriz de distancias del Excel en flujo: lectura por bloques de
+    filas, transformación de cada bloque en registros y escritura concurrente por
+    lotes. La memoria usada depende del tamaño de bloque y de lote, no del archivo.
+
+    Args:
+        ruta_archivo: Archivo Excel (.xls o .xlsx) de distancias
+        indice_a_id: Diccionario {indice_original: id} de las ciudades ya importadas
+        escribir: Función que inserta un lote de registros; por defecto
+                  insertar_distancias del almacenamiento configurado
+        confirmar: Función que indica si un lote que falló quedó guardado (necesaria
+                   para reintentar); por defecto lote_escrito del almacenamiento
+                   configurado cuando también se usa su escritura
+        tamano_lote: Registros por lote
+        filas_por_bloque: Filas de la matriz leídas a la vez
+        escritores: Hilos de escritura concurrentes
+        max_pendientes: Lotes en vuelo como máximo
+        reintentos: Reintentos de cada lote
+        intervalo_progreso: Segundos entre mensajes de progreso
+
+    Returns:
+        Diccionario con filas, registros, lotes, reintentos y segundos
+    """
+    if escribir is None:
+        almacenamiento = obtener_almacenamiento()
+        escribir = almacenamiento.insertar_distancias
+        if confirmar is None:
+            confirmar = lote_escrito(almacenamiento)
+
+    escritor = EscritorLotes(escribir, escritores, max_pendientes, reintentos, confirmar=confirmar)
+    inicio = ultimo_reporte = time.perf_counter()
+    filas = 0
+    pendiente = []
+
+    def progreso(final=False):
+        segundos = max(time.perf_counter() - inicio, 1e-9)
+        print(f"{'Importación terminada' if final else 'Progreso'}: {filas} filas leídas "
+              f"({filas / segundos:.0f} filas/s), {escritor.registros} distancias escritas "
+              f"({escritor.registros / segundos:.0f} registros/s)")
+
+    try:
+        for indices, _, bloque, indices_columnas in leer_bloques_excel(ruta_archivo, filas_por_bloque):
+            pendiente.extend(registros_bloque(indices, bloque, indices_columnas, indice_a_id))
+            filas += len(indices)
+
+            # Se envían los lotes completos y el resto (menos de un lote) se conserva
+            enviados = 0
+            while len(pendiente) - enviados >= tamano_lote:
+                escritor.enviar(pendiente[enviados:enviados + tamano_lote])
+                enviados += tamano_lote
+            del pendiente[:enviados]
+
+            if time.perf_counter() - ultimo_reporte >= intervalo_progreso:
+                progreso()
+                ultimo_reporte = time.perf_counter()
+
+        if pendiente:
+            escritor.enviar(pendiente)
+    except BaseException:
+        # Se espera a los lotes en vuelo, pero el error que se propaga es el original
+        # (de lectura o de un lote), no uno posterior de terminar()
+        try:
+            escritor.terminar()
+        except Exception as e:
+            print(f"Error al terminar la escritura de lotes: {e}")
+        raise
+
+    escritor.terminar()
+
+    progreso(final=True)
+    return {
+        'filas': filas,
+        'registros': escritor.registros,
+        'lotes': escritor.lotes,
+        'reintentos': escritor.reintentos_realizados,
+        'segundos': time.perf_counter() - inicio
+    }
@@ -0,0 +1,139 @@
+import os
+import time
+import hashlib
+import numpy as np
+
+# Versión del formato del archivo; cambiarla invalida las instantáneas anteriores
+VERSION_FORMATO = 1
+
+# Copia local de ciudades y distancias para arrancar sin esperar a la base de datos
+ARCHIVO_INSTANTANEA = "datos_grafo.npz"
+
+
+class InstantaneaDatos:
+    """
+    Copia local de las tablas ciudades y distancias en arreglos NumPy.
+
+    Permite construir el grafo al iniciar sin esperar a la base de datos (y sin
+    conexión). El archivo guarda la versión del formato y una suma de verificación
+    (sha256) de los arreglos; si alguna no coincide, la instantánea se descarta.
+    """
+
+    def __init__(self, ids, nombres, latitudes, longitudes, origenes, destinos, distancias, creada=None):
+        """
+        Args:
+            ids: Arreglo con el id de cada ciudad
+            nombres: Lista con el nombre de cada ciudad
+            latitudes: Arreglo de latitudes (NaN si la ciudad no tiene coordenadas)
+            longitudes: Arreglo de longitudes (NaN si la ciudad no tiene coordenadas)
+            origenes: Id de la ciudad de origen de cada distancia
+            destinos: Id de la ciudad de destino de cada distancia
+            distancias: Distancia (km) de cada registro
+            creada: Momento (time.time()) en que se descargaron los datos
+        """
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.nombres = list(nombres)
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+        self.origenes = np.asarray(origenes, dtype=np.int64)
+        self.destinos = np.asarray(destinos, dtype=np.int64)
+        self.distancias = np.asarray(distancias, dtype=np.float64)
+        self.creada = time.time() if creada is None else float(creada)
+        self.firma = self.calcular_firma()
+
+    @classmethod
+    def desde_filas(cls, ciudades, distancias):
+        """Construir la instantánea a partir de las filas devueltas por Supabase"""
+        def coordenada(ciudad, clave):
+            valor = ciudad.get(clave)
+            return np.nan if valor is None else valor
+
+        return cls(
+            [c['id'] for c in ciudades],
+            [c['nombre'] for c in ciudades],
+            [coordenada(c, 'latitud') for c in ciudades],
+            [coordenada(c, 'longitud') for c in ciudades],
+            [d['origen_id'] for d in distancias],
+            [d['destino_id'] for d in distancias],
+            [d['distancia'] for d in distancias]
+        )
+
+    def a_filas(self):
+        """Devolver (ciudades, distancias) con el mismo formato que las filas de Supabase"""
+        ciudades = [
+            {
+                'id': ciudad_id,
+                'nombre': nombre,
+                'latitud': None if np.isnan(lat) else lat,
+                'longitud': None if np.isnan(lon) else lon
+            }
+            for ciudad_id, nombre, lat, lon in zip(self.ids.tolist(), self.nombres,
+                                                   self.latitudes.tolist(), self.longitudes.tolist())
+        ]
+        distancias = [
+            {'origen_id': o, 'destino_id': d, 'distancia': km}
+            for o, d, km in zip(self.origenes.tolist(), self.destinos.tolist(), self.distancias.tolist())
+        ]
+        return ciudades, distancias
+
+    def calcular_firma(self):
+        """Calcular la suma de verificación (sha256) de los datos"""
+        h = hashlib.sha256()
+        h.update(str(VERSION_FORMATO).encode('utf-8'))
+        h.update('\x00'.join(self.nombres).encode('utf-8'))
+        for arreglo in (self.ids, self.latitudes, self.longitudes, self.origenes, self.destinos, self.distancias):
+            h.update(np.ascontiguousarray(arreglo).tobytes())
+        return h.hexdigest()
+
+    def guardar(self, ruta_archivo):
+        """Guardar la instantánea en disco (escritura atómica)"""
+        temporal = ruta_archivo + '.tmp'
+        with open(temporal, 'wb') as archivo:
+            np.savez_compressed(
+                archivo,
+                version=np.array(VERSION_FORMATO),
+                ids=self.ids,
+                nombres=np.array(self.nombres),
+                latitudes=self.latitudes,
+                longitudes=self.longitudes,
+                origenes=self.origenes,
+                destinos=self.destinos,
+                distancias=self.distancias,
+                creada=np.array(self.creada),
+                firma=np.array(self.firma)
+            )
+        os.replace(temporal, ruta_archivo)
+        print(f"Instantánea de datos guardada en {ruta_archivo}")
+
+    @staticmethod
+    def invalidar(ruta_archivo=ARCHIVO_INSTANTANEA):
+        """Borrar la instantánea (los datos cambiaron; el siguiente arranque descarga de la base de datos)"""
+        try:
+            os.remove(ruta_archivo)
+            print(f"Instantánea {ruta_archivo} invalidada")
+        except FileNotFoundError:
+            pass
+
+    @classmethod
+    def cargar(cls, ruta_archivo):
+        """
+        Cargar la instantánea desde disco.
+        Devuelve None si el archivo no existe, es de otra versión o está dañado.
+        """
+        if not os.path.exists(ruta_archivo):
+            return None
+
+        try:
+            with np.load(ruta_archivo) as datos:
+                if int(datos['version']) != VERSION_FORMATO:
+                    print(f"La instantánea en {ruta_archivo} es de otra versión")
+                    return None
+                instantanea = cls(datos['ids'], datos['nombres'].tolist(), datos['latitudes'], datos['longitudes'],
+                                  datos['origenes'], datos['destinos'], datos['distancias'], datos['creada'])
+                if instantanea.firma != str(datos['firma']):
+                    print(f"La instantánea en {ruta_archivo} está dañada (la suma de verificación no coincide)")
+                    return None
+                return instantanea
+        except Exception as e:
+            print(f"Error al cargar la instantánea de datos: {e}")
+            return None
@@ -1,19 +1,24 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
+from tkinter import ttk, messagebox, simpledialog, filedialog
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import os
 import networkx as nx
 from PIL import Image, ImageTk
 import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # Importar nuestros módulos
 from ciudades_crud import CiudadesCRUD
 from generador_grafo import GeneradorGrafo
 from algoritmos_busqueda import AlgoritmosBusqueda
 from nueva_ciudad_conexiones import DialogoSeleccionConexiones
+from cache_rutas import CacheRutas, version_grafo
 
 
+# Hilos de trabajo para búsquedas, consultas y dibujo (los cambios del grafo usan un hilo aparte)
+TRABAJADORES_INTERFAZ = 4
+
 class RutasCiudadesApp:
     """Aplicación para encontrar rutas entre ciudades ecuatorianas"""
     
@@ -22,11 +27,34 @@ class RutasCiudadesApp:
         self.root.title("Sistema de Rutas - Ciudades de Ecuador")
         self.root.geometry("1200x800")
         
-        # Variables para el grafo
+        # Variables para el grafo. El hilo del grafo nunca modifica el grafo publicado:
+        # aplica los cambios sobre una copia y la publica con _publicar_grafo, así los
+        # hilos de búsqueda y dibujo pueden seguir usando el que tomaron con _grafo_actual
         self.G = None
         self.coords = None
         self.nombre_a_id = None
         self.ciudades = []
+        self._bloqueo_grafo = threading.Lock()
+        
+        # Caché de rutas ya calculadas por origen, destino, algoritmo y versión del grafo
+        self.cache_rutas = CacheRutas(max_rutas=128)
+        
+        # Tamaño actual del canvas: las imágenes de rutas se dibujan directamente a este tamaño
+        self.tamano_canvas = None
+        
+        # Lo que muestra el canvas (para exportarlo a un archivo): nombre de archivo sugerido y ruta (None = grafo)
+        self.vista_actual = None
+        
+        # Tareas en segundo plano: un grupo acotado de hilos para búsquedas, consultas y
+        # dibujo, y un único hilo que carga y modifica el grafo de uno en uno y en orden
+        self._ejecutor = ThreadPoolExecutor(max_workers=TRABAJADORES_INTERFAZ, thread_name_prefix="interfaz")
+        self._ejecutor_grafo = ThreadPoolExecutor(max_workers=1, thread_name_prefix="grafo")
+        
+        # Token de la última solicitud de cada acción y su tarea (para descartar las obsoletas)
+        self._tokens = {}
+        self._tareas = {}
+        self._bloqueo_tokens = threading.Lock()
+        self._recarga_pendiente = None  # (tarea, usar_instantanea) de la última recarga encolada
         
         # Variables para la interfaz
         self.ciudad_origen_var = tk.StringVar()
@@ -36,9 +64,98 @@ class RutasCiudadesApp:
         # Crear interfaz
         self.crear_interfaz()
         
-        # Cargar datos iniciales (en un hilo separado para no bloquear la interfaz)
+        # Descartar las tareas pendientes al cerrar la ventana
+        self.root.protocol("WM_DELETE_WINDOW", self.cerrar)
+        
+        # Cargar datos iniciales (en el hilo del grafo para no bloquear la interfaz)
         self.mostrar_mensaje_estado("Cargando datos...")
-        threading.Thread(target=self.cargar_datos_iniciales).start()
+        self._enviar_grafo(self.cargar_datos_iniciales)
+    
+    def _nuevo_token(self, accion):
+        """Registrar una nueva solicitud de la acción; las anteriores quedan obsoletas"""
+        with self._bloqueo_tokens:
+            self._tokens[accion] = self._tokens.get(accion, 0) + 1
+            return self._tokens[accion]
+    
+    def _vigente(self, accion, token):
+        """Indicar si token sigue siendo la última solicitud de la acción"""
+        with self._bloqueo_tokens:
+            return self._tokens.get(accion) == token
+    
+    def _enviar(self, funcion, *args, accion=None):
+        """
+        Ejecutar funcion(*args) en el grupo de hilos de la interfaz.
+        
+        Con una acción, la tarea recibe además su token como último argumento y la
+        tarea anterior de la misma acción se cancela si todavía no empezó; si ya
+        empezó, debe comprobar _vigente() y descartar su resultado.
+        """
+        if accion is None:
+            return self._ejecutor.submit(funcion, *args)
+        
+        token = self._nuevo_token(accion)
+        anterior = self._tareas.get(accion)
+        if anterior is not None:
+            anterior.cancel()
+        self._tareas[accion] = self._ejecutor.submit(funcion, *args, token)
+        return self._tareas[accion]
+    
+    def _enviar_grafo(self, funcion, *args):
+        """Ejecutar funcion(*args) en el hilo del grafo (cargas y cambios del grafo, en orden)"""
+        return self._ejecutor_grafo.submit(funcion, *args)
+    
+    def _solicitar_recarga(self, usar_instantanea=False):
+        """
+        Encolar una recarga del grafo. Si ya hay una recarga en cola que no ha
+        empezado y lee datos al menos igual de recientes, no se encola otra.
+        
+        Una recarga desde la base de datos cubre a una desde la instantánea, pero no
+        al revés: si se pide leer la base de datos y en cola solo hay una recarga
+        desde la instantánea, esa se cancela y se encola la de la base de datos.
+        """
+        with self._bloqueo_tokens:
+            if self._recarga_pendiente is not None:
+                pendiente, instantanea_pendiente = self._recarga_pendiente
+                if not pendiente.running() and not pendiente.done():
+                    if usar_instantanea or not instantanea_pendiente:
+                        return False
+                    pendiente.cancel()
+            try:
+                tarea = self._enviar_grafo(self._ejecutar_recargar_grafo, usar_instantanea)
+            except RuntimeError:
+                # La ventana se cerró: ya no se aceptan tareas
+                return False
+            self._recarga_pendiente = (tarea, usar_instantanea)
+            return True
+    
+    def _grafo_actual(self):
+        """Grafo publicado (G, coords, nombre_a_id), tomado de una sola vez y coherente entre sí"""
+        with self._bloqueo_grafo:
+            return self.G, self.coords, self.nombre_a_id
+    
+    def _publicar_grafo(self, G, coords, nombre_a_id):
+        """Reemplazar el grafo publicado (solo desde el hilo del grafo)"""
+        ciudades = sorted(G.nodes()) if G else []
+        with self._bloqueo_grafo:
+            self.G, self.coords, self.nombre_a_id = G, coords, nombre_a_id
+            self.ciudades = ciudades
+    
+    def _en_interfaz(self, funcion, accion=None, token=None):
+        """
+        Ejecutar funcion en el hilo de Tk. Si se indica el token de una solicitud y
+        para entonces ya es obsoleta, no se ejecuta (un resultado viejo no reemplaza
+        a uno más nuevo).
+        """
+        def ejecutar():
+            if token is None or self._vigente(accion, token):
+                funcion()
+        self.root.after(0, ejecutar)
+    
+    def cerrar(self):
+        """Cerrar la ventana descartando las tareas en cola (las que están en curso terminan solas)"""
+        self._ejecutor.shutdown(wait=False, cancel_futures=True)
+        self._ejecutor_grafo.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
     
     def crear_interfaz(self):
         """Crear la interfaz gráfica"""
@@ -91,7 +208,8 @@ class RutasCiudadesApp:
         
         # Algoritmo
         ttk.Label(marco_busqueda, text="Algoritmo:").pack(anchor=tk.W, padx=5, pady=2)
-        algoritmos = ["Dijkstra", "Búsqueda Voraz", "A* (A estrella)", "Comparar todos"]
+        algoritmos = ["Dijkstra", "Dijkstra Bidireccional", "Búsqueda Voraz", "A* (A estrella)",
+                      "A* Bidireccional", "Comparar todos"]
         self.combo_algoritmo = ttk.Combobox(marco_busqueda, textvariable=self.algoritmo_var, values=algoritmos, state="readonly")
         self.combo_algoritmo.pack(fill=tk.X, padx=5, pady=2)
         self.combo_algoritmo.current(0)  # Seleccionar primer elemento
@@ -110,6 +228,7 @@ class RutasCiudadesApp:
         ttk.Button(marco_gestion, text="Editar Ciudad", command=self.editar_ciudad).pack(fill=tk.X, padx=5, pady=2)
         ttk.Button(marco_gestion, text="Eliminar Ciudad", command=self.eliminar_ciudad).pack(fill=tk.X, padx=5, pady=2)
         ttk.Button(marco_gestion, text="Ver Todas las Ciudades", command=self.ver_ciudades).pack(fill=tk.X, padx=5, pady=2)
+        ttk.Button(marco_gestion, text="Recargar Grafo", command=self.recargar_grafo).pack(fill=tk.X, padx=5, pady=2)
     
     def crear_botones_conexiones(self):
         """Crear botones para gestionar conexiones entre ciudades"""
@@ -147,10 +266,9 @@ class RutasCiudadesApp:
         if distancia is None:
             return
         
-        # Ejecutar en un hilo
+        # Ejecutar en el hilo del grafo
         self.mostrar_mensaje_estado(f"Agregando conexión entre {ciudad1} y {ciudad2}...")
-        threading.Thread(target=self._ejecutar_agregar_conexion, 
-                    args=(ciudad1, ciudad2, distancia)).start()
+        self._enviar_grafo(self._ejecutar_agregar_conexion, ciudad1, ciudad2, distancia)
 
     def _ejecutar_agregar_conexion(self, ciudad1, ciudad2, distancia):
         """Agregar una conexión en la base de datos"""
@@ -165,12 +283,11 @@ class RutasCiudadesApp:
                 self.root.after(0, lambda: messagebox.showerror("Error", resultado["error"]))
                 return
             
-            # Recargar el grafo
-            self.G, self.coords, self.nombre_a_id = GeneradorGrafo.crear_grafo()
+            # Actualizar el grafo en memoria con la nueva conexión
+            self._aplicar_cambio_grafo(lambda G, coords, nombre_a_id: GeneradorGrafo.agregar_conexion(G, coords, nombre_a_id, resultado))
             
             # Actualizar visualización
-            imagen_grafo = GeneradorGrafo.visualizar_grafo(self.G, self.coords, "grafo_actualizado.png")
-            self.root.after(0, lambda: self.mostrar_imagen(imagen_grafo))
+            self._mostrar_grafo()
             
             self.mostrar_mensaje_estado(f"Conexión entre {ciudad1} y {ciudad2} agregada correctamente")
             self.root.after(0, lambda: messagebox.showinfo("Éxito", f"Conexión entre {ciudad1} y {ciudad2} agregada correctamente"))
@@ -184,29 +301,15 @@ class RutasCiudadesApp:
         """Ver todas las conexiones entre ciudades"""
         # Obtener todas las conexiones
         self.mostrar_mensaje_estado("Cargando conexiones...")
-        threading.Thread(target=self._cargar_conexiones).start()
+        self._enviar(self._cargar_conexiones)
 
     def _cargar_conexiones(self):
         """Cargar y mostrar las conexiones en un hilo separado"""
         try:
-            # Obtener todas las ciudades para mapear IDs a nombres
-            ciudades = CiudadesCRUD.listar_ciudades()
-            id_a_nombre = {ciudad['id']: ciudad['nombre'] for ciudad in ciudades}
-            
-            # Obtener todas las distancias
-            distancias = []
-            
-            # Acumular las distancias de cada ciudad
-            for ciudad in ciudades:
-                ciudad_distancias = CiudadesCRUD.listar_distancias(ciudad['id'])
-                for d in ciudad_distancias:
-                    # Solo agregar una dirección para evitar duplicados
-                    if ciudad['id'] < d['destino_id']:
-                        distancias.append({
-                            'ciudad1': ciudad['nombre'],
-                            'ciudad2': d['nombre'],
-                            'distancia': d['distancia']
-                        })
+            # Todas las conexiones de una vez: del grafo en memoria si está cargado,
+            # o con una sola consulta a la base de datos
+            G = self._grafo_actual()[0]
+            distancias = CiudadesCRUD.listar_conexiones(G if G else None)
             
             # Mostrar en la interfaz
             self.root.after(0, lambda: self._mostrar_conexiones(distancias))
@@ -290,38 +393,107 @@ class RutasCiudadesApp:
         self.marco_visualizacion = ttk.LabelFrame(self.panel_derecho, text="Visualización")
         self.marco_visualizacion.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
+        # Exportar la imagen actual a un archivo (el canvas se dibuja en memoria)
+        ttk.Button(self.marco_visualizacion, text="Exportar Imagen", 
+                   command=self.exportar_imagen).pack(side=tk.BOTTOM, anchor=tk.E, padx=5, pady=5)
+        
         # Canvas para mostrar la imagen
         self.canvas = tk.Canvas(self.marco_visualizacion, bg='white')
         self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.canvas.bind("<Configure>", self._canvas_redimensionado)
+    
+    def _canvas_redimensionado(self, evento):
+        """Guardar el tamaño del canvas (los hilos de búsqueda no deben consultar Tk)"""
+        if evento.width > 1 and evento.height > 1:
+            self.tamano_canvas = (evento.width, evento.height)
     
     def cargar_datos_iniciales(self):
         """Cargar los datos iniciales del grafo y las ciudades"""
         try:
-            # Generar el grafo
-            self.G, self.coords, self.nombre_a_id = GeneradorGrafo.crear_grafo()
+            # Generar el grafo (desde la instantánea local si existe; se actualiza en segundo plano)
+            G, coords, nombre_a_id = GeneradorGrafo.crear_grafo(al_refrescar=self._datos_actualizados)
             
-            if not self.G:
+            if not G:
                 self.mostrar_mensaje_estado("Error al cargar el grafo")
-                messagebox.showerror("Error", "No se pudo cargar el grafo de ciudades")
+                self.root.after(0, lambda: messagebox.showerror("Error", "No se pudo cargar el grafo de ciudades"))
                 return
             
-            # Obtener lista de ciudades para los combos
-            self.ciudades = sorted(list(self.G.nodes()))
+            # Publicar el grafo (con la lista de ciudades para los combos)
+            self._publicar_grafo(G, coords, nombre_a_id)
             
             # Actualizar combos
             self.root.after(0, self.actualizar_combos_ciudades)
             
             # Visualizar grafo inicial
             self.mostrar_mensaje_estado("Generando visualización inicial...")
-            imagen_grafo = GeneradorGrafo.visualizar_grafo(self.G, self.coords, "grafo_inicial.png")
-            
-            # Mostrar la imagen en la interfaz
-            self.root.after(0, lambda: self.mostrar_imagen(imagen_grafo))
+            self._mostrar_grafo("grafo_inicial.png")
             
             self.mostrar_mensaje_estado("Datos cargados correctamente")
         except Exception as e:
+            error_msg = f"Error al cargar datos: {str(e)}"
             self.mostrar_mensaje_estado(f"Error: {str(e)}")
-            messagebox.showerror("Error", f"Error al cargar datos: {str(e)}")
+            self.root.after(0, lambda: messagebox.showerror("Error", error_msg))
+    
+    def _aplicar_cambio_grafo(self, aplicar):
+        """
+        Aplicar al grafo en memoria el cambio que acaba de hacerse en la base de datos.
+        
+        El cambio se aplica sobre una copia que luego se publica; el grafo anterior no
+        se modifica, porque otros hilos pueden estar recorriéndolo o dibujándolo.
+        
+        Si el grafo no está cargado, o su versión no es la inmediatamente anterior a la
+        actual (hubo otros cambios que no se aplicaron), se recarga completo desde la
+        base de datos.
+        
+        Args:
+            aplicar: Función aplicar(G, coords, nombre_a_id) que modifica el grafo
+        """
+        G, coords, nombre_a_id = self._grafo_actual()
+        if G and G.graph.get('version') == version_grafo() - 1:
+            try:
+                G, coords, nombre_a_id = G.copy(), dict(coords), dict(nombre_a_id)
+                aplicar(G, coords, nombre_a_id)
+                self._publicar_grafo(G, coords, nombre_a_id)
+                return
+            except Exception as e:
+                print(f"No se pudo actualizar el grafo en memoria, se recargará: {e}")
+        
+        self._publicar_grafo(*GeneradorGrafo.crear_grafo(usar_instantanea=False))
+    
+    def recargar_grafo(self):
+        """Recargar el grafo completo desde la base de datos"""
+        if self._solicitar_recarga():
+            self.mostrar_mensaje_estado("Recargando grafo desde la base de datos...")
+    
+    def _datos_actualizados(self):
+        """La instantánea local se actualizó en segundo plano: reconstruir el grafo con ella"""
+        self.mostrar_mensaje_estado("Se encontraron datos nuevos, actualizando el grafo...")
+        self._solicitar_recarga(usar_instantanea=True)
+    
+    def _ejecutar_recargar_grafo(self, usar_instantanea=False):
+        """Recargar el grafo en un hilo separado"""
+        try:
+            G, coords, nombre_a_id = GeneradorGrafo.crear_grafo(usar_instantanea=usar_instantanea,
+                                                                refrescar_instantanea=False)
+            
+            if not G:
+                self.mostrar_mensaje_estado("Error al recargar el grafo")
+                self.root.after(0, lambda: messagebox.showerror("Error", "No se pudo cargar el grafo de ciudades"))
+                return
+            
+            # Publicar el grafo y actualizar la lista de ciudades
+            self._publicar_grafo(G, coords, nombre_a_id)
+            self.root.after(0, self.actualizar_combos_ciudades)
+            
+            # Actualizar visualización
+            self._mostrar_grafo()
+            
+            self.mostrar_mensaje_estado("Grafo recargado correctamente")
+            
+        except Exception as e:
+            error_msg = f"Error al recargar el grafo: {str(e)}"
+            self.mostrar_mensaje_estado(error_msg)
+            self.root.after(0, lambda: messagebox.showerror("Error", error_msg))
     
     def actualizar_combos_ciudades(self):
         """Actualizar los combos de selección de ciudades"""
@@ -336,36 +508,53 @@ class RutasCiudadesApp:
             else:
                 self.combo_destino.current(0)
     
-    def mostrar_imagen(self, ruta_imagen):
-        """Mostrar una imagen en el canvas"""
+    def _tamano_imagen(self):
+        """Tamaño (ancho, alto) en píxeles al que se dibujan las imágenes del canvas"""
+        # El canvas aún no ha sido configurado, usar tamaños predeterminados
+        return self.tamano_canvas or (800, 600)
+    
+    def _mostrar_grafo(self, nombre_archivo="grafo_actualizado.png"):
+        """
+        Dibujar el grafo completo en memoria al tamaño del canvas y mostrarlo.
+        El grafo acaba de cambiar, así que esta vista reemplaza a las búsquedas en curso.
+        """
+        token = self._nuevo_token('vista')
+        G, coords, _ = self._grafo_actual()
+        imagen = GeneradorGrafo.imagen_grafo(G, coords, self._tamano_imagen())
+        self._en_interfaz(lambda: self._mostrar_vista(imagen, nombre_archivo, None, G, coords), 'vista', token)
+    
+    def _mostrar_ruta(self, G, coords, resultado, nombre_archivo, token=None):
+        """
+        Dibujar la ruta en memoria al tamaño del canvas y mostrarla (si la búsqueda sigue vigente).
+        Se dibuja sobre el grafo en el que se buscó, aunque mientras tanto se haya publicado otro.
+        """
+        if token is not None and not self._vigente('vista', token):
+            return
+        imagen = GeneradorGrafo.imagen_ruta(G, resultado, coords, self._tamano_imagen())
+        self._en_interfaz(lambda: self._mostrar_vista(imagen, nombre_archivo, resultado, G, coords), 'vista', token)
+    
+    def _mostrar_vista(self, imagen, nombre_archivo, resultado, G, coords):
+        """Mostrar la imagen y recordar qué representa y con qué grafo se dibujó (para exportarla)"""
+        self.vista_actual = {'archivo': nombre_archivo, 'resultado': resultado, 'G': G, 'coords': coords}
+        self.mostrar_imagen(imagen)
+    
+    def mostrar_imagen(self, imagen):
+        """Mostrar una imagen PIL en el canvas"""
         try:
             # Limpiar canvas
             self.canvas.delete("all")
             
-            # Cargar imagen
-            imagen = Image.open(ruta_imagen)
-            
-            # Redimensionar para ajustar al canvas
-            canvas_width = self.canvas.winfo_width()
-            canvas_height = self.canvas.winfo_height()
+            canvas_width, canvas_height = self._tamano_imagen()
             
-            # Asegurar que el canvas tiene un tamaño válido
-            if canvas_width <= 1 or canvas_height <= 1:
-                # El canvas aún no ha sido configurado, usar tamaños predeterminados
-                canvas_width = 800
-                canvas_height = 600
-            
-            # Calcular proporciones para el redimensionamiento
+            # La imagen ya viene al tamaño del canvas; solo se reduce si el canvas
+            # cambió de tamaño mientras se dibujaba
             img_width, img_height = imagen.size
-            ratio = min(canvas_width/img_width, canvas_height/img_height)
-            new_width = int(img_width * ratio)
-            new_height = int(img_height * ratio)
-            
-            # Redimensionar imagen
-            imagen_redimensionada = imagen.resize((new_width, new_height), Image.LANCZOS)
+            if img_width > canvas_width or img_height > canvas_height:
+                ratio = min(canvas_width/img_width, canvas_height/img_height)
+                imagen = imagen.resize((int(img_width * ratio), int(img_height * ratio)), Image.LANCZOS)
             
             # Convertir a formato compatible con tkinter
-            self.tk_imagen = ImageTk.PhotoImage(imagen_redimensionada)
+            self.tk_imagen = ImageTk.PhotoImage(imagen)
             
             # Mostrar en el canvas
             self.canvas.create_image(canvas_width//2, canvas_height//2, image=self.tk_imagen, anchor=tk.CENTER)
@@ -373,6 +562,34 @@ class RutasCiudadesApp:
         except Exception as e:
             messagebox.showerror("Error", f"Error al mostrar la imagen: {str(e)}")
     
+    def exportar_imagen(self):
+        """Guardar la imagen actual (grafo o ruta) en un archivo PNG a 300 dpi"""
+        vista = self.vista_actual
+        if vista is None:
+            messagebox.showwarning("Advertencia", "No hay ninguna imagen para exportar")
+            return
+        
+        archivo = filedialog.asksaveasfilename(title="Exportar Imagen", initialfile=vista['archivo'],
+                                               defaultextension=".png", filetypes=[("Imagen PNG", "*.png")])
+        if not archivo:
+            return
+        
+        self.mostrar_mensaje_estado(f"Exportando imagen a {archivo}...")
+        self._enviar(self._ejecutar_exportar_imagen, vista, archivo)
+    
+    def _ejecutar_exportar_imagen(self, vista, archivo):
+        """Dibujar la imagen a resolución completa y guardarla en un hilo separado"""
+        try:
+            if vista['resultado'] is None:
+                GeneradorGrafo.visualizar_grafo(vista['G'], vista['coords'], archivo)
+            else:
+                GeneradorGrafo.visualizar_ruta(vista['G'], vista['resultado'], vista['coords'], archivo)
+            self.mostrar_mensaje_estado(f"Imagen exportada a {archivo}")
+        except Exception as e:
+            error_msg = f"Error al exportar la imagen: {str(e)}"
+            self.mostrar_mensaje_estado(error_msg)
+            self.root.after(0, lambda: messagebox.showerror("Error", error_msg))
+    
     def buscar_ruta(self):
         """Buscar ruta entre las ciudades seleccionadas"""
         origen = self.ciudad_origen_var.get()
@@ -389,21 +606,48 @@ class RutasCiudadesApp:
         
         self.mostrar_mensaje_estado(f"Buscando ruta de {origen} a {destino} usando {algoritmo}...")
         
-        # Ejecutar en un hilo para no bloquear la interfaz
-        threading.Thread(target=self._ejecutar_busqueda, args=(origen, destino, algoritmo)).start()
+        # Ejecutar en el grupo de hilos para no bloquear la interfaz; una búsqueda nueva
+        # deja obsoletas las anteriores (se cancelan o se descarta su resultado)
+        self._enviar(self._ejecutar_busqueda, origen, destino, algoritmo, accion='vista')
     
-    def _ejecutar_busqueda(self, origen, destino, algoritmo):
-        """Ejecutar la búsqueda de ruta en un hilo separado"""
+    def _ejecutar_busqueda(self, origen, destino, algoritmo, token=None):
+        """
+        Ejecutar la búsqueda de ruta en un hilo separado.
+        
+        Si mientras tanto se pidió otra búsqueda (el token ya no está vigente), el
+        resultado se descarta sin mostrarlo.
+        """
         try:
+            # Reutilizar la ruta si ya se calculó con la versión actual del grafo (la
+            # imagen se vuelve a dibujar sobre el fondo en caché, al tamaño actual del canvas)
+            # La clave usa la versión del grafo que se va a recorrer (no la versión global,
+            # que aumenta en cuanto termina la escritura en la base de datos y antes de
+            # que el hilo del grafo aplique el cambio)
+            G, coords, _ = self._grafo_actual()
+            clave = CacheRutas.clave(origen, destino, algoritmo, G.graph.get('version'))
+            guardado = self.cache_rutas.obtener(clave)
+            if guardado is not None:
+                if guardado['comparacion'] is not None:
+                    self._mostrar_comparacion_resultados(guardado['comparacion'], token)
+                self._mostrar_resultado_ruta(guardado['resultado'], token)
+                self._mostrar_ruta(G, coords, guardado['resultado'], guardado['archivo'], token)
+                self.mostrar_mensaje_estado(f"Ruta encontrada (desde caché; {self.cache_rutas.resumen()})")
+                return
+            
             resultado = None
+            resultados = None
             
             # Ejecutar el algoritmo seleccionado
             if algoritmo == "Dijkstra":
-                resultado = AlgoritmosBusqueda.dijkstra(self.G, origen, destino)
+                resultado = AlgoritmosBusqueda.dijkstra(G, origen, destino)
                 nombre_archivo = f"ruta_dijkstra_{origen.replace(' ','_')}_a_{destino.replace(' ','_')}.png"
                 
+            elif algoritmo == "Dijkstra Bidireccional":
+                resultado = AlgoritmosBusqueda.dijkstra_bidireccional(G, origen, destino)
+                nombre_archivo = f"ruta_dijkstra_bid_{origen.replace(' ','_')}_a_{destino.replace(' ','_')}.png"
+                
             elif algoritmo == "Búsqueda Voraz":
-                if not self.coords or origen not in self.coords or destino not in self.coords:
+                if not coords or origen not in coords or destino not in coords:
                     self.root.after(0, lambda: messagebox.showerror(
                         "Error", 
                         "El algoritmo Voraz requiere coordenadas para todas las ciudades en la ruta"
@@ -411,11 +655,11 @@ class RutasCiudadesApp:
                     self.mostrar_mensaje_estado("Error: Faltan coordenadas para las ciudades")
                     return
                 
-                resultado = AlgoritmosBusqueda.busqueda_voraz(self.G, origen, destino, self.coords)
+                resultado = AlgoritmosBusqueda.busqueda_voraz(G, origen, destino, coords)
                 nombre_archivo = f"ruta_voraz_{origen.replace(' ','_')}_a_{destino.replace(' ','_')}.png"
                 
             elif algoritmo == "A* (A estrella)":
-                if not self.coords or origen not in self.coords or destino not in self.coords:
+                if not coords or origen not in coords or destino not in coords:
                     self.root.after(0, lambda: messagebox.showerror(
                         "Error", 
                         "El algoritmo A* requiere coordenadas para todas las ciudades en la ruta"
@@ -423,11 +667,23 @@ class RutasCiudadesApp:
                     self.mostrar_mensaje_estado("Error: Faltan coordenadas para las ciudades")
                     return
                 
-                resultado = AlgoritmosBusqueda.a_estrella(self.G, origen, destino, self.coords)
+                resultado = AlgoritmosBusqueda.a_estrella(G, origen, destino, coords)
                 nombre_archivo = f"ruta_a_estrella_{origen.replace(' ','_')}_a_{destino.replace(' ','_')}.png"
                 
+            elif algoritmo == "A* Bidireccional":
+                if not coords or origen not in coords or destino not in coords:
+                    self.root.after(0, lambda: messagebox.showerror(
+                        "Error", 
+                        "El algoritmo A* Bidireccional requiere coordenadas para todas las ciudades en la ruta"
+                    ))
+                    self.mostrar_mensaje_estado("Error: Faltan coordenadas para las ciudades")
+                    return
+                
+                resultado = AlgoritmosBusqueda.a_estrella_bidireccional(G, origen, destino, coords)
+                nombre_archivo = f"ruta_a_estrella_bid_{origen.replace(' ','_')}_a_{destino.replace(' ','_')}.png"
+                
             elif algoritmo == "Comparar todos":
-                if not self.coords or origen not in self.coords or destino not in self.coords:
+                if not coords or origen not in coords or destino not in coords:
                     self.root.after(0, lambda: messagebox.showerror(
                         "Error", 
                         "La comparación requiere coordenadas para todas las ciudades en la ruta"
@@ -435,39 +691,50 @@ class RutasCiudadesApp:
                     self.mostrar_mensaje_estado("Error: Faltan coordenadas para las ciudades")
                     return
                 
-                resultados = AlgoritmosBusqueda.comparar_algoritmos(self.G, origen, destino, self.coords)
+                resultados = AlgoritmosBusqueda.comparar_algoritmos(G, origen, destino, coords,
+                                                                     instrumentar=True)
                 
                 # Mostrar resultados de la comparación
-                self._mostrar_comparacion_resultados(resultados)
+                self._mostrar_comparacion_resultados(resultados, token)
                 
                 # Visualizar la ruta de Dijkstra (como referencia)
                 resultado = resultados['Dijkstra']
                 nombre_archivo = f"ruta_comparacion_{origen.replace(' ','_')}_a_{destino.replace(' ','_')}.png"
             
+            # Descartar el resultado si ya se pidió otra búsqueda (se guarda igual en la caché)
+            vigente = token is None or self._vigente('vista', token)
+            
             # Verificar si se encontró una ruta
             if isinstance(resultado, str):
+                if not vigente:
+                    return
                 # Es un mensaje de error
                 self.root.after(0, lambda: messagebox.showinfo("Resultado", resultado))
                 self.mostrar_mensaje_estado(resultado)
                 return
             
-            # Visualizar la ruta
-            imagen_ruta = GeneradorGrafo.visualizar_ruta(self.G, resultado, self.coords, nombre_archivo)
+            self.cache_rutas.guardar(clave, {
+                'resultado': resultado,
+                'comparacion': resultados,
+                'archivo': nombre_archivo
+            })
+            if not vigente:
+                return
             
             # Mostrar resultados en el área de texto
-            self._mostrar_resultado_ruta(resultado)
+            self._mostrar_resultado_ruta(resultado, token)
             
-            # Mostrar la imagen en la interfaz
-            self.root.after(0, lambda: self.mostrar_imagen(imagen_ruta))
+            # Visualizar la ruta en el canvas
+            self._mostrar_ruta(G, coords, resultado, nombre_archivo, token)
             
-            self.mostrar_mensaje_estado("Ruta encontrada")
+            self.mostrar_mensaje_estado(f"Ruta encontrada ({self.cache_rutas.resumen()})")
             
         except Exception as e:
             error_msg = f"Error en la búsqueda: {str(e)}"
             self.mostrar_mensaje_estado(error_msg)
             self.root.after(0, lambda: messagebox.showerror("Error", error_msg))
     
-    def _mostrar_resultado_ruta(self, resultado):
+    def _mostrar_resultado_ruta(self, resultado, token=None):
         """Mostrar el resultado de la ruta en el área de texto"""
         if isinstance(resultado, str):
             texto = resultado
@@ -476,16 +743,17 @@ class RutasCiudadesApp:
             texto += f"Origen: {resultado['ruta'][0]}\n"
             texto += f"Destino: {resultado['ruta'][-1]}\n"
             texto += f"Distancia total: {resultado['distancia_total']:.2f} km\n"
-            texto += f"Ciudades: {len(resultado['ruta'])}\n\n"
+            texto += f"Ciudades: {len(resultado['ruta'])}\n"
+            texto += f"Nodos expandidos: {resultado['nodos_expandidos']}\n\n"
             
             texto += "Tramos:\n"
             for origen, destino, distancia in resultado['tramos']:
                 texto += f"  • {origen} → {destino}: {distancia:.2f} km\n"
         
-        # Actualizar texto en la interfaz
-        self.root.after(0, lambda: self._actualizar_texto_resultados(texto))
+        # Actualizar texto en la interfaz (salvo que la búsqueda ya sea obsoleta)
+        self._en_interfaz(lambda: self._actualizar_texto_resultados(texto), 'vista', token)
     
-    def _mostrar_comparacion_resultados(self, resultados):
+    def _mostrar_comparacion_resultados(self, resultados, token=None):
         """Mostrar la comparación de los diferentes algoritmos"""
         texto = "COMPARACIÓN DE ALGORITMOS\n"
         texto += "========================\n\n"
@@ -497,10 +765,21 @@ class RutasCiudadesApp:
                 texto += f"{nombre}:\n"
                 texto += f"  • Distancia: {resultado['distancia_total']:.2f} km\n"
                 texto += f"  • Ciudades: {len(resultado['ruta'])}\n"
+                texto += f"  • Nodos expandidos: {resultado['nodos_expandidos']}\n"
+                
+                estadisticas = resultado.get('estadisticas')
+                if estadisticas:
+                    texto += (f"  • Frontera: {estadisticas['inserciones']} inserciones, "
+                              f"{estadisticas['extracciones']} extracciones, "
+                              f"máximo {estadisticas['frontera_maxima']}\n")
+                    texto += f"  • Evaluaciones de heurística: {estadisticas['evaluaciones_heuristica']}\n"
+                    texto += (f"  • Tiempo: {estadisticas['tiempo_ms']:.3f} ms "
+                              f"(CPU {estadisticas['tiempo_cpu_ms']:.3f} ms)\n")
+                
                 texto += f"  • Ruta: {' → '.join(resultado['ruta'])}\n\n"
         
-        # Actualizar texto en la interfaz
-        self.root.after(0, lambda: self._actualizar_texto_resultados(texto))
+        # Actualizar texto en la interfaz (salvo que la búsqueda ya sea obsoleta)
+        self._en_interfaz(lambda: self._actualizar_texto_resultados(texto), 'vista', token)
     
     def _actualizar_texto_resultados(self, texto):
         """Actualizar el contenido del área de resultados"""
@@ -515,16 +794,7 @@ class RutasCiudadesApp:
         if dialogo.resultado:
             nombre, latitud, longitud = dialogo.resultado
             
-            self.mostrar_mensaje_estado(f"Añadiendo nueva ciudad: {nombre}...")
-            
-            # Ejecutar en un hilo
-            threading.Thread(target=self._ejecutar_nueva_ciudad, 
-                            args=(nombre, latitud, longitud)).start()
-    
-    def _ejecutar_nueva_ciudad(self, nombre, latitud, longitud):
-        """Añadir una nueva ciudad a la base de datos"""
-        try:
-            # Solicitar conexiones para la nueva ciudad
+            # Solicitar conexiones para la nueva ciudad (los diálogos se abren en el hilo de Tk)
             dialogo_conexiones = DialogoSeleccionConexiones(self.root, "Conexiones para la nueva ciudad", self.ciudades, nombre)
             conexiones = dialogo_conexiones.resultado
             
@@ -538,6 +808,14 @@ class RutasCiudadesApp:
                         'distancia': distancia
                     })
             
+            self.mostrar_mensaje_estado(f"Añadiendo nueva ciudad: {nombre}...")
+            
+            # Ejecutar en el hilo del grafo
+            self._enviar_grafo(self._ejecutar_nueva_ciudad, nombre, latitud, longitud, conexiones_para_bd)
+    
+    def _ejecutar_nueva_ciudad(self, nombre, latitud, longitud, conexiones_para_bd):
+        """Añadir una nueva ciudad y sus conexiones a la base de datos"""
+        try:
             # Crear la ciudad
             resultado = CiudadesCRUD.crear_ciudad(nombre, latitud, longitud, conexiones_para_bd)
             
@@ -546,16 +824,14 @@ class RutasCiudadesApp:
                 self.root.after(0, lambda: messagebox.showerror("Error", resultado["error"]))
                 return
             
-            # Recargar el grafo
-            self.G, self.coords, self.nombre_a_id = GeneradorGrafo.crear_grafo()
+            # Actualizar el grafo en memoria con la nueva ciudad y sus conexiones
+            self._aplicar_cambio_grafo(lambda G, coords, nombre_a_id: GeneradorGrafo.agregar_ciudad(G, coords, nombre_a_id, resultado))
             
             # Actualizar la lista de ciudades
-            self.ciudades = sorted(list(self.G.nodes()))
             self.root.after(0, self.actualizar_combos_ciudades)
             
             # Actualizar visualización
-            imagen_grafo = GeneradorGrafo.visualizar_grafo(self.G, self.coords, "grafo_actualizado.png")
-            self.root.after(0, lambda: self.mostrar_imagen(imagen_grafo))
+            self._mostrar_grafo()
             
             self.mostrar_mensaje_estado(f"Ciudad {nombre} añadida correctamente")
             self.root.after(0, lambda: messagebox.showinfo("Éxito", f"Ciudad {nombre} añadida correctamente"))
@@ -598,9 +874,8 @@ class RutasCiudadesApp:
             
             self.mostrar_mensaje_estado(f"Actualizando ciudad: {nombre}...")
             
-            # Ejecutar en un hilo
-            threading.Thread(target=self._ejecutar_editar_ciudad, 
-                            args=(ciudad_id, nombre, latitud, longitud)).start()
+            # Ejecutar en el hilo del grafo
+            self._enviar_grafo(self._ejecutar_editar_ciudad, ciudad_id, nombre, latitud, longitud)
     
     def _ejecutar_editar_ciudad(self, ciudad_id, nombre, latitud, longitud):
         """Actualizar una ciudad en la base de datos"""
@@ -612,16 +887,14 @@ class RutasCiudadesApp:
                 self.root.after(0, lambda: messagebox.showerror("Error", resultado["error"]))
                 return
             
-            # Recargar el grafo
-            self.G, self.coords, self.nombre_a_id = GeneradorGrafo.crear_grafo()
+            # Actualizar el grafo en memoria con los nuevos datos de la ciudad
+            self._aplicar_cambio_grafo(lambda G, coords, nombre_a_id: GeneradorGrafo.actualizar_ciudad(G, coords, nombre_a_id, resultado))
             
             # Actualizar la lista de ciudades
-            self.ciudades = sorted(list(self.G.nodes()))
             self.root.after(0, self.actualizar_combos_ciudades)
             
             # Actualizar visualización
-            imagen_grafo = GeneradorGrafo.visualizar_grafo(self.G, self.coords, "grafo_actualizado.png")
-            self.root.after(0, lambda: self.mostrar_imagen(imagen_grafo))
+            self._mostrar_grafo()
             
             self.mostrar_mensaje_estado(f"Ciudad {nombre} actualizada correctamente")
             self.root.after(0, lambda: messagebox.showinfo("Éxito", f"Ciudad {nombre} actualizada correctamente"))
@@ -655,8 +928,8 @@ class RutasCiudadesApp:
         ciudad_id = self.nombre_a_id[ciudad]
         self.mostrar_mensaje_estado(f"Eliminando ciudad: {ciudad}...")
         
-        # Ejecutar en un hilo
-        threading.Thread(target=self._ejecutar_eliminar_ciudad, args=(ciudad_id, ciudad)).start()
+        # Ejecutar en el hilo del grafo
+        self._enviar_grafo(self._ejecutar_eliminar_ciudad, ciudad_id, ciudad)
     
     def _ejecutar_eliminar_ciudad(self, ciudad_id, nombre_ciudad):
         """Eliminar una ciudad de la base de datos"""
@@ -668,16 +941,14 @@ class RutasCiudadesApp:
                 self.root.after(0, lambda: messagebox.showerror("Error", resultado["error"]))
                 return
             
-            # Recargar el grafo
-            self.G, self.coords, self.nombre_a_id = GeneradorGrafo.crear_grafo()
+            # Quitar la ciudad del grafo en memoria
+            self._aplicar_cambio_grafo(lambda G, coords, nombre_a_id: GeneradorGrafo.eliminar_ciudad(G, coords, nombre_a_id, nombre_ciudad))
             
             # Actualizar la lista de ciudades
-            self.ciudades = sorted(list(self.G.nodes()))
             self.root.after(0, self.actualizar_combos_ciudades)
             
             # Actualizar visualización
-            imagen_grafo = GeneradorGrafo.visualizar_grafo(self.G, self.coords, "grafo_actualizado.png")
-            self.root.after(0, lambda: self.mostrar_imagen(imagen_grafo))
+            self._mostrar_grafo()
             
             self.mostrar_mensaje_estado(f"Ciudad {nombre_ciudad} eliminada correctamente")
             self.root.after(0, lambda: messagebox.showinfo("Éxito", resultado["mensaje"]))
@@ -1,14 +1,8 @@
-import os
-from dotenv import load_dotenv
-from supabase import create_client
+import argparse
+import pandas as pd
+from almacenamiento import obtener_almacenamiento, TAMANO_LOTE
+from ciudades_crud import datos_modificados
 
-# Cargar variables de entorno
-load_dotenv()
-
-# Configurar conexión a Supabase
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 
 # Coordenadas geográficas de las ciudades ecuatorianas
 # Formato: nombre_ciudad: (latitud, longitud)
@@ -56,37 +50,93 @@ COORDENADAS_CIUDADES = {
     "Pedernales": (0.0739, -80.0522)
 }
 
-def actualizar_coordenadas():
-    """Actualiza las coordenadas de las ciudades en la base de datos"""
+def leer_coordenadas_csv(ruta_archivo, tamano_bloque=10000):
+    """
+    Leer un archivo CSV de coordenadas por bloques, sin cargarlo completo en memoria.
+    El archivo debe tener las columnas nombre, latitud y longitud.
+    
+    Yields:
+        Diccionarios {nombre_ciudad: (latitud, longitud)} de cada bloque
+    """
+    for bloque in pd.read_csv(ruta_archivo, usecols=['nombre', 'latitud', 'longitud'], chunksize=tamano_bloque):
+        bloque = bloque.dropna()
+        yield dict(zip(bloque['nombre'].astype(str).str.strip(),
+                       zip(bloque['latitud'].astype(float), bloque['longitud'].astype(float))))
+
+def calcular_cambios(ciudades_por_nombre, coordenadas):
+    """
+    Comparar las coordenadas nuevas con las actuales.
+    
+    Args:
+        ciudades_por_nombre: Diccionario {nombre: fila de la ciudad} con las coordenadas actuales
+        coordenadas: Diccionario {nombre: (latitud, longitud)} con las coordenadas nuevas
+    
+    Returns:
+        (cambios, sin_cambios): filas {'id', 'nombre', 'latitud', 'longitud'} a actualizar
+        y número de ciudades cuyas coordenadas ya eran las mismas
+    """
+    cambios = []
+    sin_cambios = 0
+    for nombre, (latitud, longitud) in coordenadas.items():
+        ciudad = ciudades_por_nombre.get(nombre)
+        if ciudad is None:
+            continue
+        
+        if (ciudad.get('latitud') is not None and ciudad.get('longitud') is not None
+                and abs(ciudad['latitud'] - latitud) < 1e-9 and abs(ciudad['longitud'] - longitud) < 1e-9):
+            sin_cambios += 1
+            continue
+        
+        cambios.append({'id': ciudad['id'], 'nombre': nombre, 'latitud': latitud, 'longitud': longitud})
+    return cambios, sin_cambios
+
+def actualizar_coordenadas(archivo_csv=None, tamano_lote=TAMANO_LOTE, tamano_bloque=10000):
+    """
+    Actualiza las coordenadas de las ciudades en la base de datos.
+    
+    Solo se envían las ciudades cuyas coordenadas cambiaron, por lotes en una sola
+    petición cada uno. Si se escribió algún lote, la versión del grafo aumenta y la
+    instantánea local se invalida (tenía las coordenadas anteriores).
+    
+    Args:
+        archivo_csv: CSV con columnas nombre, latitud y longitud (por defecto, COORDENADAS_CIUDADES)
+        tamano_lote: Número máximo de filas por petición
+        tamano_bloque: Filas del CSV que se leen a la vez
+    """
     print("Iniciando actualización de coordenadas...")
+    almacenamiento = obtener_almacenamiento()
     
-    # Obtener todas las ciudades de la base de datos
-    respuesta = supabase.table('ciudades').select('id, nombre').execute()
-    ciudades = respuesta.data
+    # Obtener todas las ciudades de la base de datos con sus coordenadas actuales
+    ciudades_por_nombre = {ciudad['nombre']: ciudad for ciudad in almacenamiento.listar_ciudades()}
+    
+    bloques = leer_coordenadas_csv(archivo_csv, tamano_bloque) if archivo_csv else [COORDENADAS_CIUDADES]
     
     contador_actualizaciones = 0
-    ciudades_no_encontradas = []
+    contador_sin_cambios = 0
+    nombres_con_coordenadas = set()
     
-    # Actualizar cada ciudad
-    for ciudad in ciudades:
-        nombre_ciudad = ciudad['nombre']
-        
-        # Buscar las coordenadas para esta ciudad
-        if nombre_ciudad in COORDENADAS_CIUDADES:
-            latitud, longitud = COORDENADAS_CIUDADES[nombre_ciudad]
+    escrito = False
+    try:
+        for coordenadas in bloques:
+            nombres_con_coordenadas.update(coordenadas)
+            cambios, sin_cambios = calcular_cambios(ciudades_por_nombre, coordenadas)
+            contador_sin_cambios += sin_cambios
             
-            # Actualizar la base de datos
-            supabase.table('ciudades').update({
-                'latitud': latitud,
-                'longitud': longitud
-            }).eq('id', ciudad['id']).execute()
-            
-            contador_actualizaciones += 1
-            print(f"Actualizada: {nombre_ciudad} ({latitud}, {longitud})")
-        else:
-            ciudades_no_encontradas.append(nombre_ciudad)
+            if cambios:
+                # Un lote puede quedar escrito aunque la llamada falle después
+                escrito = True
+                almacenamiento.actualizar_coordenadas(cambios, tamano_lote)
+                contador_actualizaciones += len(cambios)
+                for cambio in cambios:
+                    print(f"Actualizada: {cambio['nombre']} ({cambio['latitud']}, {cambio['longitud']})")
+    finally:
+        if escrito:
+            datos_modificados()
+    
+    ciudades_no_encontradas = [nombre for nombre in ciudades_por_nombre if nombre not in nombres_con_coordenadas]
     
-    print(f"\nActualización completada. {contador_actualizaciones} ciudades actualizadas.")
+    print(f"\nActualización completada. {contador_actualizaciones} ciudades actualizadas, "
+          f"{contador_sin_cambios} sin cambios.")
     
     if ciudades_no_encontradas:
         print(f"Advertencia: No se encontraron coordenadas para {len(ciudades_no_encontradas)} ciudades:")
@@ -94,4 +144,9 @@ def actualizar_coordenadas():
             print(f"  - {ciudad}")
 
 if __name__ == "__main__":
-    actualizar_coordenadas()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Actualizar las coordenadas de las ciudades")
+    parser.add_argument("archivo_csv", nargs="?", help="CSV con columnas nombre, latitud y longitud")
+    parser.add_argument("--lote", type=int, default=TAMANO_LOTE, help="Filas por petición")
+    args = parser.parse_args()
+    
+    actualizar_coordenadas(args.archivo_csv, args.lote)
@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+import networkx as nx
+from grafo_compacto import GrafoCompacto
+from almacenamiento import TAMANO_LOTE
+
+
+class MatrizDistancias:
+    """
+    Matriz N×N de distancias entre ciudades leída del Excel (Ecuador_Distancias.xls).
+
+    El bloque numérico se convierte una sola vez en un arreglo NumPy; las aristas
+    válidas (distancia positiva fuera de la diagonal) se obtienen con una máscara,
+    sin recorrer las celdas del DataFrame una por una.
+    """
+
+    def __init__(self, indices, nombres, matriz):
+        """
+        Args:
+            indices: Índice original (columna "No.") de cada ciudad
+            nombres: Lista con el nombre de cada ciudad
+            matriz: Arreglo N×N; matriz[i, j] es la distancia (km) de la ciudad i a la j
+        """
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.nombres = list(nombres)
+        self.matriz = np.asarray(matriz, dtype=np.float64)
+
+    @classmethod
+    def desde_dataframe(cls, df):
+        """
+        Construir la matriz a partir del DataFrame del Excel leído con header=1:
+        columna 0 el índice original, columna 1 el nombre de la ciudad y desde la
+        columna 2 una columna de distancias por ciudad, en el mismo orden que las filas.
+        Las filas sin índice numérico o sin nombre (encabezados) se descartan.
+        """
+        indices = pd.to_numeric(df.iloc[:, 0], errors='coerce')
+        nombres = df.iloc[:, 1]
+        filas = np.flatnonzero(indices.notna().to_numpy() & nombres.notna().to_numpy())
+        n = len(filas)
+
+        # Una sola conversión del bloque numérico; las celdas no numéricas quedan en NaN
+        bloque = df.iloc[filas, 2:2 + n].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+        matriz = np.full((n, n), np.nan)
+        matriz[:, :bloque.shape[1]] = bloque
+
+        return cls(indices.to_numpy()[filas], [str(nombre) for nombre in nombres.to_numpy()[filas]], matriz)
+
+    @classmethod
+    def desde_excel(cls, ruta_archivo):
+        """Leer el archivo Excel de distancias"""
+        try:
+            df = pd.read_excel(ruta_archivo, header=1, engine='openpyxl')
+        except Exception:
+            df = pd.read_excel(ruta_archivo, header=1, engine='xlrd')
+        return cls.desde_dataframe(df)
+
+    @property
+    def numero_ciudades(self):
+        """Número de ciudades de la matriz"""
+        return len(self.nombres)
+
+    def mascara_validas(self):
+        """Celdas con distancia positiva fuera de la diagonal"""
+        with np.errstate(invalid='ignore'):
+            validas = self.matriz > 0
+        np.fill_diagonal(validas, False)
+        return validas
+
+    def aristas(self):
+        """
+        Aristas dirigidas tal como aparecen en la matriz.
+
+        Returns:
+            (origenes, destinos, distancias): posiciones (0..N-1) de origen y destino
+            y distancia de cada celda válida, en orden por filas
+        """
+        validas = self.mascara_validas()
+        origenes, destinos = np.nonzero(validas)
+        return origenes, destinos, self.matriz[validas]
+
+    def aristas_no_dirigidas(self):
+        """
+        Una arista por par de ciudades conectadas. Si la matriz no es simétrica se
+        toma la menor de las dos distancias.
+
+        Returns:
+            (origenes, destinos, distancias) con origenes < destinos
+        """
+        distancias = np.where(self.mascara_validas(), self.matriz, np.inf)
+        distancias = np.minimum(distancias, distancias.T)
+        origenes, destinos = np.nonzero(np.triu(np.isfinite(distancias), k=1))
+        return origenes, destinos, distancias[origenes, destinos]
+
+    def crear_grafo(self, coords=None):
+        """
+        Crear el grafo NetworkX con su representación compacta ya construida.
+
+        Args:
+            coords: Diccionario opcional con coordenadas de las ciudades {nombre: (lat, lon)}
+        """
+        coords = coords or {}
+        origenes, destinos, distancias = self.aristas_no_dirigidas()
+
+        G = nx.Graph()
+        G.add_nodes_from(self.nombres)
+        nombres = np.array(self.nombres, dtype=object)
+        G.add_weighted_edges_from(zip(nombres[origenes], nombres[destinos], distancias.tolist()))
+
+        # El grafo compacto se arma directamente desde los arreglos de aristas
+        latitudes = [coords[nombre][0] if nombre in coords else np.nan for nombre in self.nombres]
+        longitudes = [coords[nombre][1] if nombre in coords else np.nan for nombre in self.nombres]
+        G.graph['compacto'] = GrafoCompacto.desde_aristas(self.nombres, [-1] * self.numero_ciudades,
+                                                          origenes, destinos, distancias, latitudes, longitudes)
+        return G
+
+    def lotes_distancias(self, nombre_a_id, tamano_lote=TAMANO_LOTE):
+        """
+        Generar los registros de la tabla distancias por lotes, listos para una
+        inserción masiva. Las ciudades sin id en nombre_a_id se omiten.
+
+        Args:
+            nombre_a_id: Diccionario {nombre: id} de las ciudades en la base de datos
+            tamano_lote: Número máximo de registros por lote
+
+        Yields:
+            Listas de registros {'origen_id', 'destino_id', 'distancia'}
+        """
+        ids = np.array([nombre_a_id.get(nombre, -1) for nombre in self.nombres], dtype=np.int64)
+        origenes, destinos, distancias = self.aristas()
+        conocidas = (ids[origenes] >= 0) & (ids[destinos] >= 0)
+        origenes = ids[origenes[conocidas]]
+        destinos = ids[destinos[conocidas]]
+        distancias = distancias[conocidas]
+
+        for inicio in range(0, len(distancias), tamano_lote):
+            fin = inicio + tamano_lote
+            yield [
+                {'origen_id': o, 'destino_id': d, 'distancia': km}
+                for o, d, km in zip(origenes[inicio:fin].tolist(), destinos[inicio:fin].tolist(),
+                                    distancias[inicio:fin].tolist())
+            ]
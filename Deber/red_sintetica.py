@@ -0,0 +1,170 @@
+import numpy as np
+import networkx as nx
+from grafo_compacto import GrafoCompacto
+from heuristicas import latitud_geocentrica, RADIO_TIERRA_KM
+from lat_long import COORDENADAS_CIUDADES
+
+# Rectángulo que contiene el Ecuador continental (latitud, longitud en grados)
+LATITUD_MIN, LATITUD_MAX = -5.0, 1.45
+LONGITUD_MIN, LONGITUD_MAX = -81.1, -75.2
+
+# Kilómetros por grado de latitud (para convertir la dispersión de los poblados)
+KM_POR_GRADO = 111.32
+
+
+def _haversine_pares(lat1, lon1, lat2, lon2):
+    """
+    Distancia de círculo máximo (km) entre pares de puntos, con la misma fórmula
+    que la heurística en línea recta (así las distancias por carretera nunca son
+    menores que la heurística).
+    """
+    lat1, lat2 = latitud_geocentrica(lat1), latitud_geocentrica(lat2)
+    dlat = lat2 - lat1
+    dlon = np.radians(lon2) - np.radians(lon1)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _indice_hilbert(x, y, orden):
+    """Posición de cada celda (x, y) enteras en la curva de Hilbert de 2**orden × 2**orden"""
+    n = 1 << orden
+    x = x.astype(np.int64)
+    y = y.astype(np.int64)
+    d = np.zeros(len(x), dtype=np.int64)
+    s = n >> 1
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        d += s * s * ((3 * rx.astype(np.int64)) ^ ry.astype(np.int64))
+
+        # Rotar el cuadrante para que la curva sea continua
+        invertir = ~ry & rx
+        x = np.where(invertir, n - 1 - x, x)
+        y = np.where(invertir, n - 1 - y, y)
+        intercambiar = ~ry
+        x, y = np.where(intercambiar, y, x), np.where(intercambiar, x, y)
+        s >>= 1
+    return d
+
+
+def _orden_hilbert(latitudes, longitudes, desplazamiento=0.0, orden=16):
+    """Orden de los puntos a lo largo de la curva de Hilbert (con la malla desplazada)"""
+    celdas = (1 << orden) - 1
+    x = ((longitudes - LONGITUD_MIN) / (LONGITUD_MAX - LONGITUD_MIN) + desplazamiento) % 1.0 * celdas
+    y = ((latitudes - LATITUD_MIN) / (LATITUD_MAX - LATITUD_MIN) + desplazamiento) % 1.0 * celdas
+    return np.argsort(_indice_hilbert(x, y, orden), kind='stable')
+
+
+def generar_puntos(nodos, poblados=200, fraccion_poblados=0.7, semilla=0):
+    """
+    Generar la ubicación de los nodos dentro del rectángulo del Ecuador.
+
+    Los centros de los poblados son las 40 ciudades reales más centros aleatorios;
+    el tamaño de cada poblado sigue una ley de potencias (pocos grandes, muchos
+    pequeños) y sus nodos se dispersan alrededor del centro. El resto de nodos se
+    reparte de forma uniforme (zonas rurales).
+
+    Returns:
+        (latitudes, longitudes)
+    """
+    rng = np.random.default_rng(semilla)
+    reales = np.array(list(COORDENADAS_CIUDADES.values()), dtype=np.float64)
+    extra = max(poblados - len(reales), 0)
+    centros = np.vstack([reales, np.column_stack([rng.uniform(LATITUD_MIN, LATITUD_MAX, extra),
+                                                  rng.uniform(LONGITUD_MIN, LONGITUD_MAX, extra)])])
+
+    tamanos = rng.pareto(1.2, len(centros)) + 1
+    en_poblados = rng.multinomial(int(nodos * fraccion_poblados), tamanos / tamanos.sum())
+
+    # Dispersión (km) creciente con el tamaño del poblado
+    dispersion = 1.5 + 12 * np.sqrt(tamanos / tamanos.max())
+    poblado = np.repeat(np.arange(len(centros)), en_poblados)
+    latitudes = centros[poblado, 0] + rng.normal(0, 1, len(poblado)) * dispersion[poblado] / KM_POR_GRADO
+    longitudes = centros[poblado, 1] + rng.normal(0, 1, len(poblado)) * dispersion[poblado] / KM_POR_GRADO
+
+    rurales = nodos - len(poblado)
+    latitudes = np.clip(np.concatenate([latitudes, rng.uniform(LATITUD_MIN, LATITUD_MAX, rurales)]),
+                        LATITUD_MIN, LATITUD_MAX)
+    longitudes = np.clip(np.concatenate([longitudes, rng.uniform(LONGITUD_MIN, LONGITUD_MAX, rurales)]),
+                         LONGITUD_MIN, LONGITUD_MAX)
+    return latitudes, longitudes
+
+
+def generar_aristas(latitudes, longitudes, vecinos=3, ventana=4, semilla=0):
+    """
+    Unir cada nodo con sus vecinos más cercanos (aproximados) y convertir la
+    distancia geodésica en distancia por carretera.
+
+    Los candidatos de cada nodo son los nodos cercanos en dos órdenes de la curva
+    de Hilbert (uno con la malla desplazada). Se conservan los `vecinos` candidatos
+    más cercanos de cada nodo, lo que da aristas cortas y casi sin cruces, y los
+    pasos consecutivos del primer orden, que garantizan que el grafo sea conexo.
+    La distancia por carretera es la geodésica multiplicada por un factor de rodeo
+    de al menos 1.
+
+    Returns:
+        (origenes, destinos, distancias) de las aristas no dirigidas
+    """
+    rng = np.random.default_rng(semilla)
+    n = len(latitudes)
+
+    ordenes = [_orden_hilbert(latitudes, longitudes), _orden_hilbert(latitudes, longitudes, 0.37)]
+    a = np.concatenate([orden[:-paso] for orden in ordenes for paso in range(1, ventana + 1)])
+    b = np.concatenate([orden[paso:] for orden in ordenes for paso in range(1, ventana + 1)])
+    km = _haversine_pares(latitudes[a], longitudes[a], latitudes[b], longitudes[b])
+
+    # Los k candidatos más cercanos de cada nodo (en ambas direcciones)
+    nodo = np.concatenate([a, b])
+    otro = np.concatenate([b, a])
+    km_dirigido = np.concatenate([km, km])
+    orden = np.lexsort((km_dirigido, nodo))
+    nodo, otro = nodo[orden], otro[orden]
+    primeros = np.searchsorted(nodo, np.arange(n))
+    rango = np.arange(len(nodo)) - primeros[nodo]
+    cercanos = rango < vecinos
+
+    # Aristas del camino de Hilbert: garantizan la conexidad
+    camino = ordenes[0]
+    origenes = np.concatenate([nodo[cercanos], camino[:-1]])
+    destinos = np.concatenate([otro[cercanos], camino[1:]])
+
+    # Una sola arista por par (sin lazos)
+    u, v = np.minimum(origenes, destinos), np.maximum(origenes, destinos)
+    distintos = u != v
+    claves = np.unique(u[distintos] * n + v[distintos])
+    origenes, destinos = claves // n, claves % n
+
+    geodesicas = _haversine_pares(latitudes[origenes], longitudes[origenes], latitudes[destinos], longitudes[destinos])
+    rodeo = 1.0 + rng.gamma(2.0, 0.08, len(geodesicas))
+    return origenes, destinos, np.maximum(geodesicas * rodeo, 1e-3)
+
+
+def generar_red_vial(nodos, poblados=200, fraccion_poblados=0.7, vecinos=3, semilla=0):
+    """
+    Generar una red vial sintética sobre el Ecuador como grafo compacto.
+
+    Args:
+        nodos: Número de nodos (intersecciones)
+        poblados: Número de poblados (incluye las 40 ciudades reales)
+        fraccion_poblados: Fracción de los nodos que pertenece a algún poblado
+        vecinos: Vecinos más cercanos con los que se une cada nodo
+        semilla: Semilla aleatoria (la misma semilla genera la misma red)
+
+    Returns:
+        GrafoCompacto con nombres enteros 0..nodos-1 y coordenadas
+    """
+    latitudes, longitudes = generar_puntos(nodos, poblados, fraccion_poblados, semilla)
+    origenes, destinos, distancias = generar_aristas(latitudes, longitudes, vecinos, semilla=semilla)
+    return GrafoCompacto.desde_aristas(list(range(nodos)), [-1] * nodos, origenes, destinos, distancias,
+                                       latitudes, longitudes)
+
+
+def crear_grafo_busqueda(compacto):
+    """
+    Grafo NetworkX vacío que solo contiene la representación compacta.
+    AlgoritmosBusqueda trabaja sobre G.graph['compacto'], así que no hace falta
+    crear millones de nodos NetworkX para las redes grandes.
+    """
+    G = nx.Graph()
+    G.graph['compacto'] = compacto
+    return G
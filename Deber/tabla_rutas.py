@@ -0,0 +1,100 @@
+import os
+import numpy as np
+
+
+class TablaRutas:
+    """
+    Matrices de distancias y siguiente salto entre todos los pares de ciudades.
+    
+    distancias[i, j] es la distancia mínima de i a j y siguientes[i, j] es el
+    primer nodo después de i en esa ruta (-1 si no hay ruta). Con estas matrices
+    cada consulta se responde sin ejecutar ninguna búsqueda.
+    """
+    
+    def __init__(self, nombres, distancias, siguientes, firma):
+        """
+        Args:
+            nombres: Lista con el nombre de cada nodo (mismo orden que el grafo compacto)
+            distancias: Matriz n×n de distancias mínimas (inf si no hay ruta)
+            siguientes: Matriz n×n con el siguiente salto de cada ruta
+            firma: Huella del grafo a partir del cual se calcularon las matrices
+        """
+        self.nombres = list(nombres)
+        self.distancias = distancias
+        self.siguientes = siguientes
+        self.firma = firma
+    
+    @classmethod
+    def calcular(cls, grafo):
+        """
+        Calcular las matrices con Floyd–Warshall vectorizado sobre el grafo compacto.
+        Cada iteración relaja todos los pares a la vez a través del nodo intermedio k.
+        """
+        n = grafo.numero_nodos
+        distancias = np.full((n, n), np.inf)
+        siguientes = np.full((n, n), -1, dtype=np.int32)
+        
+        # Aristas directas (si hubiera aristas paralelas se conserva la menor)
+        fuentes = np.repeat(np.arange(n), np.diff(grafo.offsets))
+        np.minimum.at(distancias, (fuentes, grafo.vecinos), grafo.pesos)
+        directas = np.isfinite(distancias)
+        siguientes[directas] = np.nonzero(directas)[1]
+        
+        np.fill_diagonal(distancias, 0.0)
+        np.fill_diagonal(siguientes, np.arange(n))
+        
+        for k in range(n):
+            via_k = distancias[:, k, None] + distancias[None, k, :]
+            mejora = via_k < distancias
+            distancias = np.where(mejora, via_k, distancias)
+            siguientes = np.where(mejora, siguientes[:, k, None], siguientes)
+        
+        return cls(grafo.nombres, distancias, siguientes, grafo.firma)
+    
+    def ruta(self, origen, destino):
+        """Desenrollar la ruta de origen a destino (ids enteros), o None si no existe"""
+        if self.siguientes[origen, destino] < 0:
+            return None
+        
+        camino = [origen]
+        while camino[-1] != destino:
+            camino.append(int(self.siguientes[camino[-1], destino]))
+        return camino
+    
+    def distancia(self, origen, destino):
+        """Distancia mínima de origen a destino"""
+        return float(self.distancias[origen, destino])
+    
+    def guardar(self, ruta_archivo):
+        """Guardar las matrices en disco (escritura atómica)"""
+        temporal = ruta_archivo + '.tmp'
+        with open(temporal, 'wb') as archivo:
+            np.savez_compressed(
+                archivo,
+                nombres=np.array(self.nombres),
+                distancias=self.distancias,
+                siguientes=self.siguientes,
+                firma=np.array(self.firma)
+            )
+        os.replace(temporal, ruta_archivo)
+        print(f"Tabla de rutas guardada en {ruta_archivo}")
+    
+    @classmethod
+    def cargar(cls, ruta_archivo, grafo):
+        """
+        Cargar las matrices desde disco.
+        Devuelve None si el archivo no existe o fue calculado para otro grafo.
+        """
+        if not os.path.exists(ruta_archivo):
+            return None
+        
+        try:
+            with np.load(ruta_archivo) as datos:
+                firma = str(datos['firma'])
+                if firma != grafo.firma:
+                    print(f"La tabla de rutas en {ruta_archivo} no corresponde al grafo actual")
+                    return None
+                return cls(datos['nombres'].tolist(), datos['distancias'], datos['siguientes'], firma)
+        except Exception as e:
+            print(f"Error al cargar la tabla de rutas: {e}")
+            return None